@@ -5,8 +5,8 @@ from .forms import RegisterForm
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.views.generic import DeleteView
 from django.urls import reverse_lazy
-from projects.models import Project, ProjectMembership
-from django.db import transaction
+from django.contrib import messages
+from jobs.queue import enqueue
 
 
 def register(request):
@@ -34,17 +34,8 @@ class UserDeleteView(UserPassesTestMixin, DeleteView):
     def get_object(self, queryset=None):
         return get_object_or_404(User, pk=self.kwargs['pk'])
 
-    @transaction.atomic
-    def delete(self, request, *args, **kwargs):
-        user = self.get_object()
-
-        owned_projects = Project.objects.filter(
-            projectmembership__user=user,
-            projectmembership__role='owner'
-        )
-
-        if owned_projects.exists():
-            for project in owned_projects:
-                project.delete()
-
-        return super().delete(request, *args, **kwargs)
\ No newline at end of file
+    def form_valid(self, form):
+        # Проекты владельца и сам пользователь удаляются в фоне пакетами
+        job = enqueue('projects.delete_user', {'user_id': self.object.pk}, user=self.request.user)
+        messages.success(self.request, f"Пользователь {self.object} удаляется (задача {job.pk})")
+        return redirect(self.get_success_url())
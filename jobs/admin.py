@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import Job, Schedule
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'priority', 'attempts', 'run_at', 'created_by', 'started_at', 'finished_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('worker', 'locked_until', 'created_at', 'started_at', 'finished_at')
+
+
+@admin.register(Schedule)
+class ScheduleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'next_run_at', 'last_enqueued_at')
@@ -0,0 +1,13 @@
+from io import StringIO
+
+from django.core.management import call_command as django_call_command
+
+from .queue import register
+
+
+@register('jobs.call_command', visibility_timeout=60 * 60)
+def call_command(job, command, options=None):
+    """Management-команда как фоновая задача (периодические cleanup_old_tasks и т. п.)"""
+    output = StringIO()
+    django_call_command(command, stdout=output, **(options or {}))
+    job.report(output=output.getvalue()[-2000:])
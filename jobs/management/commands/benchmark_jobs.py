@@ -0,0 +1,71 @@
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from jobs.models import Job
+from jobs.queue import register
+
+
+@register('jobs.benchmark_noop')
+def benchmark_noop(job, sleep=0):
+    if sleep:
+        time.sleep(sleep)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пропускная способность очереди задач (задач в секунду) при разном числе воркеров '
+        'на временной файловой базе SQLite'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=2000, help='Задач на прогон')
+        parser.add_argument('--workers', default='1,2,4,8', help='Размеры пула через запятую')
+        parser.add_argument('--mode', choices=['thread', 'process'], default='thread')
+        parser.add_argument('--work-ms', type=float, default=0,
+                            help='Сколько «работает» каждая задача (sleep), мс')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда рассчитана на SQLite')
+        try:
+            levels = [int(level) for level in options['workers'].split(',') if level.strip()]
+        except ValueError:
+            raise CommandError('--workers: ожидаются целые числа через запятую')
+
+        settings_dict = connection.settings_dict
+        saved_name = settings_dict['TEST'].get('NAME')
+        with tempfile.TemporaryDirectory() as directory:
+            # Файловая база: воркеры-процессы и потоки открывают свои соединения
+            settings_dict['TEST']['NAME'] = str(Path(directory) / 'jobs.sqlite3')
+            connection.close()
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                for workers in levels:
+                    rate = self.measure(workers, options)
+                    self.stdout.write(f'  воркеров {workers:<3} ({options["mode"]}): {rate:9.1f} задач/с')
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                settings_dict['TEST']['NAME'] = saved_name
+
+    def measure(self, workers, options):
+        Job.objects.all().delete()
+        payload = {'sleep': options['work_ms'] / 1000} if options['work_ms'] else {}
+        Job.objects.bulk_create(
+            [Job(name='jobs.benchmark_noop', payload=payload) for _ in range(options['jobs'])],
+            batch_size=500,
+        )
+        started = time.perf_counter()
+        call_command('run_workers', workers=workers, mode=options['mode'], once=True,
+                     no_schedule=True, poll_interval=0.05, stdout=StringIO())
+        elapsed = time.perf_counter() - started
+
+        done = Job.objects.filter(status=Job.Status.DONE).count()
+        if done != options['jobs']:
+            raise CommandError(f'Выполнено {done} из {options["jobs"]} задач')
+        return done / elapsed
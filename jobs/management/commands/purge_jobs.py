@@ -0,0 +1,55 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Удаляет выполненные и упавшие фоновые задачи старше N дней'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7,
+                            help='Сколько дней хранить выполненные задачи (по finished_at)')
+        parser.add_argument('--failed-days', type=int, default=30,
+                            help='Сколько дней хранить упавшие задачи (по finished_at)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Сколько задач удалять за одну транзакцию')
+        parser.add_argument('--sleep-between-batches', type=float, default=0.0,
+                            help='Пауза между пакетами в секундах')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать задачи, ничего не удаляя')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        querysets = [
+            Job.objects.filter(status=Job.Status.DONE, finished_at__lt=now - timedelta(days=options['days'])),
+            Job.objects.filter(status=Job.Status.FAILED,
+                               finished_at__lt=now - timedelta(days=options['failed_days'])),
+        ]
+        batch_size = max(1, options['batch_size'])
+
+        if options['dry_run']:
+            total = sum(queryset.count() for queryset in querysets)
+            self.stdout.write(f'Будет удалено {total} фоновых задач (dry run)')
+            return
+
+        deleted_count = 0
+        # По статусу отдельно: каждый пакет — диапазон индекса (status, finished_at)
+        for queryset in querysets:
+            while True:
+                with transaction.atomic():
+                    ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+                    if not ids:
+                        break
+                    deleted, _ = Job.objects.filter(pk__in=ids).delete()
+                deleted_count += deleted
+                if len(ids) < batch_size:
+                    break
+                if options['sleep_between_batches']:
+                    time.sleep(options['sleep_between_batches'])
+
+        self.stdout.write(self.style.SUCCESS(f'Удалено {deleted_count} фоновых задач'))
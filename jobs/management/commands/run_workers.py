@@ -0,0 +1,85 @@
+import logging
+import multiprocessing
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from jobs import queue
+
+logger = logging.getLogger(__name__)
+
+
+def _process_main(stop, once, poll_interval):
+    queue.work(stop, once, poll_interval)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из очереди (jobs.Job) пулом потоков или процессов '
+        'и ставит периодические задачи из settings.JOBS["SCHEDULE"]'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Размер пула')
+        parser.add_argument('--mode', choices=['thread', 'process'], default='thread',
+                            help='Потоки (задачи в основном ждут базу) или процессы (CPU)')
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить всё, что есть в очереди, и выйти')
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help='Пауза между опросами пустой очереди, секунд')
+        parser.add_argument('--no-schedule', action='store_true',
+                            help='Не ставить периодические задачи (их ставит другой экземпляр)')
+
+    def handle(self, *args, **options):
+        poll_interval = options['poll_interval']
+        if poll_interval is None:
+            poll_interval = queue.options()['POLL_INTERVAL']
+        schedule = not options['no_schedule']
+        if schedule:
+            queue.sync_schedules()
+            queue.run_schedules()
+
+        if options['once'] and options['workers'] <= 1:
+            # Один проход одним воркером — прямо в этом процессе
+            done = queue.work(once=True, poll_interval=poll_interval)
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+
+        stop, workers = self.start(options['mode'], max(1, options['workers']), options['once'], poll_interval)
+        self.stdout.write(f'Запущено воркеров: {len(workers)} ({options["mode"]})')
+        try:
+            while any(worker.is_alive() for worker in workers):
+                if schedule and not options['once']:
+                    try:
+                        queue.run_schedules()
+                    except DatabaseError:
+                        logger.exception('Не удалось поставить периодические задачи')
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            self.stdout.write('Остановка: воркеры доделывают текущие задачи')
+            stop.set()
+        for worker in workers:
+            worker.join()
+        self.stdout.write('Воркеры остановлены')
+
+    def start(self, mode, count, once, poll_interval):
+        if mode == 'process':
+            # Дочерние процессы не должны унаследовать открытые соединения
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            stop = context.Event()
+            workers = [
+                context.Process(target=_process_main, args=(stop, once, poll_interval), daemon=True)
+                for _ in range(count)
+            ]
+        else:
+            stop = threading.Event()
+            workers = [
+                threading.Thread(target=queue.work, args=(stop, once, poll_interval), daemon=True)
+                for _ in range(count)
+            ]
+        for worker in workers:
+            worker.start()
+        return stop, workers
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:25
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Schedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Расписание')),
+                ('next_run_at', models.DateTimeField(verbose_name='Следующий запуск')),
+                ('last_enqueued_at', models.DateTimeField(blank=True, null=True, verbose_name='Последний запуск')),
+            ],
+            options={
+                'verbose_name': 'Расписание',
+                'verbose_name_plural': 'Расписания',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='jobs_job_status_277b31_idx',
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, verbose_name='Попыток'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='max_attempts',
+            field=models.PositiveIntegerField(default=3, verbose_name='Максимум попыток'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='priority',
+            field=models.SmallIntegerField(default=0, verbose_name='Приоритет'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='run_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Запустить не раньше'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', '-priority', 'run_at'], name='jobs_job_status_66c96c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'locked_until'], name='jobs_job_status_715db5_idx'),
+        ),
+    ]
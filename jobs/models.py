@@ -0,0 +1,86 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Фоновая задача: имя зарегистрированного обработчика и его аргументы"""
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнена'
+        FAILED = 'failed', 'Ошибка'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100, verbose_name='Обработчик')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='Аргументы')
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.QUEUED,
+        verbose_name='Статус'
+    )
+    # Больше — раньше
+    priority = models.SmallIntegerField(default=0, verbose_name='Приоритет')
+    # Не раньше этого момента: отложенный запуск и пауза перед повтором
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='Запустить не раньше')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Попыток')
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name='Максимум попыток')
+    progress = models.JSONField(default=dict, blank=True, verbose_name='Прогресс')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    # Метка захвата: итог задачи пишет только воркер, который её забрал
+    worker = models.CharField(max_length=64, blank=True, editable=False)
+    # Пока не истекло, задачу считают выполняемой; потом её заберёт другой воркер
+    locked_until = models.DateTimeField(null=True, blank=True, editable=False)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Поставил'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создана')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Начата')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Завершена')
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            # Выбор следующей задачи: status='queued' AND run_at <= now ORDER BY -priority, run_at
+            models.Index(fields=['status', '-priority', 'run_at']),
+            # Задачи с истёкшей блокировкой
+            models.Index(fields=['status', 'locked_until']),
+            # Очистка завершённых (purge_jobs)
+            models.Index(fields=['status', 'finished_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
+
+    def report(self, **progress):
+        """Сохраняет прогресс и продлевает блокировку одним UPDATE"""
+        from .queue import lease_until
+
+        self.progress = {**self.progress, **progress}
+        Job.objects.filter(pk=self.pk, worker=self.worker).update(
+            progress=self.progress, locked_until=lease_until(self.name)
+        )
+
+
+class Schedule(models.Model):
+    """Когда периодическая задача из settings.JOBS['SCHEDULE'] запускается в следующий раз"""
+    name = models.CharField(max_length=100, unique=True, verbose_name='Расписание')
+    next_run_at = models.DateTimeField(verbose_name='Следующий запуск')
+    last_enqueued_at = models.DateTimeField(null=True, blank=True, verbose_name='Последний запуск')
+
+    class Meta:
+        verbose_name = 'Расписание'
+        verbose_name_plural = 'Расписания'
+
+    def __str__(self):
+        return self.name
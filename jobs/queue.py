@@ -0,0 +1,221 @@
+"""Очередь фоновых задач в основной базе, без внешнего брокера.
+
+Обработчик регистрируется декоратором в модуле <app>/jobs.py:
+
+    @register('projects.delete_project')
+    def delete_project(job, project_id):
+        ...
+
+enqueue() ставит задачу, воркер (команда run_workers) забирает её условным
+UPDATE и вызывает обработчик с аргументами из payload; обработчик может
+сообщать прогресс через job.report(...), что заодно продлевает блокировку.
+
+Надёжность — «хотя бы один раз»: задача, чей воркер упал, по истечении
+visibility timeout достаётся другому, поэтому обработчики должны
+выдерживать повторный запуск. Упавшая задача повторяется с
+экспоненциальной паузой, пока не исчерпает max_attempts.
+"""
+import logging
+import random
+import threading
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, models, transaction
+from django.utils import timezone
+
+from .models import Job, Schedule
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+# Параметры обработчиков: {name: {'visibility_timeout': ..., 'max_attempts': ...}}
+OPTIONS = {}
+# Предельная пауза воркера после ошибки базы, секунд
+DB_ERROR_BACKOFF_MAX = 60
+
+
+def options():
+    return {
+        'VISIBILITY_TIMEOUT': 300,
+        'MAX_ATTEMPTS': 3,
+        'RETRY_BACKOFF': 10,
+        'RETRY_BACKOFF_MAX': 3600,
+        'POLL_INTERVAL': 1.0,
+        'SCHEDULE': {},
+        **getattr(settings, 'JOBS', {}),
+    }
+
+
+def register(name, visibility_timeout=None, max_attempts=None):
+    def decorator(func):
+        HANDLERS[name] = func
+        OPTIONS[name] = {'visibility_timeout': visibility_timeout, 'max_attempts': max_attempts}
+        return func
+    return decorator
+
+
+def lease_until(name):
+    timeout = OPTIONS.get(name, {}).get('visibility_timeout') or options()['VISIBILITY_TIMEOUT']
+    return timezone.now() + timedelta(seconds=timeout)
+
+
+def enqueue(name, payload=None, user=None, priority=0, run_at=None, max_attempts=None):
+    if name not in HANDLERS:
+        raise ValueError(f'Неизвестный обработчик задачи: {name}')
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        created_by=user,
+        priority=priority,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or OPTIONS[name]['max_attempts'] or options()['MAX_ATTEMPTS'],
+    )
+
+
+def _available(now):
+    return (
+        models.Q(status=Job.Status.QUEUED, run_at__lte=now)
+        | models.Q(status=Job.Status.RUNNING, locked_until__lt=now)
+    )
+
+
+def claim():
+    """Забирает следующую задачу (по приоритету, затем по run_at) или возвращает None.
+
+    Кандидат выбирается по индексу очереди, захват — условный UPDATE по
+    первичному ключу: двое воркеров не получат одну задачу, а проигравший
+    гонку берёт следующего кандидата. Задачи с истёкшей блокировкой
+    забираются заново.
+    """
+    while True:
+        now = timezone.now()
+        pk = Job.objects.filter(_available(now)).order_by('-priority', 'run_at').values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        claimed = Job.objects.filter(_available(now), pk=pk).update(
+            status=Job.Status.RUNNING,
+            worker=uuid.uuid4().hex,
+            started_at=now,
+            # Уточняется по обработчику ниже; до того — общий таймаут
+            locked_until=now + timedelta(seconds=options()['VISIBILITY_TIMEOUT']),
+            attempts=models.F('attempts') + 1,
+        )
+        if claimed:
+            break
+    job = Job.objects.get(pk=pk)
+    if OPTIONS.get(job.name, {}).get('visibility_timeout'):
+        job.locked_until = lease_until(job.name)
+        Job.objects.filter(pk=job.pk, worker=job.worker).update(locked_until=job.locked_until)
+    return job
+
+
+def retry_delay(attempts):
+    """Экспоненциальная пауза перед повтором со случайным разбросом"""
+    opts = options()
+    delay = min(opts['RETRY_BACKOFF_MAX'], opts['RETRY_BACKOFF'] * 2 ** max(0, attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+def run(job):
+    handler = HANDLERS.get(job.name)
+    updates = {}
+    try:
+        if handler is None:
+            raise LookupError(f'Неизвестный обработчик задачи: {job.name}')
+        if job.attempts > job.max_attempts:
+            raise RuntimeError('Исчерпаны попытки: воркер не завершил задачу до истечения блокировки')
+        handler(job, **job.payload)
+    except Exception:
+        logger.exception('Задача %s (%s) завершилась ошибкой', job.pk, job.name)
+        updates['error'] = traceback.format_exc()
+        if handler is not None and job.attempts < job.max_attempts:
+            updates.update(status=Job.Status.QUEUED, run_at=timezone.now() + retry_delay(job.attempts))
+        else:
+            updates['status'] = Job.Status.FAILED
+    else:
+        updates.update(status=Job.Status.DONE, error='')
+    updates['finished_at'] = timezone.now()
+    # Если блокировка истекла и задачу забрал другой воркер, итог пишет он
+    if not Job.objects.filter(pk=job.pk, worker=job.worker).update(locked_until=None, **updates):
+        logger.warning('Задача %s (%s): блокировка потеряна, результат не записан', job.pk, job.name)
+    for field, value in updates.items():
+        setattr(job, field, value)
+    return job
+
+
+def run_next():
+    """Выполняет одну задачу из очереди; None, если очередь пуста"""
+    job = claim()
+    if job is None:
+        return None
+    return run(job)
+
+
+def sync_schedules():
+    """Создаёт строки Schedule для записей settings.JOBS['SCHEDULE']"""
+    now = timezone.now()
+    for name in options()['SCHEDULE']:
+        Schedule.objects.get_or_create(name=name, defaults={'next_run_at': now})
+
+
+def run_schedules():
+    """Ставит в очередь наступившие периодические задачи; возвращает их число.
+
+    Следующий запуск сдвигается условным UPDATE, поэтому при нескольких
+    воркерах задача ставится один раз.
+    """
+    schedule = options()['SCHEDULE']
+    if not schedule:
+        return 0
+    now = timezone.now()
+    enqueued = 0
+    for name in Schedule.objects.filter(name__in=schedule, next_run_at__lte=now).values_list('name', flat=True):
+        entry = schedule[name]
+        with transaction.atomic():
+            moved = Schedule.objects.filter(name=name, next_run_at__lte=now).update(
+                next_run_at=now + timedelta(seconds=entry['every']), last_enqueued_at=now
+            )
+            if moved:
+                enqueue(entry['job'], entry.get('payload'), priority=entry.get('priority', 0))
+                enqueued += 1
+    return enqueued
+
+
+def work(stop=None, once=False, poll_interval=None):
+    """Цикл воркера: выполняет задачи, пока не выставят stop (или, при
+    once, пока очередь не опустеет); возвращает число выполненных задач.
+
+    Ошибка базы (недоступна, занята, соединение оборвалось) не роняет
+    воркер: итерация пропускается, соединение закрывается, следующая
+    попытка — после паузы, растущей до DB_ERROR_BACKOFF_MAX.
+    """
+    stop = stop or threading.Event()
+    poll_interval = options()['POLL_INTERVAL'] if poll_interval is None else poll_interval
+    done = errors = 0
+    try:
+        while not stop.is_set():
+            # Как между HTTP-запросами: закрыть устаревшее соединение
+            close_old_connections()
+            try:
+                job = run_next()
+            except DatabaseError:
+                errors += 1
+                logger.exception('Воркер: ошибка базы (подряд: %s)', errors)
+                connection.close()
+                if once:
+                    break
+                stop.wait(min(DB_ERROR_BACKOFF_MAX, max(poll_interval, 1) * 2 ** (errors - 1)))
+                continue
+            errors = 0
+            if job is not None:
+                done += 1
+                continue
+            if once:
+                break
+            stop.wait(poll_interval)
+    finally:
+        connection.close()
+    return done
@@ -0,0 +1,167 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError, models
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Job, Schedule
+
+User = get_user_model()
+
+calls = []
+
+
+@queue.register('tests.record')
+def record(job, value):
+    job.report(seen=value)
+    calls.append(value)
+
+
+@queue.register('tests.fail')
+def fail(job):
+    raise RuntimeError('boom')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_run_in_order(self):
+        first = queue.enqueue('tests.record', {'value': 1})
+        queue.enqueue('tests.record', {'value': 2})
+        call_command('run_workers', once=True, no_schedule=True, stdout=StringIO())
+
+        self.assertEqual(calls, [1, 2])
+        first.refresh_from_db()
+        self.assertEqual(first.status, Job.Status.DONE)
+        self.assertEqual(first.progress, {'seen': 1})
+        self.assertIsNotNone(first.finished_at)
+
+    def test_claimed_job_is_not_claimed_again(self):
+        job = queue.enqueue('tests.record', {'value': 1})
+        self.assertEqual(queue.claim().pk, job.pk)
+        self.assertIsNone(queue.claim())
+
+    def test_claim_by_pk_skips_lost_race(self):
+        first = queue.enqueue('tests.record', {'value': 1}, priority=1)
+        second = queue.enqueue('tests.record', {'value': 2})
+        real_update = models.QuerySet.update
+
+        def steal_first(queryset, **kwargs):
+            # Другой воркер успел забрать кандидата между SELECT и UPDATE
+            if not Job.objects.filter(pk=first.pk, status=Job.Status.RUNNING).exists():
+                real_update(Job.objects.filter(pk=first.pk), status=Job.Status.RUNNING, worker='other',
+                            locked_until=timezone.now() + timedelta(minutes=5))
+            return real_update(queryset, **kwargs)
+
+        with mock.patch.object(models.QuerySet, 'update', steal_first):
+            job = queue.claim()
+        self.assertEqual((job.pk, job.attempts, job.status), (second.pk, 1, Job.Status.RUNNING))
+        self.assertEqual(Job.objects.get(pk=first.pk).worker, 'other')
+
+    def test_worker_survives_database_errors(self):
+        queue.enqueue('tests.record', {'value': 1})
+        stop = threading.Event()
+        real_run_next = queue.run_next
+        failures = iter([True, True])
+
+        def flaky():
+            if next(failures, False):
+                raise OperationalError('database is locked')
+            job = real_run_next()
+            if job is None:
+                stop.set()
+            return job
+
+        with mock.patch.object(queue, 'run_next', flaky), mock.patch.object(stop, 'wait') as wait, \
+                mock.patch.object(queue.connection, 'close'), self.assertLogs('jobs.queue', 'ERROR') as logs:
+            self.assertEqual(queue.work(stop, poll_interval=1), 1)
+        self.assertEqual(calls, [1])
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual([call.args[0] for call in wait.call_args_list], [1, 2, 1])
+
+    def test_purge_jobs(self):
+        old = timezone.now() - timedelta(days=10)
+        done = queue.enqueue('tests.record', {'value': 1})
+        failed = queue.enqueue('tests.fail')
+        recent = queue.enqueue('tests.record', {'value': 2})
+        queued = queue.enqueue('tests.record', {'value': 3})
+        Job.objects.filter(pk__in=[done.pk, failed.pk, queued.pk]).update(finished_at=old)
+        Job.objects.filter(pk__in=[done.pk, recent.pk]).update(status=Job.Status.DONE)
+        Job.objects.filter(pk=recent.pk).update(finished_at=timezone.now())
+        Job.objects.filter(pk=failed.pk).update(status=Job.Status.FAILED)
+
+        out = StringIO()
+        call_command('purge_jobs', batch_size=1, stdout=out)
+        self.assertIn('Удалено 1', out.getvalue())
+        self.assertEqual(set(Job.objects.values_list('pk', flat=True)), {failed.pk, recent.pk, queued.pk})
+        call_command('purge_jobs', failed_days=5, stdout=StringIO())
+        self.assertFalse(Job.objects.filter(pk=failed.pk).exists())
+
+    def test_priority_and_run_at(self):
+        queue.enqueue('tests.record', {'value': 'low'})
+        queue.enqueue('tests.record', {'value': 'later'}, priority=9, run_at=timezone.now() + timedelta(hours=1))
+        queue.enqueue('tests.record', {'value': 'high'}, priority=5)
+        while queue.run_next():
+            pass
+        self.assertEqual(calls, ['high', 'low'])
+
+    def test_retry_with_backoff_then_fail(self):
+        job = queue.enqueue('tests.fail', max_attempts=2)
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            queue.run_next()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('RuntimeError: boom', job.error)
+        self.assertIsNone(queue.claim())
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            queue.run_next()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 2))
+
+    def test_expired_lease_is_reclaimed(self):
+        job = queue.enqueue('tests.record', {'value': 1})
+        stale = queue.claim()
+        self.assertIsNone(queue.claim())
+
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        fresh = queue.claim()
+        self.assertEqual((fresh.pk, fresh.attempts), (job.pk, 2))
+        # Первый воркер проснулся: результат не записывается, задача у второго
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            queue.run(stale)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (Job.Status.RUNNING, fresh.worker))
+
+    @override_settings(JOBS={'SCHEDULE': {
+        'nightly': {'job': 'tests.record', 'payload': {'value': 'n'}, 'every': 3600},
+    }})
+    def test_schedule_enqueues_once_per_period(self):
+        queue.sync_schedules()
+        self.assertEqual(queue.run_schedules(), 1)
+        self.assertEqual(queue.run_schedules(), 0)
+        self.assertEqual(Job.objects.filter(name='tests.record').count(), 1)
+        self.assertGreater(Schedule.objects.get(name='nightly').next_run_at, timezone.now())
+
+    def test_unknown_handler(self):
+        with self.assertRaises(ValueError):
+            queue.enqueue('tests.missing')
+
+    def test_status_endpoint(self):
+        owner = User.objects.create_user('owner', password='pass')
+        job = queue.enqueue('tests.record', {'value': 1}, user=owner)
+        url = f'/api/jobs/{job.pk}/'
+
+        self.client.force_login(User.objects.create_user('stranger'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(owner)
+        self.assertEqual(self.client.get(url).json()['status'], 'queued')
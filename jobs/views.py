@@ -0,0 +1,26 @@
+from django.shortcuts import get_object_or_404
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Job
+
+
+class JobStatusView(APIView):
+    """Статус и прогресс фоновой задачи (видны поставившему и staff)"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        jobs = Job.objects.all()
+        if not request.user.is_staff:
+            jobs = jobs.filter(created_by=request.user)
+        job = get_object_or_404(jobs, pk=pk)
+        return Response({
+            'id': str(job.pk),
+            'name': job.name,
+            'status': job.status,
+            'progress': job.progress,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at,
+        })
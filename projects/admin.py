@@ -1,12 +1,25 @@
 from django.contrib import admin
 from .models import Project, ProjectMembership, ProjectInvitation
-from django.db.models import Q
-from django.http import HttpResponse
-import csv
+from .exports import streaming_export
+from .search import search_queryset
 
 # Register your models here.
 
-admin.site.register(ProjectMembership)
+@admin.register(ProjectMembership)
+class ProjectMembershipAdmin(admin.ModelAdmin):
+    actions = ['export_as_csv', 'export_as_ndjson']
+
+    def export_as_csv(self, request, queryset):
+        return streaming_export(queryset, 'csv', filename='memberships_export')
+
+    export_as_csv.short_description = "Экспорт выбранных участий в CSV"
+
+    def export_as_ndjson(self, request, queryset):
+        return streaming_export(queryset, 'ndjson', filename='memberships_export')
+
+    export_as_ndjson.short_description = "Экспорт выбранных участий в NDJSON"
+
+
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
     list_display = ('title', 'created_at', 'show_completed')
@@ -16,42 +29,21 @@ class ProjectAdmin(admin.ModelAdmin):
         qs = super().get_queryset(request)
         query = request.GET.get('q')
         if query:
-            qs = qs.filter(
-                Q(title__icontains=query) | Q(description__icontains=query)
-            )
+            qs = search_queryset(qs, query, order_by_rank=False)
         return qs
     
-    actions = ['export_as_csv']
+    actions = ['export_as_csv', 'export_as_ndjson']
 
     def export_as_csv(self, request, queryset):
-        meta = self.model._meta
-        field_names = [field.name for field in meta.fields]
-
-        response = HttpResponse(
-            content_type='text/csv; charset=utf-8-sig'
-        )
-        response['Content-Disposition'] = 'attachment; filename=projects_export.csv'
-        
-        writer = csv.writer(response, delimiter=';')
-        
-        # Заголовки
-        writer.writerow(field_names)
-        
-        # Данные
-        for obj in queryset:
-            row = []
-            for field in field_names:
-                value = getattr(obj, field)
-                # Если поле — это datetime, преобразуем в читаемый формат
-                if hasattr(value, 'strftime'):
-                    value = value.strftime('%Y-%m-%d %H:%M:%S')
-                row.append(value)
-            writer.writerow(row)
-            
-        return response
+        return streaming_export(queryset, 'csv', filename='projects_export')
     
     export_as_csv.short_description = "Экспорт выбранных проектов в CSV"
 
+    def export_as_ndjson(self, request, queryset):
+        return streaming_export(queryset, 'ndjson', filename='projects_export')
+
+    export_as_ndjson.short_description = "Экспорт выбранных проектов в NDJSON"
+
 @admin.register(ProjectInvitation)
 class ProjectInvitationAdmin(admin.ModelAdmin):
     list_display = (
@@ -0,0 +1,66 @@
+"""Кеш-бэкенды со счётчиками попаданий/промахов.
+
+Экземпляры бэкендов создаются на каждый поток, поэтому счётчики хранятся
+на уровне процесса и группируются по LOCATION кеша.
+"""
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.module_loading import import_string
+
+_lock = threading.Lock()
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_MISSING = object()
+
+
+class CacheStatsMixin:
+    def _count(self, outcome):
+        with _lock:
+            _stats[str(self._stats_location)][outcome] += 1
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return value
+
+
+class CountingLocMemCache(CacheStatsMixin, LocMemCache):
+    """Локальная память процесса — для одного воркера"""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._stats_location = name
+
+
+class CountingFileBasedCache(CacheStatsMixin, FileBasedCache):
+    """Файловый кеш — общий для нескольких воркеров на одной машине"""
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._stats_location = dir
+
+
+def cache_stats():
+    """{alias: {'hits', 'misses', 'hit_ratio'}} для кешей со счётчиками"""
+    with _lock:
+        snapshot = {location: dict(values) for location, values in _stats.items()}
+    result = {}
+    for alias, config in settings.CACHES.items():
+        if not issubclass(import_string(config['BACKEND']), CacheStatsMixin):
+            continue
+        values = snapshot.get(str(config.get('LOCATION', '')), {'hits': 0, 'misses': 0})
+        total = values['hits'] + values['misses']
+        values['hit_ratio'] = round(values['hits'] / total, 3) if total else None
+        result[alias] = values
+    return result
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
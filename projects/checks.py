@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_session_cache(app_configs, **kwargs):
+    """SESSION_ENGINE=cache хранит сессии только в кеше: он должен быть общим для воркеров"""
+    if settings.SESSION_ENGINE != 'django.contrib.sessions.backends.cache':
+        return []
+    if not isinstance(caches[settings.SESSION_CACHE_ALIAS], LocMemCache):
+        return []
+    return [Error(
+        f'Кеш сессий {settings.SESSION_CACHE_ALIAS!r} — память процесса (locmem)',
+        hint='Сессия, созданная одним воркером, не видна другим, а после перезапуска теряется. '
+             'Задайте TODO_CACHE_BACKEND=file или TODO_SESSION_ENGINE=cached_db.',
+        id='projects.E001',
+    )]
+
+
+@register(Tags.caches, deploy=True)
+def check_roles_cache(app_configs, **kwargs):
+    """Роли в памяти процесса: invalidate_user не доходит до других воркеров"""
+    if not isinstance(caches[settings.ROLES_CACHE_ALIAS], LocMemCache):
+        return []
+    return [Warning(
+        f'Кеш ролей {settings.ROLES_CACHE_ALIAS!r} — память процесса (locmem)',
+        hint='С несколькими воркерами отозванный доступ действует в других процессах до истечения '
+             'кеша. Задайте TODO_CACHE_BACKEND=file.',
+        id='projects.W001',
+    )]
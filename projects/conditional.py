@@ -0,0 +1,108 @@
+"""Условные GET (ETag / Last-Modified) на основе Project.version.
+
+Валидаторы вычисляются одним лёгким запросом к projects_project до
+рендеринга шаблонов и сериализации. В ETag входят версия, пользователь,
+строка запроса и заголовки, от которых зависит тело ответа.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import oneshot
+from .models import Project
+
+
+def make_etag(request, *parts):
+    """ETag ответа (без кавычек). CSRF-cookie входит в ключ, чтобы после
+    повторного входа не отдавать страницу с формами под старый токен."""
+    parts = (
+        getattr(request.user, 'pk', None),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        request.get_full_path(),
+        request.headers.get('HX-Request', ''),
+        request.headers.get('Accept', ''),
+        *parts,
+    )
+    return hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+def has_pending_state(request):
+    """Есть одноразовые данные (сообщения, ссылка-приглашение) — кешировать нельзя"""
+    if oneshot.pending(request):
+        return True
+    return bool(len(messages.get_messages(request)))
+
+
+def project_validators(request, project_id):
+    """(etag, last_modified) проекта, доступного пользователю, или (None, None)"""
+    if not request.user.is_authenticated or has_pending_state(request):
+        return None, None
+    row = Project.objects.filter(pk=project_id, users=request.user).values_list(
+        'version', 'changed_at'
+    ).first()
+    if row is None:
+        return None, None
+    version, changed_at = row
+    return make_etag(request, project_id, version), changed_at
+
+
+def user_projects_etag(request):
+    """ETag для списков по всем проектам пользователя.
+
+    Last-Modified не отдаём: проект может исчезнуть из списка без роста
+    max(changed_at), а сумма версий и количество это учитывают.
+    """
+    if not request.user.is_authenticated or has_pending_state(request):
+        return None
+    stats = Project.objects.filter(users=request.user).aggregate(
+        count=Count('pk'), versions=Sum('version'), changed=Max('changed_at')
+    )
+    return make_etag(request, stats['count'], stats['versions'], stats['changed'])
+
+
+def not_modified(request, etag=None, last_modified=None):
+    """HttpResponseNotModified, если у клиента актуальная версия, иначе None"""
+    if etag is None:
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=f'"{etag}"', last_modified=timestamp)
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag is not None and response.status_code == 200:
+        response['ETag'] = f'"{etag}"'
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        response['Vary'] = 'Cookie, Accept, HX-Request'
+    return response
+
+
+class ConditionalGetMixin:
+    """Для DRF-вьюсетов: 304 для list/retrieve до сериализации.
+
+    Вьюсет реализует get_list_validators() и get_object_validators(),
+    возвращающие (etag, last_modified).
+    """
+
+    def get_list_validators(self):
+        return user_projects_etag(self.request), None
+
+    def get_object_validators(self):
+        return None, None
+
+    def _conditional(self, validators, handler, *args, **kwargs):
+        etag, last_modified = validators
+        response = not_modified(self.request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(handler(*args, **kwargs), etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(self.get_list_validators(), super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(self.get_object_validators(), super().retrieve, request, *args, **kwargs)
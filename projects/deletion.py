@@ -0,0 +1,112 @@
+"""Пакетное удаление проектов и пользователей (фоновые задачи, см. projects/jobs.py).
+
+project.delete() сначала загружает в память все задачи, участников и
+приглашения проекта, а затем удаляет их в одной транзакции, держа
+блокировку записи SQLite всё это время. Здесь зависимые строки удаляются
+сырым SQL пакетами по batch_size, и каждый пакет идёт в своей короткой
+транзакции. Первыми удаляются членства, поэтому проект сразу пропадает у
+участников. Прерванное удаление безопасно продолжить повторным запуском.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from tasks.models import Task
+from . import roles, search
+from .models import Project, ProjectInvitation, ProjectMembership
+
+BATCH_SIZE = 1000
+
+
+def _noop(**progress):
+    pass
+
+
+def _execute_for_pks(sql, model, pks):
+    pk_field = model._meta.pk
+    params = [pk_field.get_db_prep_value(pk, connection) for pk in pks]
+    placeholders = ', '.join(['%s'] * len(params))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql.format(table=connection.ops.quote_name(model._meta.db_table),
+                       pk=connection.ops.quote_name(pk_field.column),
+                       pks=placeholders),
+            params
+        )
+        return cursor.rowcount
+
+
+def _in_batches(queryset, batch_size, apply, progress, stage):
+    """apply(pks) для пакетов queryset, пока он не опустеет"""
+    done = 0
+    progress(stage=stage, done=0)
+    while True:
+        with transaction.atomic():
+            # Без сортировки модели (Task: -created_at): иначе SQLite сортирует весь набор
+            pks = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            apply(pks)
+        done += len(pks)
+        progress(stage=stage, done=done)
+        if len(pks) < batch_size:
+            break
+    return done
+
+
+def _delete(model, batch_size, progress, stage, queryset, after=None):
+    def apply(pks):
+        _execute_for_pks('DELETE FROM {table} WHERE {pk} IN ({pks})', model, pks)
+        if after is not None:
+            after(pks)
+    return _in_batches(queryset, batch_size, apply, progress, stage)
+
+
+def delete_project(project_id, batch_size=BATCH_SIZE, progress=_noop):
+    """Удаляет проект и всё, что к нему относится; False, если его уже нет"""
+    memberships = ProjectMembership.objects.filter(project_id=project_id)
+    user_ids = list(memberships.values_list('user_id', flat=True))
+    _delete(ProjectMembership, batch_size, progress, 'memberships', memberships)
+    # Сырой DELETE не шлёт сигналов: роли участников сбрасываем сами
+    for user_id in user_ids:
+        roles.invalidate_user(user_id)
+
+    _delete(ProjectInvitation, batch_size, progress, 'invitations',
+            ProjectInvitation.objects.filter(project_id=project_id))
+    # Счётчики задач не трогаем: проект удаляется следом
+    _delete(Task, batch_size, progress, 'tasks', Task.objects.filter(project_id=project_id),
+            after=lambda pks: search.unindex_objects(Task, pks))
+
+    project = Project.objects.filter(pk=project_id).first()
+    if project is None:
+        return False
+    # Зависимых строк не осталось: обычный delete() ради истории и сигналов
+    project.delete()
+    progress(stage='done')
+    return True
+
+
+def delete_user(user_id, batch_size=BATCH_SIZE, progress=_noop):
+    """Удаляет проекты, которыми владеет пользователь, затем его самого"""
+    owned = list(Project.objects.filter(
+        projectmembership__user_id=user_id,
+        projectmembership__role='owner',
+    ).values_list('pk', flat=True))
+    for number, project_id in enumerate(owned, 1):
+        delete_project(
+            project_id, batch_size,
+            progress=lambda **values: progress(project=f'{number}/{len(owned)}', **values),
+        )
+
+    # Задачи пользователя в чужих проектах остаются без автора (SET_NULL)
+    _in_batches(
+        Task.objects.filter(author_id=user_id), batch_size,
+        lambda pks: _execute_for_pks('UPDATE {table} SET author_id = NULL WHERE {pk} IN ({pks})', Task, pks),
+        progress, 'authored_tasks',
+    )
+
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if user is None:
+        return False
+    user.delete()
+    progress(stage='done')
+    return True
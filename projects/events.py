@@ -0,0 +1,288 @@
+"""Брокер событий проекта для потока SSE (ProjectEvents).
+
+Изменения задач и участников публикуются после коммита транзакции
+(publish()) и раздаются подписчикам процесса через asyncio-очереди: одно
+соединение — одна очередь, а не поток. Хранение и доставка между
+процессами — дело бэкенда:
+
+* MemoryBackend — кольцевой буфер в памяти, события видны только в своём
+  процессе;
+* FileBackend — журнал на проект в каталоге EVENTS['DIR'] (запись под
+  flock), который каждый процесс читает одним общим опросчиком на проект.
+
+Оба бэкенда хранят последние BUFFER_SIZE событий проекта — из них клиент
+догоняет пропущенное по Last-Event-ID.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import defaultdict, deque
+from functools import partial
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows: межпроцессной блокировки нет
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Очередь подписчика; переполнилась — соединение закрывается, клиент
+# переподключается и догоняет из буфера
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Event:
+    __slots__ = ('id', 'project_id', 'type', 'data')
+
+    def __init__(self, id, project_id, type, data):
+        self.id = id
+        self.project_id = str(project_id)
+        self.type = type
+        self.data = data
+
+    def to_dict(self):
+        return {'id': self.id, 'project': self.project_id, 'type': self.type, 'data': self.data}
+
+    @classmethod
+    def from_dict(cls, row):
+        return cls(row['id'], row['project'], row['type'], row['data'])
+
+    def encode(self, epoch):
+        """Кадр text/event-stream; id с эпохой бэкенда, чтобы после рестарта
+        процесса (счётчик с нуля) старый Last-Event-ID не скрывал новые события"""
+        data = json.dumps(self.data, ensure_ascii=False, default=str)
+        return f'id: {epoch}-{self.id}\nevent: {self.type}\ndata: {data}\n\n'
+
+
+class MemoryBackend:
+    """События в памяти процесса"""
+    local = True
+
+    def __init__(self, buffer_size):
+        self.buffer_size = buffer_size
+        self.epoch = uuid.uuid4().hex[:8]
+        self._buffers = defaultdict(partial(deque, maxlen=buffer_size))
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def append(self, project_id, type, data):
+        with self._lock:
+            event = Event(next(self._ids), project_id, type, data)
+            self._buffers[event.project_id].append(event)
+        return event
+
+    def since(self, project_id, last_id):
+        """(события после last_id, потеряна ли часть истории)"""
+        with self._lock:
+            buffer = list(self._buffers.get(str(project_id), ()))
+        return _after(buffer, last_id)
+
+
+class FileBackend:
+    """Журнал событий на проект: <dir>/<project>.log (JSON-строки) и
+    <dir>/<project>.seq (последний id). Журнал ужимается до buffer_size
+    строк заменой файла, поэтому читатели следят и за смещением, и за inode."""
+    local = False
+    # Нумерация хранится в .seq и переживает перезапуск
+    epoch = 'log'
+
+    def __init__(self, buffer_size, directory, poll_interval=0.5):
+        self.buffer_size = buffer_size
+        self.directory = Path(directory)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+
+    def _path(self, project_id, suffix):
+        return self.directory / f'{project_id}.{suffix}'
+
+    def append(self, project_id, type, data):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self._path(project_id, 'lock'), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            seq_path = self._path(project_id, 'seq')
+            try:
+                last_id = int(seq_path.read_text() or 0)
+            except FileNotFoundError:
+                last_id = 0
+            event = Event(last_id + 1, project_id, type, data)
+            log_path = self._path(project_id, 'log')
+            with open(log_path, 'a', encoding='utf-8') as log:
+                log.write(json.dumps(event.to_dict(), ensure_ascii=False, default=str) + '\n')
+            seq_path.write_text(str(event.id))
+            if event.id % self.buffer_size == 0:
+                self._compact(log_path)
+        return event
+
+    def _compact(self, log_path):
+        lines = log_path.read_text(encoding='utf-8').splitlines(keepends=True)
+        if len(lines) <= self.buffer_size:
+            return
+        tmp_path = log_path.with_suffix('.tmp')
+        tmp_path.write_text(''.join(lines[-self.buffer_size:]), encoding='utf-8')
+        os.replace(tmp_path, log_path)
+
+    def read(self, project_id, offset=0, inode=None):
+        """Читает журнал с offset: (события, новое смещение, inode).
+        Если файл заменён (другой inode) — читает сначала."""
+        path = self._path(project_id, 'log')
+        try:
+            with open(path, encoding='utf-8') as log:
+                current = os.fstat(log.fileno()).st_ino
+                if current != inode:
+                    offset = 0
+                log.seek(offset)
+                chunk = log.read()
+        except FileNotFoundError:
+            return [], 0, None
+        # Недописанную последнюю строку оставляем до следующего чтения
+        complete = chunk[:chunk.rfind('\n') + 1]
+        events = [Event.from_dict(json.loads(line)) for line in complete.splitlines() if line]
+        return events, offset + len(complete.encode('utf-8')), current
+
+    def since(self, project_id, last_id):
+        events, _, _ = self.read(project_id)
+        return _after(events, last_id)
+
+
+def _after(events, last_id):
+    if last_id is None:
+        return [], False
+    missed = [event for event in events if event.id > last_id]
+    # Первое сохранённое событие дальше следующего за last_id — часть потеряна
+    gap = bool(events) and events[0].id > last_id + 1
+    return missed, gap
+
+
+class Subscription:
+    """Очередь одного соединения в цикле событий его процесса"""
+
+    def __init__(self, project_id):
+        self.project_id = str(project_id)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class Broker:
+    def __init__(self, backend):
+        self.backend = backend
+        self._subscribers = defaultdict(set)
+        self._watchers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, project_id, type, data):
+        try:
+            event = self.backend.append(project_id, type, data)
+        except OSError:
+            logger.exception('Не удалось опубликовать событие %s проекта %s', type, project_id)
+            return None
+        if self.backend.local:
+            self._dispatch(event)
+        return event
+
+    def _dispatch(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(event.project_id, ()))
+        for subscription in subscribers:
+            if subscription.loop.is_closed():
+                continue
+            # publish вызывается из потоков синхронных вьюх и сигналов
+            subscription.loop.call_soon_threadsafe(subscription.offer, event)
+
+    def subscribe(self, project_id):
+        subscription = Subscription(project_id)
+        with self._lock:
+            self._subscribers[subscription.project_id].add(subscription)
+        if not self.backend.local:
+            self._ensure_watcher(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.project_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.project_id, None)
+
+    @property
+    def epoch(self):
+        return self.backend.epoch
+
+    def parse_event_id(self, value):
+        """Last-Event-ID -> (номер, узнан ли он). Чужая эпоха или мусор —
+        (None, False): история клиента неизвестна"""
+        epoch, _, number = (value or '').rpartition('-')
+        if epoch != self.epoch or not number.isdigit():
+            return None, False
+        return int(number), True
+
+    def backlog(self, project_id, last_id):
+        return self.backend.since(project_id, last_id)
+
+    def _ensure_watcher(self, subscription):
+        key = (subscription.loop, subscription.project_id)
+        with self._lock:
+            watcher = self._watchers.get(key)
+            if watcher is None or watcher.done():
+                # Позиция фиксируется сразу: всё, что появится после, раздаст
+                # опросчик, а более раннее подписчик берёт из backlog()
+                events, offset, inode = self.backend.read(subscription.project_id)
+                last_id = events[-1].id if events else 0
+                self._watchers[key] = subscription.loop.create_task(
+                    self._watch(subscription.project_id, key, offset, inode, last_id)
+                )
+
+    async def _watch(self, project_id, key, offset, inode, last_id):
+        """Один опросчик журнала на проект в процессе, пока есть подписчики"""
+        while True:
+            await asyncio.sleep(self.backend.poll_interval)
+            with self._lock:
+                if not self._subscribers.get(project_id):
+                    self._watchers.pop(key, None)
+                    return
+            events, offset, inode = self.backend.read(project_id, offset, inode)
+            for event in events:
+                if event.id > last_id:
+                    last_id = event.id
+                    self._dispatch(event)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = Broker(_make_backend(settings.EVENTS))
+    return _broker
+
+
+def _make_backend(options):
+    if options['BACKEND'] == 'file':
+        return FileBackend(options['BUFFER_SIZE'], options['DIR'], options['POLL_INTERVAL'])
+    return MemoryBackend(options['BUFFER_SIZE'])
+
+
+def publish(project_id, type, data=None):
+    """Публикует событие проекта после коммита текущей транзакции"""
+    if project_id is None:
+        return
+    transaction.on_commit(partial(get_broker().publish, project_id, type, data or {}))
@@ -0,0 +1,105 @@
+"""Потоковый экспорт проектов, задач и участников в CSV / NDJSON.
+
+Строки читаются через values_list().iterator(chunk_size=...) без создания
+моделей, один csv.writer переиспользуется, а ответ отдаётся частями через
+StreamingHttpResponse — потребление памяти не зависит от числа строк.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from django.http import StreamingHttpResponse
+
+from .models import Project, ProjectMembership
+
+CHUNK_SIZE = 2000
+# Сколько строк собирать в один кусок ответа
+ROWS_PER_CHUNK = 500
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def _task_model():
+    from tasks.models import Task
+    return Task
+
+
+# Что можно экспортировать: вид -> модель
+EXPORTS = {
+    'projects': lambda: Project,
+    'tasks': _task_model,
+    'memberships': lambda: ProjectMembership,
+}
+
+
+def export_columns(model):
+    """Имена колонок (field.name) и соответствующие им атрибуты для values_list"""
+    fields = model._meta.concrete_fields
+    return [field.name for field in fields], [field.attname for field in fields]
+
+
+def _format_csv_value(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def _format_json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_csv(queryset, names, attnames, chunk_size=CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+
+    def flush():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data.encode('utf-8')
+
+    # BOM — чтобы Excel распознал UTF-8
+    yield '\ufeff'.encode('utf-8')
+    writer.writerow(names)
+    pending = 1
+    for row in queryset.values_list(*attnames).iterator(chunk_size=chunk_size):
+        writer.writerow([_format_csv_value(value) for value in row])
+        pending += 1
+        if pending >= ROWS_PER_CHUNK:
+            yield flush()
+            pending = 0
+    yield flush()
+
+
+def iter_ndjson(queryset, names, attnames, chunk_size=CHUNK_SIZE):
+    encoder = json.JSONEncoder(ensure_ascii=False, default=_format_json_value)
+    lines = []
+    for row in queryset.values_list(*attnames).iterator(chunk_size=chunk_size):
+        lines.append(encoder.encode(dict(zip(names, row))))
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def streaming_export(queryset, fmt='csv', filename=None):
+    """StreamingHttpResponse с выгрузкой queryset в формате fmt (csv/ndjson)"""
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown export format: {fmt}')
+
+    names, attnames = export_columns(queryset.model)
+    rows = iter_csv if fmt == 'csv' else iter_ndjson
+    response = StreamingHttpResponse(
+        rows(queryset.order_by(), names, attnames),
+        content_type=FORMATS[fmt]
+    )
+    filename = filename or f'{queryset.model._meta.model_name}s_export'
+    response['Content-Disposition'] = f'attachment; filename={filename}.{fmt}'
+    return response
@@ -0,0 +1,35 @@
+"""Кеш HTML-фрагментов, зависящий от версии проекта.
+
+Ключ фрагмента строится из Project.version и параметров отображения,
+поэтому любое изменение проекта, его задач или участников (сигналы
+Task/Project/ProjectMembership увеличивают версию) автоматически делает
+старые записи недостижимыми. CSRF-токен в кеш не попадает: фрагмент
+рендерится с заглушкой, которая подменяется токеном текущего запроса.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.middleware.csrf import get_token
+
+CSRF_PLACEHOLDER = 'csrf-token-placeholder-6f1d2c'
+
+
+def fragment_cache():
+    return caches[settings.FRAGMENT_CACHE_ALIAS]
+
+
+def fragment_key(name, *parts):
+    digest = hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+    return f'fragment:{name}:{digest}'
+
+
+def cached_fragment(request, name, key_parts, render):
+    """HTML фрагмента из кеша или render(csrf_token) с сохранением в кеш"""
+    cache = fragment_cache()
+    key = fragment_key(name, *key_parts)
+    html = cache.get(key)
+    if html is None:
+        html = render(CSRF_PLACEHOLDER)
+        cache.set(key, html)
+    return html.replace(CSRF_PLACEHOLDER, get_token(request))
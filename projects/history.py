@@ -0,0 +1,94 @@
+"""История проектов (HistoricalProject): запись только реальных изменений
+и политика хранения для команды compact_project_history.
+
+Политика (settings.PROJECT_HISTORY): строки моложе KEEP_ALL_DAYS дней
+хранятся все; у более старых для каждого проекта остаётся последняя строка
+за сутки или неделю (GRANULARITY), а также строки создания и удаления.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from simple_history.models import HistoricalRecords
+
+# Поля, которые меняются при каждом save() и сами по себе не являются правкой
+VOLATILE_FIELDS = {'updated_at'}
+
+
+class ChangedOnlyHistoricalRecords(HistoricalRecords):
+    """HistoricalRecords, пропускающий save() без изменений отслеживаемых полей"""
+
+    def contribute_to_class(self, cls, name):
+        super().contribute_to_class(cls, name)
+        # Для Model.from_db: запомнить загруженное состояние
+        cls._history_records = self
+
+    def tracked_attnames(self, instance):
+        return [
+            field.attname for field in self.fields_included(instance)
+            if field.name not in VOLATILE_FIELDS
+        ]
+
+    def post_save(self, instance, created, using=None, **kwargs):
+        if not created and not kwargs.get('raw', False) and not self.has_changes(instance):
+            return
+        super().post_save(instance, created, using=using, **kwargs)
+        self.remember_state(instance)
+
+    def remember_state(self, instance):
+        attnames = self.tracked_attnames(instance)
+        if any(attname not in instance.__dict__ for attname in attnames):
+            # Отложенные поля: сравнение пойдёт с последней строкой истории
+            instance.__dict__.pop('_history_state', None)
+            return
+        instance._history_state = {attname: instance.__dict__[attname] for attname in attnames}
+
+    def has_changes(self, instance):
+        """Сравнивает с состоянием при загрузке (без запросов), иначе — с
+        последней строкой истории"""
+        attnames = self.tracked_attnames(instance)
+        previous = getattr(instance, '_history_state', None)
+        if previous is None:
+            previous = getattr(instance, self.manager_name).order_by(
+                '-history_date', '-history_id'
+            ).values(*attnames).first()
+            if previous is None:
+                return True
+        return any(previous.get(attname) != getattr(instance, attname) for attname in attnames)
+
+
+def policy():
+    options = getattr(settings, 'PROJECT_HISTORY', {})
+    granularity = options.get('GRANULARITY', 'day')
+    if granularity not in ('day', 'week'):
+        raise ValueError(f'PROJECT_HISTORY["GRANULARITY"]: ожидается day или week, а не {granularity!r}')
+    return options.get('KEEP_ALL_DAYS', 30), granularity
+
+
+def retention_cutoff(keep_all_days, now=None):
+    return (now or timezone.now()) - timedelta(days=keep_all_days)
+
+
+def bucket(history_date, granularity):
+    date = timezone.localdate(history_date)
+    if granularity == 'week':
+        return date.isocalendar()[:2]
+    return date
+
+
+def prunable(rows, granularity):
+    """history_id строк, которые политика позволяет удалить.
+
+    rows — (history_id, id, history_date, history_type) строк старше
+    границы; в каждом интервале проекта остаётся последняя строка.
+    """
+    latest = {}
+    doomed = []
+    ordered = sorted(rows, key=lambda row: (row[2], row[0]))
+    for history_id, obj_id, history_date, history_type in ordered:
+        key = (obj_id, bucket(history_date, granularity))
+        previous = latest.get(key)
+        if previous is not None and previous[1] == '~':
+            doomed.append(previous[0])
+        latest[key] = (history_id, history_type)
+    return doomed
@@ -0,0 +1,61 @@
+"""Упорядоченные по времени UUID (версия 7, RFC 9562) для первичных ключей.
+
+Старшие 48 бит — время в миллисекундах, поэтому новые строки дописываются
+в конец B-дерева первичного ключа, а не в случайное место (меньше
+разделений страниц, горячие страницы остаются в кеше), и сортировка по id
+совпадает с порядком создания. Следующие 12 бит — счётчик внутри
+миллисекунды (порядок сохраняется и при нескольких ключах за мс),
+остальные 62 бита случайные.
+"""
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+_COUNTER_MAX = 0xFFF
+_RANDOM_MASK = (1 << 62) - 1
+
+
+def uuid7(timestamp_ms=None):
+    """Новый UUIDv7; timestamp_ms задаёт время явно (перевыпуск старых ключей)
+    и в этом случае монотонность не отслеживается"""
+    global _last_ms, _counter
+
+    rand = int.from_bytes(os.urandom(10), 'big')
+    if timestamp_ms is not None:
+        ms, counter = timestamp_ms, (rand >> 64) & _COUNTER_MAX
+    else:
+        ms = time.time_ns() // 1_000_000
+        with _lock:
+            if ms > _last_ms:
+                # Случайное начало со старшим нулевым битом: запас для инкрементов
+                _counter = (rand >> 64) & 0x7FF
+                _last_ms = ms
+            else:
+                # Та же миллисекунда или часы ушли назад — продолжаем последовательность
+                _counter += 1
+                if _counter > _COUNTER_MAX:
+                    _last_ms += 1
+                    _counter = 0
+                ms = _last_ms
+            counter = _counter
+
+    value = (
+        (ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | counter << 64
+        | 0b10 << 62
+        | rand & _RANDOM_MASK
+    )
+    return uuid.UUID(int=value)
+
+
+def timestamp_ms(value):
+    """Время создания UUIDv7 в миллисекундах (None для других версий)"""
+    if value.version != 7:
+        return None
+    return value.int >> 80
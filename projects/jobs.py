@@ -0,0 +1,13 @@
+from jobs.queue import register
+
+from . import deletion
+
+
+@register('projects.delete_project')
+def delete_project(job, project_id):
+    deletion.delete_project(project_id, progress=job.report)
+
+
+@register('projects.delete_user')
+def delete_user(job, user_id):
+    deletion.delete_user(user_id, progress=job.report)
@@ -0,0 +1,152 @@
+import asyncio
+import statistics
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from projects.models import ProjectMembership
+from .benchmark_views import SCALES
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает синхронные (/api/projects/, /api/tasks/) и асинхронные (/api/async/...) '
+        'эндпоинты под todo.asgi при разной конкурентности: пропускная способность и перцентили'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', default='small', choices=list(SCALES))
+        parser.add_argument('--concurrency', default='1,10,50,200',
+                            help='Уровни одновременных запросов через запятую')
+        parser.add_argument('--requests', type=int, default=200, help='Запросов на уровень')
+        parser.add_argument('--db-latency', type=float, default=0,
+                            help='Искусственная задержка каждого SQL-запроса, мс (удалённая база)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            levels = sorted({int(level) for level in options['concurrency'].split(',') if level.strip()})
+        except ValueError:
+            raise CommandError('--concurrency: ожидаются целые числа через запятую')
+        if not levels or levels[0] < 1:
+            raise CommandError('--concurrency: уровни должны быть положительными')
+
+        self.stdout.write(f'Масштаб {options["scale"]}: генерация данных...')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        latency = options['db_latency'] / 1000
+
+        def add_latency(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def install_latency(sender, connection, **kwargs):
+            connection.execute_wrappers.append(add_latency)
+
+        if latency:
+            # Запросы идут из потоков sync_to_async, у каждого своё соединение
+            connection_created.connect(install_latency)
+        try:
+            call_command('generate_fake_data', seed=options['seed'], stdout=StringIO(), **SCALES[options['scale']])
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                asyncio.run(self.run_levels(levels, max(1, options['requests'])))
+        finally:
+            connection_created.disconnect(install_latency)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    async def run_levels(self, levels, total):
+        from todo.asgi import application
+
+        cookie = await asyncio.to_thread(self.session_cookie)
+        endpoints = {
+            'sync projects': reverse('project-list'),
+            'async projects': reverse('async-project-list'),
+            'sync tasks': reverse('task-list'),
+            'async tasks': reverse('async-task-list'),
+        }
+        for name, path in endpoints.items():
+            # Прогрев: импорт, кеш ролей, первое соединение с базой
+            await self.request(application, path, cookie)
+            for level in levels:
+                result = await self.measure(application, path, cookie, level, total)
+                self.stdout.write(
+                    f'  {name:<15} x{level:<4} {result["rps"]:8.1f} req/s | '
+                    f'p50 {result["p50_ms"]:8.2f} ms | p95 {result["p95_ms"]:8.2f} ms'
+                )
+
+    def session_cookie(self):
+        membership = ProjectMembership.objects.filter(role='owner').select_related('user').first()
+        if membership is None:
+            raise CommandError('В базе нет проектов')
+        client = Client()
+        client.force_login(membership.user)
+        morsel = client.cookies[settings.SESSION_COOKIE_NAME]
+        return f'{morsel.key}={morsel.value}'.encode()
+
+    async def measure(self, app, path, cookie, level, total):
+        timings = []
+        queue = asyncio.Queue()
+        for _ in range(total):
+            queue.put_nowait(None)
+
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                await self.request(app, path, cookie)
+                timings.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(level)))
+        elapsed = time.perf_counter() - started
+
+        timings.sort()
+        return {
+            'rps': total / elapsed,
+            'p50_ms': statistics.median(timings),
+            'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        }
+
+    async def request(self, app, path, cookie):
+        """Один GET через ASGI-приложение без сетевого сервера"""
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'cookie', cookie)],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        request_sent = False
+        disconnect = asyncio.get_running_loop().create_future()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            return await disconnect
+
+        status = None
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+
+        await app(scope, receive, send)
+        if status != 200:
+            raise CommandError(f'{path}: статус {status}')
@@ -0,0 +1,101 @@
+import itertools
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+
+SYLLABLES = 'ка ро ми на те ло ви за пе ду ба ки со ре ту ля ме го ны ша'.split()
+# Страница результатов, как в админке / API
+PAGE = 20
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает поиск LIKE %q% (icontains) и FTS5 MATCH на синтетических задачах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1_000_000, help='Сколько задач сгенерировать')
+        parser.add_argument('--repeat', type=int, default=5, help='Повторов каждого запроса')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with tempfile.TemporaryDirectory() as tmp:
+            db = sqlite3.connect(Path(tmp) / 'bench.sqlite3')
+            self.stdout.write(f"Генерация {options['tasks']} задач...")
+            self.populate(db, options['tasks'], rng)
+
+            # Частое, среднее, редкое слово, префикс и пара слов
+            words = self.words
+            queries = [words[0], words[50], words[5000], words[300][:4], f'{words[3]} {words[40]}']
+            for query in queries:
+                like, found = self.measure(options['repeat'], lambda: self.search_like(db, query))
+                fts, _ = self.measure(options['repeat'], lambda: self.search_fts(db, query))
+                self.stdout.write(
+                    f'{query!r:>24} ({found:>7} совп.): icontains {like:9.2f} ms | '
+                    f'fts5 {fts:9.2f} ms | x{like / max(fts, 1e-6):.1f}'
+                )
+            db.close()
+
+    def populate(self, db, count, rng):
+        # Словарь ~20k псевдослов с распределением частот по Ципфу
+        self.words = list(dict.fromkeys(
+            ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(30_000)
+        ))[:20_000]
+        cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(self.words) + 1)))
+        db.executescript(
+            'PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;'
+            'CREATE TABLE task (id TEXT PRIMARY KEY, title TEXT, description TEXT);'
+            'CREATE VIRTUAL TABLE task_fts USING fts5('
+            "obj_id UNINDEXED, title, description, tokenize = 'unicode61 remove_diacritics 2');"
+        )
+        batch = []
+        for i in range(count):
+            title = ' '.join(rng.choices(self.words, cum_weights=cum_weights, k=4))
+            description = ' '.join(rng.choices(self.words, cum_weights=cum_weights, k=20))
+            batch.append((f'{i:032x}', title, description))
+            if len(batch) >= 10_000:
+                self.insert(db, batch)
+                batch = []
+        self.insert(db, batch)
+        db.execute("INSERT INTO task_fts (task_fts) VALUES ('optimize')")
+        db.commit()
+
+    def insert(self, db, rows):
+        db.executemany('INSERT INTO task VALUES (?, ?, ?)', rows)
+        db.executemany('INSERT INTO task_fts VALUES (?, ?, ?)', rows)
+
+    def search_like(self, db, query):
+        """Как icontains в админке/SearchFilter: COUNT(*) + первая страница"""
+        conditions, params = [], []
+        for token in query.split():
+            conditions.append("(title LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')")
+            params += [f'%{token}%'] * 2
+        where = ' AND '.join(conditions)
+        found = db.execute(f'SELECT COUNT(*) FROM task WHERE {where}', params).fetchone()[0]
+        db.execute(f'SELECT id FROM task WHERE {where} LIMIT {PAGE}', params).fetchall()
+        return found
+
+    def search_fts(self, db, query):
+        """FTS5: COUNT(*) совпадений + первая страница по релевантности"""
+        match = ' '.join(f'"{token}"*' for token in query.split())
+        found = db.execute(
+            'SELECT COUNT(*) FROM task_fts WHERE task_fts MATCH ?', [match]
+        ).fetchone()[0]
+        db.execute(
+            f'SELECT obj_id FROM task_fts WHERE task_fts MATCH ? ORDER BY rank LIMIT {PAGE}', [match]
+        ).fetchall()
+        return found
+
+    def measure(self, repeat, func):
+        """Медиана времени (мс) и результат последнего вызова"""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), result
@@ -0,0 +1,79 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from projects.models import Project, ProjectInvitation, ProjectMembership
+
+
+class Command(BaseCommand):
+    help = (
+        'Запросы к django_session (чтения и записи) и задержка ProjectDetail для разных '
+        'SESSION_ENGINE: просмотр страницы, создание приглашения, переход по приглашению '
+        'без входа'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engines', default=','.join(settings.SESSION_ENGINES),
+                            help=f'Через запятую: {", ".join(settings.SESSION_ENGINES)}')
+        parser.add_argument('--repeat', type=int, default=50, help='Просмотров ProjectDetail')
+
+    def handle(self, *args, **options):
+        engines = [name.strip() for name in options['engines'].split(',') if name.strip()]
+        unknown = set(engines) - set(settings.SESSION_ENGINES)
+        if unknown:
+            raise CommandError(f'Неизвестные движки: {", ".join(sorted(unknown))}')
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            user = get_user_model().objects.create_user('sessions', password='benchmark')
+            project = Project.objects.create(title='Сессии')
+            ProjectMembership.objects.create(project=project, user=user, role='owner')
+            # Клиент ходит на testserver; в обычном окружении этого хоста нет в ALLOWED_HOSTS
+            hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+            for engine in engines:
+                with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[engine], ALLOWED_HOSTS=hosts):
+                    self.run(engine, user, project, max(1, options['repeat']))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, engine, user, project, repeat):
+        caches['default'].clear()
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        client = Client()
+        client.force_login(user)
+        detail = reverse('projects:project-detail', args=[project.pk])
+        client.get(detail)
+
+        timings = []
+        with CaptureQueriesContext(connection) as captured:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                client.get(detail)
+                timings.append((time.perf_counter() - started) * 1000)
+        self.report(engine, f'просмотр x{repeat}', captured, statistics.median(timings))
+
+        with CaptureQueriesContext(connection) as captured:
+            client.post(reverse('projects:create-invitation', args=[project.pk]), follow=True)
+            client.get(detail)
+        self.report(engine, 'приглашение', captured)
+
+        invitation = ProjectInvitation.objects.filter(project=project).latest('created_at')
+        with CaptureQueriesContext(connection) as captured:
+            Client().get(reverse('projects:accept-invitation', args=[invitation.token]))
+        self.report(engine, 'вход по ссылке', captured)
+
+    def report(self, engine, scenario, captured, median_ms=None):
+        session = [query['sql'] for query in captured.captured_queries if 'django_session' in query['sql']]
+        reads = sum(sql.lstrip().upper().startswith('SELECT') for sql in session)
+        line = f'{engine:<15} {scenario:<16} чтений: {reads:<5} записей: {len(session) - reads:<5}'
+        if median_ms is not None:
+            line += f' p50 {median_ms:.2f} мс'
+        self.stdout.write(line)
@@ -0,0 +1,149 @@
+import random
+import tempfile
+import threading
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.test.utils import override_settings
+
+from projects import sqlite
+from projects.models import Project, ProjectMembership
+from tasks.models import Task
+
+from .benchmark_views import SCALES
+
+STATUSES = Task.Status.values
+
+# Что сравниваем: PRAGMA-профиль, режим BEGIN и время жизни соединения
+MODES = {
+    'default': {'profile': 'default', 'transaction_mode': None, 'conn_max_age': 0},
+    'production': {'profile': 'production', 'transaction_mode': 'IMMEDIATE', 'conn_max_age': 60},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Многопоточная нагрузка на файловую SQLite-базу: писатели меняют статусы задач, '
+        'читатели листают проекты и задачи; сравнивает профили соединений'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default=','.join(MODES), help=f'Через запятую: {", ".join(MODES)}')
+        parser.add_argument('--scale', default='small', choices=list(SCALES))
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=5, help='Секунд на режим')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['modes'].split(',') if name.strip()]
+        unknown = set(names) - set(MODES)
+        if unknown:
+            raise CommandError(f'Неизвестные режимы: {", ".join(sorted(unknown))}')
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда рассчитана на SQLite')
+
+        for name in names:
+            with tempfile.TemporaryDirectory() as directory:
+                result = self.run_mode(MODES[name], Path(directory) / 'bench.sqlite3', options)
+            self.stdout.write(
+                f'  {name:<11} запись {result["writes"]:8.1f}/с (p95 {result["write_p95_ms"]:7.2f} мс) | '
+                f'чтение {result["reads"]:8.1f}/с (p95 {result["read_p95_ms"]:7.2f} мс) | '
+                f'ошибок блокировки {result["errors"]}'
+            )
+
+    def run_mode(self, mode, path, options):
+        """Своя файловая база на режим: WAL сохраняется в файле"""
+        settings_dict = connection.settings_dict
+        saved = settings_dict['TEST'].get('NAME'), settings_dict['CONN_MAX_AGE'], dict(settings_dict['OPTIONS'])
+        settings_dict['TEST']['NAME'] = str(path)
+        settings_dict['CONN_MAX_AGE'] = mode['conn_max_age']
+        settings_dict['OPTIONS']['transaction_mode'] = mode['transaction_mode']
+        # Соединение открывается заново уже с параметрами режима
+        connection.close()
+        try:
+            with override_settings(SQLITE={'PROFILE': mode['profile'], 'PRAGMAS': {}}):
+                old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                try:
+                    call_command('generate_fake_data', seed=options['seed'], stdout=StringIO(),
+                                 **SCALES[options['scale']])
+                    self.stdout.write(f'Режим {mode["profile"]}: {sqlite.current(connection)}')
+                    return self.load(options)
+                finally:
+                    connection.creation.destroy_test_db(old_name, verbosity=0)
+        finally:
+            settings_dict['TEST']['NAME'], settings_dict['CONN_MAX_AGE'], settings_dict['OPTIONS'] = saved
+
+    def load(self, options):
+        task_ids = list(Task.objects.values_list('pk', flat=True))
+        users = list(ProjectMembership.objects.values_list('user_id', flat=True).distinct())
+        deadline = time.monotonic() + options['duration']
+        stats = {'write': [], 'read': [], 'errors': 0}
+        lock = threading.Lock()
+
+        def write(rng):
+            with transaction.atomic():
+                task = Task.objects.get(pk=rng.choice(task_ids))
+                task.status = rng.choice(STATUSES)
+                task.save(update_fields=['status', 'updated_at'])
+
+        def read(rng):
+            user_id = rng.choice(users)
+            projects = list(Project.objects.filter(users=user_id).with_stats()[:20])
+            if projects:
+                list(Task.objects.filter(project=rng.choice(projects)).order_by('-created_at')[:20])
+
+        def worker(kind, seed):
+            rng = random.Random(seed)
+            action = write if kind == 'write' else read
+            timings, errors = [], 0
+            try:
+                while time.monotonic() < deadline:
+                    # Как request_started/request_finished: соединение
+                    # закрывается, если его время жизни истекло
+                    close_old_connections()
+                    started = time.perf_counter()
+                    try:
+                        action(rng)
+                    except OperationalError:
+                        errors += 1
+                    else:
+                        timings.append((time.perf_counter() - started) * 1000)
+                    close_old_connections()
+            finally:
+                connection.close()
+            with lock:
+                stats[kind].extend(timings)
+                stats['errors'] += errors
+
+        threads = [
+            threading.Thread(target=worker, args=('write', options['seed'] + i))
+            for i in range(options['writers'])
+        ] + [
+            threading.Thread(target=worker, args=('read', options['seed'] + 1000 + i))
+            for i in range(options['readers'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        def p95(timings):
+            if not timings:
+                return 0
+            timings = sorted(timings)
+            return timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+
+        return {
+            'writes': len(stats['write']) / elapsed,
+            'reads': len(stats['read']) / elapsed,
+            'write_p95_ms': p95(stats['write']),
+            'read_p95_ms': p95(stats['read']),
+            'errors': stats['errors'],
+        }
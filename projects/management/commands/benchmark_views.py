@@ -0,0 +1,171 @@
+import json
+import statistics
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from projects.models import Project, ProjectMembership
+
+# Масштабы для generate_fake_data
+SCALES = {
+    'small': {'users': 20, 'projects': 10, 'tasks': 1_000},
+    'medium': {'users': 200, 'projects': 100, 'tasks': 20_000},
+    'large': {'users': 2_000, 'projects': 1_000, 'tasks': 200_000},
+}
+DEFAULT_BUDGETS = Path(settings.BASE_DIR) / 'benchmarks' / 'budgets.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку (перцентили) и число SQL-запросов ключевых страниц, API и '
+        'cleanup_old_tasks на синтетических данных; сверяет результат с бюджетами'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='small,medium',
+                            help=f'Через запятую: {", ".join(SCALES)}')
+        parser.add_argument('--repeat', type=int, default=20, help='Запросов на сценарий')
+        parser.add_argument('--output', help='Куда сохранить результаты (JSON)')
+        parser.add_argument('--budgets', default=str(DEFAULT_BUDGETS),
+                            help='JSON с бюджетами {масштаб: {сценарий: {p95_ms, queries}}}')
+        parser.add_argument('--no-budgets', action='store_true', help='Не проверять бюджеты')
+        parser.add_argument('--current-db', action='store_true',
+                            help='Мерить текущую базу как есть (масштаб "current"), без генерации')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        results = {}
+        if options['current_db']:
+            results['current'] = self.run_scenarios(repeat)
+        else:
+            names = [name.strip() for name in options['scales'].split(',') if name.strip()]
+            unknown = set(names) - set(SCALES)
+            if unknown:
+                raise CommandError(f'Неизвестные масштабы: {", ".join(sorted(unknown))}')
+            for name in names:
+                results[name] = self.run_scale(name, repeat, options['seed'])
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2, ensure_ascii=False))
+            self.stdout.write(f'Результаты сохранены в {options["output"]}')
+
+        if not options['no_budgets']:
+            self.check_budgets(results, Path(options['budgets']))
+
+    def run_scale(self, name, repeat, seed):
+        """Отдельная временная база на масштаб: рабочие данные не трогаем"""
+        self.stdout.write(f'Масштаб {name}: генерация данных...')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            call_command('generate_fake_data', seed=seed, stdout=StringIO(), **SCALES[name])
+            return self.run_scenarios(repeat)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run_scenarios(self, repeat):
+        # Самый крупный проект и его владелец
+        project = Project.objects.order_by(
+            -(F('tasks_not_started') + F('tasks_in_progress') + F('tasks_under_review') + F('tasks_done'))
+        ).first()
+        if project is None:
+            raise CommandError('В базе нет проектов: запустите generate_fake_data')
+        owner = ProjectMembership.objects.filter(project=project, role='owner').select_related('user').first()
+        task = project.tasks.first()
+
+        client = Client()
+        client.force_login(owner.user)
+        detail = reverse('projects:project-detail', args=[project.pk])
+        scenarios = {
+            'index': (reverse('projects:index'), {}),
+            'project_detail': (detail, {}),
+            'project_detail_htmx': (detail, {'HTTP_HX_REQUEST': 'true'}),
+            'api_projects_list': (reverse('project-list'), {}),
+            'api_project_retrieve': (reverse('project-detail', args=[project.pk]), {}),
+            'api_tasks_list': (reverse('task-list'), {}),
+        }
+        if task is not None:
+            scenarios['api_task_retrieve'] = (reverse('task-detail', args=[task.pk]), {})
+
+        results = {}
+        # Клиент ходит на testserver; в обычном окружении этого хоста нет в ALLOWED_HOSTS
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, (url, headers) in scenarios.items():
+                results[name] = self.measure_url(client, url, headers, repeat)
+                self.report(name, results[name])
+        results['cleanup_old_tasks'] = self.measure_cleanup()
+        self.report('cleanup_old_tasks', results['cleanup_old_tasks'])
+        return results
+
+    def measure_url(self, client, url, headers, repeat):
+        """Первый запрос прогревает кеши и не учитывается"""
+        for cache in caches.all():
+            cache.clear()
+        response = client.get(url, **headers)
+        if response.status_code != 200:
+            raise CommandError(f'{url}: статус {response.status_code}')
+
+        timings, queries = [], []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url, **headers)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+        return self.summary(timings, queries)
+
+    def measure_cleanup(self):
+        """Одиночный прогон: команда удаляет данные, повторы мерили бы пустую базу"""
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            call_command('cleanup_old_tasks', stdout=StringIO())
+            elapsed = (time.perf_counter() - started) * 1000
+        return self.summary([elapsed], [len(captured)])
+
+    def summary(self, timings, queries):
+        timings = sorted(timings)
+
+        def percentile(p):
+            return round(timings[min(len(timings) - 1, int(len(timings) * p))], 2)
+
+        return {
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'max_ms': round(timings[-1], 2),
+            'queries': max(queries),
+            'samples': len(timings),
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'  {name:<22} p50 {result["p50_ms"]:8.2f} ms | p95 {result["p95_ms"]:8.2f} ms | '
+            f'p99 {result["p99_ms"]:8.2f} ms | запросов {result["queries"]}'
+        )
+
+    def check_budgets(self, results, path):
+        if not path.exists():
+            self.stdout.write(self.style.WARNING(f'Файл бюджетов {path} не найден, проверка пропущена'))
+            return
+        budgets = json.loads(path.read_text())
+        exceeded = []
+        for scale, scenarios in results.items():
+            for scenario, result in scenarios.items():
+                for metric, limit in budgets.get(scale, {}).get(scenario, {}).items():
+                    if result.get(metric) is not None and result[metric] > limit:
+                        exceeded.append(f'{scale}/{scenario}: {metric} = {result[metric]} > {limit}')
+        if exceeded:
+            raise CommandError('Превышены бюджеты:\n' + '\n'.join(exceeded))
+        self.stdout.write(self.style.SUCCESS('Все бюджеты соблюдены'))
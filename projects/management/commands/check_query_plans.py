@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from projects import plans
+
+
+class Command(BaseCommand):
+    help = (
+        'Снимает EXPLAIN QUERY PLAN горячих запросов вьюх, API, админки и команд, отмечает '
+        'полные проходы и временные B-деревья, подсказывает индексы и падает, если план '
+        'хуже сохранённого эталона'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default=str(plans.DEFAULT_BASELINE), help='JSON с эталонными планами')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Записать текущие планы как эталон')
+        parser.add_argument('--only', help='Имена запросов через запятую')
+        parser.add_argument('--current-db', action='store_true',
+                            help='Снять планы на текущей базе (со статистикой ANALYZE, если она есть)')
+        parser.add_argument('--show-plans', action='store_true', help='Печатать планы целиком')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда рассчитана на SQLite (формат EXPLAIN QUERY PLAN)')
+        names = None
+        if options['only']:
+            names = [name.strip() for name in options['only'].split(',') if name.strip()]
+            unknown = set(names) - set(plans.HOT)
+            if unknown:
+                raise CommandError(f'Неизвестные запросы: {", ".join(sorted(unknown))}')
+
+        result = self.collect(names, options['current_db'])
+        if options['update_baseline']:
+            baseline = {} if names is None else plans.load_baseline(options['baseline'])
+            plans.save_baseline({**baseline, **result}, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f'Эталон сохранён в {options["baseline"]}'))
+            return
+
+        report = plans.compare(result, plans.load_baseline(options['baseline']))
+        failures = []
+        for name, entry in result.items():
+            status, added = report[name]
+            line = f'{status.upper():<10} {name}'
+            if entry['issues']:
+                line += f'  [{", ".join(entry["issues"])}]'
+            self.stdout.write(line)
+            if options['show_plans'] or status != 'ok':
+                for row in entry['plan']:
+                    self.stdout.write(f'             {row}')
+            for hint in entry['suggestions']:
+                self.stdout.write(f'             индекс? {hint}')
+            if status in ('regressed', 'new'):
+                failures.append(f'{name}: {status} {", ".join(added)}'.rstrip())
+
+        if failures:
+            raise CommandError(
+                'Планы хуже эталона (если так и задумано — --update-baseline):\n' + '\n'.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS(f'Планы не хуже эталона ({len(result)} запросов)'))
+
+    def collect(self, names, current_db):
+        if current_db:
+            # Данные для построения запросов создаются и откатываются
+            with transaction.atomic():
+                result = plans.check(names)
+                transaction.set_rollback(True)
+            return result
+        # Пустая временная база без статистики: план зависит только от схемы
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            return plans.check(names)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
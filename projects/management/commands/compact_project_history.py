@@ -0,0 +1,83 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from projects import history
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Прореживает историю проектов по политике settings.PROJECT_HISTORY'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type=int, default=None,
+                            help='Хранить всю историю за последние N дней (по умолчанию из настроек)')
+        parser.add_argument('--granularity', choices=['day', 'week'], default=None,
+                            help='Сколько снимков оставлять для более старой истории')
+        parser.add_argument('--projects-per-scan', type=int, default=200,
+                            help='Сколько проектов разбирать за один проход')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Сколько строк удалять за одну транзакцию')
+        parser.add_argument('--sleep-between-batches', type=float, default=0.0,
+                            help='Пауза между пакетами в секундах')
+        parser.add_argument('--max-runtime', type=float, default=0,
+                            help='Остановиться через N секунд (0 — без ограничения)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать строки, ничего не удаляя')
+
+    def handle(self, *args, **options):
+        try:
+            keep_days, granularity = history.policy()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options['keep_days'] is not None:
+            keep_days = options['keep_days']
+        granularity = options['granularity'] or granularity
+
+        HistoricalProject = Project.history.model
+        old_rows = HistoricalProject.objects.filter(history_date__lt=history.retention_cutoff(keep_days))
+        batch_size = max(1, options['batch_size'])
+        per_scan = max(1, options['projects_per_scan'])
+        started = time.monotonic()
+
+        # Проходим по проектам ключом (id > последнего), каждый пакет
+        # удаления — отдельная короткая транзакция; прерванный запуск можно
+        # просто повторить
+        found = deleted = batches = 0
+        last_id = None
+        while True:
+            ids = old_rows.order_by('id').values_list('id', flat=True).distinct()
+            if last_id is not None:
+                ids = ids.filter(id__gt=last_id)
+            ids = list(ids[:per_scan])
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            rows = old_rows.filter(id__in=ids).values_list('history_id', 'id', 'history_date', 'history_type')
+            doomed = history.prunable(rows, granularity)
+            found += len(doomed)
+            if options['dry_run']:
+                continue
+
+            for start in range(0, len(doomed), batch_size):
+                with transaction.atomic():
+                    count, _ = HistoricalProject.objects.filter(
+                        history_id__in=doomed[start:start + batch_size]
+                    ).delete()
+                batches += 1
+                deleted += count
+                self.stdout.write(f'Пакет {batches}: удалено {count} (всего {deleted})')
+                if options['sleep_between_batches']:
+                    time.sleep(options['sleep_between_batches'])
+            if options['max_runtime'] and time.monotonic() - started >= options['max_runtime']:
+                self.stdout.write(self.style.WARNING(
+                    'Достигнут --max-runtime, остаток будет прорежен при следующем запуске'
+                ))
+                break
+
+        if options['dry_run']:
+            self.stdout.write(f'Будет удалено {found} строк истории (dry run)')
+            return
+        self.stdout.write(self.style.SUCCESS(f'Удалено {deleted} строк истории проектов'))
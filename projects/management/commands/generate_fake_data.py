@@ -0,0 +1,197 @@
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.utils import timezone
+
+from projects import search
+from projects.models import Project, ProjectInvitation, ProjectMembership
+from tasks import counters
+from tasks.models import Task
+
+WORDS = (
+    'отчёт квартал бюджет релиз дизайн макет тест API база миграция клиент договор '
+    'презентация встреча ревью рефакторинг документация интеграция оплата склад '
+    'поставка аналитика метрики сервер деплой мобильный лендинг рассылка опрос'
+).split()
+
+# Статусы по возрасту задачи: старые в основном завершены, новые — в работе
+STATUS_WEIGHTS = {
+    'fresh': {'not_started': 45, 'in_progress': 35, 'under_review': 12, 'done': 8},
+    'recent': {'not_started': 20, 'in_progress': 25, 'under_review': 15, 'done': 40},
+    'old': {'not_started': 5, 'in_progress': 5, 'under_review': 5, 'done': 85},
+}
+
+
+@contextmanager
+def explicit_dates(*models):
+    """Отключает auto_now/auto_now_add, чтобы bulk_create сохранил заданные даты"""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу синтетическими пользователями, проектами, приглашениями и задачами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--projects', type=int, default=50)
+        parser.add_argument('--tasks', type=int, default=5000)
+        parser.add_argument('--members', type=float, default=3,
+                            help='Среднее число участников проекта помимо владельца')
+        parser.add_argument('--invitations', type=float, default=0.3,
+                            help='Доля проектов с приглашениями')
+        parser.add_argument('--days', type=int, default=365,
+                            help='На сколько дней назад растягивать даты')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--password', default='password',
+                            help='Пароль всех созданных пользователей')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.days = max(1, options['days'])
+        self.batch_size = max(1, options['batch_size'])
+        # Метка запуска: повторный запуск не конфликтует по username
+        self.run = uuid.uuid4().hex[:6]
+
+        with explicit_dates(Project, ProjectMembership, ProjectInvitation, Task):
+            users = self.create_users(options['users'], options['password'])
+            if not users:
+                self.stdout.write(self.style.WARNING('Нужен хотя бы один пользователь'))
+                return
+            projects = self.create_projects(options['projects'])
+            if not projects:
+                self.stdout.write(self.style.WARNING('Нужен хотя бы один проект'))
+                return
+            memberships = self.create_memberships(projects, users, options['members'])
+            invitations = self.create_invitations(projects, memberships, users, options['invitations'])
+            tasks = self.create_tasks(projects, memberships, options['tasks'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(users)}, проектов {len(projects)}, '
+            f'участников {sum(map(len, memberships.values()))}, приглашений {invitations}, задач {tasks}'
+        ))
+
+    def random_date(self, max_days=None):
+        """Дата в прошлом; свежие даты встречаются чаще старых"""
+        limit = self.days if max_days is None else max_days
+        age = self.rng.expovariate(3 / self.days)
+        if age > limit:
+            age = self.rng.uniform(0, limit)
+        return self.now - timedelta(days=age)
+
+    def title(self, words=3):
+        return ' '.join(self.rng.choices(WORDS, k=words)).capitalize()
+
+    def create_users(self, count, password):
+        User = get_user_model()
+        password = make_password(password)  # хешируем один раз на всех
+        users = [
+            User(username=f'user_{self.run}_{i}', email=f'user_{self.run}_{i}@example.com',
+                 password=password, date_joined=self.random_date())
+            for i in range(count)
+        ]
+        return User.objects.bulk_create(users, batch_size=self.batch_size)
+
+    def create_projects(self, count):
+        projects = []
+        for _ in range(count):
+            created = self.random_date()
+            projects.append(Project(
+                title=self.title(),
+                description=' '.join(self.rng.choices(WORDS, k=12)),
+                show_completed=self.rng.random() < 0.7,
+                created_at=created,
+                updated_at=created,
+                changed_at=created,
+            ))
+        with transaction.atomic():
+            return Project.objects.bulk_create(projects, batch_size=self.batch_size)
+
+    def create_memberships(self, projects, users, members):
+        """{project_id: [user, ...]}; первый — владелец"""
+        rows, result = [], {}
+        for project in projects:
+            extra = min(int(self.rng.expovariate(1 / members)) if members else 0, len(users) - 1)
+            team = self.rng.sample(users, extra + 1)
+            result[project.pk] = team
+            for position, user in enumerate(team):
+                rows.append(ProjectMembership(
+                    project=project, user=user, role='owner' if position == 0 else 'member',
+                    joined_at=project.created_at if position == 0 else
+                    project.created_at + (self.now - project.created_at) * self.rng.random(),
+                ))
+        with transaction.atomic():
+            ProjectMembership.objects.bulk_create(rows, batch_size=self.batch_size)
+        return result
+
+    def create_invitations(self, projects, memberships, users, share):
+        rows = []
+        for project in projects:
+            if self.rng.random() >= share:
+                continue
+            created = project.created_at + (self.now - project.created_at) * self.rng.random()
+            used = self.rng.random() < 0.4
+            rows.append(ProjectInvitation(
+                project=project,
+                created_by=memberships[project.pk][0],
+                created_at=created,
+                expires_at=created + timedelta(days=7),
+                is_single_use=self.rng.random() < 0.8,
+                used_by=self.rng.choice(users) if used else None,
+                used_at=created + timedelta(hours=self.rng.randint(1, 150)) if used else None,
+            ))
+        with transaction.atomic():
+            ProjectInvitation.objects.bulk_create(rows, batch_size=self.batch_size)
+        return len(rows)
+
+    def create_tasks(self, projects, memberships, count):
+        # Размеры проектов неравномерны: немного крупных, много мелких
+        weights = [self.rng.paretovariate(1.2) for _ in projects]
+        created = 0
+        while created < count:
+            size = min(self.batch_size, count - created)
+            batch = []
+            for project in self.rng.choices(projects, weights=weights, k=size):
+                created_at = self.random_date(max_days=(self.now - project.created_at) / timedelta(days=1))
+                age = (self.now - created_at).days
+                weights_by_status = STATUS_WEIGHTS['fresh' if age < 7 else 'recent' if age < 60 else 'old']
+                status = self.rng.choices(list(weights_by_status), weights=weights_by_status.values())[0]
+                updated_at = created_at + (self.now - created_at) * self.rng.random()
+                batch.append(Task(
+                    project=project,
+                    title=self.title(self.rng.randint(2, 5)),
+                    description=' '.join(self.rng.choices(WORDS, k=self.rng.randint(0, 25))) or None,
+                    status=status,
+                    author=self.rng.choice(memberships[project.pk]),
+                    created_at=created_at,
+                    updated_at=updated_at,
+                ))
+            # Мимо TaskQuerySet.bulk_create: счётчики и индекс — один раз в конце
+            with transaction.atomic():
+                models.QuerySet(Task).bulk_create(batch)
+            created += size
+            self.stdout.write(f'Задачи: {created}/{count}')
+
+        with transaction.atomic():
+            counters.recount([project.pk for project in projects], changed_only=True)
+        if search.fts_available():
+            search.rebuild(Project)
+            search.rebuild(Task)
+        return created
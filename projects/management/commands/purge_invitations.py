@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from projects.models import ProjectInvitation
+
+
+class Command(BaseCommand):
+    help = 'Удаляет истёкшие приглашения и использованные одноразовые'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--expired-days', type=int, default=0,
+                            help='Сколько дней хранить приглашение после истечения')
+        parser.add_argument('--used-days', type=int, default=30,
+                            help='Сколько дней хранить использованное одноразовое приглашение')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Сколько приглашений удалять за одну транзакцию')
+        parser.add_argument('--sleep-between-batches', type=float, default=0.0,
+                            help='Пауза между пакетами в секундах')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать приглашения, ничего не удаляя')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        queryset = ProjectInvitation.objects.purgeable(
+            expired_before=now - timedelta(days=options['expired_days']),
+            used_before=now - timedelta(days=options['used_days']),
+        )
+        batch_size = max(1, options['batch_size'])
+
+        if options['dry_run']:
+            self.stdout.write(f'Будет удалено {queryset.count()} приглашений (dry run)')
+            return
+
+        deleted_count = 0
+        while True:
+            with transaction.atomic():
+                ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                # Ни сигналов, ни зависимых объектов: один DELETE на пакет
+                deleted, _ = ProjectInvitation.objects.filter(pk__in=ids).delete()
+            deleted_count += deleted
+            if len(ids) < batch_size:
+                break
+            if options['sleep_between_batches']:
+                time.sleep(options['sleep_between_batches'])
+
+        self.stdout.write(self.style.SUCCESS(f'Удалено {deleted_count} приглашений'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from projects import search
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс FTS5 для проектов и задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'indexes',
+            nargs='*',
+            help=f'Какие индексы пересобрать: {", ".join(sorted(search.INDEXES))} (по умолчанию — все)'
+        )
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            raise CommandError('FTS5 недоступен: поиск работает через icontains')
+
+        unknown = set(options['indexes']) - set(search.INDEXES)
+        if unknown:
+            raise CommandError(f'Неизвестные индексы: {", ".join(sorted(unknown))}')
+
+        for name in options['indexes'] or sorted(search.INDEXES):
+            get_model, _ = search.INDEXES[name]
+            count = search.rebuild(get_model())
+            self.stdout.write(self.style.SUCCESS(
+                f'Индекс {name}: проиндексировано {count} записей'
+            ))
@@ -0,0 +1,105 @@
+from datetime import timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import CharField
+from django.db.models.functions import Cast, Substr
+
+from projects import roles, search
+from projects.ids import uuid7
+from projects.models import Project, ProjectMembership
+from tasks.models import Task
+
+MODELS = {'task': Task, 'project': Project}
+
+
+class Command(BaseCommand):
+    help = (
+        'Перевыпускает случайные (v4) первичные ключи как UUIDv7 со временем created_at, '
+        'чтобы порядок id совпадал с порядком создания. Ссылки (внешние ключи, история, '
+        'поисковый индекс) обновляются вместе с ключом. Адреса объектов при этом меняются, '
+        'поэтому проекты перевыпускаются только по явному --models project'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', default='task', help=f'Через запятую: {", ".join(MODELS)}')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Сколько ключей перевыпускать за одну транзакцию')
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать ключи v4')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['models'].split(',') if name.strip()]
+        unknown = set(names) - set(MODELS)
+        if unknown:
+            raise CommandError(f'Неизвестные модели: {", ".join(sorted(unknown))}')
+
+        for name in names:
+            model = MODELS[name]
+            legacy = self.legacy(model)
+            if options['dry_run']:
+                self.stdout.write(f'{name}: ключей v4 — {legacy.count()} (dry run)')
+                continue
+            total = 0
+            cursor = None
+            while True:
+                with transaction.atomic():
+                    rows = list(self.batch(legacy, cursor, max(1, options['batch_size'])))
+                    if not rows:
+                        break
+                    self.rekey(model, [
+                        (uuid7(int(created_at.astimezone(dt_timezone.utc).timestamp() * 1000)), old)
+                        for old, created_at in rows
+                    ])
+                old, created_at = rows[-1]
+                cursor = (created_at, old)
+                total += len(rows)
+                self.stdout.write(f'{name}: перевыпущено {total}')
+            if total:
+                self.after_rekey(model)
+            self.stdout.write(self.style.SUCCESS(f'{name}: готово, перевыпущено ключей: {total}'))
+
+    def batch(self, legacy, cursor, size):
+        """Следующий пакет после курсора (created_at, pk): перевыпущенные строки
+        остаются в начале индекса created_at, и без курсора каждый пакет
+        проходил бы их заново"""
+        if cursor is not None:
+            created_at, pk = cursor
+            legacy = legacy.filter(created_at__gte=created_at).exclude(created_at=created_at, pk__lte=pk)
+        return legacy.order_by('created_at', 'pk').values_list('pk', 'created_at')[:size]
+
+    def legacy(self, model):
+        """Строки, чей ключ не v7: номер версии — 13-й шестнадцатеричный символ
+        (SQLite хранит UUID без дефисов, остальные базы — в каноническом виде)"""
+        position = 13 if connection.vendor == 'sqlite' else 15
+        return model.objects.annotate(
+            key_version=Substr(Cast('pk', CharField()), position, 1)
+        ).exclude(key_version='7')
+
+    def rekey(self, model, mapping):
+        pk = model._meta.pk
+        params = [(pk.get_db_prep_value(new, connection), pk.get_db_prep_value(old, connection))
+                  for new, old in mapping]
+        quote = connection.ops.quote_name
+        targets = [(model._meta.db_table, pk.column)]
+        # Внешние ключи на модель; в SQLite они проверяются при коммите
+        for relation in model._meta.related_objects:
+            if relation.field.concrete and not relation.many_to_many:
+                targets.append((relation.related_model._meta.db_table, relation.field.column))
+        # История (simple_history) хранит id объекта без внешнего ключа
+        history = getattr(model, 'history', None)
+        if history is not None:
+            targets.append((history.model._meta.db_table, pk.column))
+
+        with connection.cursor() as cursor:
+            for table, column in targets:
+                cursor.executemany(
+                    f'UPDATE {quote(table)} SET {quote(column)} = %s WHERE {quote(column)} = %s', params
+                )
+
+    def after_rekey(self, model):
+        if model is Project:
+            # В кеше ролей лежат старые id проектов
+            for user_id in ProjectMembership.objects.values_list('user_id', flat=True).distinct():
+                roles.invalidate_user(user_id)
+        if search.fts_available():
+            search.rebuild(model)
@@ -0,0 +1,56 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from projects.routers import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Имитация репликации для локальной разработки: копирует основную SQLite-базу '
+        'в файлы реплик (settings.DB_ROUTING["REPLICAS"]) через backup API SQLite'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Повторять каждые N секунд (задержка реплик); 0 — один раз')
+        parser.add_argument('--iterations', type=int, default=0,
+                            help='Сколько раз повторить при --interval (0 — пока не прервут)')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Имитация репликации работает только с SQLite')
+        aliases = replicas()
+        if not aliases:
+            raise CommandError('Реплики не настроены: задайте TODO_DB_REPLICAS')
+
+        done = 0
+        try:
+            while True:
+                for alias in aliases:
+                    self.copy(primary, alias)
+                done += 1
+                if options['interval'] <= 0 or done == options['iterations']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Остановлено')
+
+    def copy(self, primary, alias):
+        path = settings.DATABASES[alias]['NAME']
+        if str(path) == str(primary.settings_dict['NAME']):
+            raise CommandError(f'{alias}: файл реплики совпадает с основной базой')
+        started = time.perf_counter()
+        primary.ensure_connection()
+        # Согласованный снимок; открытые соединения реплики видят новые
+        # данные после завершения копирования, файл не подменяется
+        target = sqlite3.connect(path, timeout=30)
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+        self.stdout.write(f'{alias}: {path} обновлена за {(time.perf_counter() - started) * 1000:.0f} мс')
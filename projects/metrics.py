@@ -0,0 +1,267 @@
+"""Метрики запросов: время, SQL-запросы, повторы SQL (N+1), размер ответа.
+
+MetricsMiddleware замеряет каждый запрос через execute_wrapper на всех
+соединениях (без DEBUG и без сохранения SQL в connection.queries),
+добавляет заголовок Server-Timing и копит гистограммы в памяти процесса.
+metrics_view отдаёт их в текстовом формате Prometheus (/metrics). Счётчики у каждого воркера свои:
+Prometheus должен опрашивать воркеры по отдельности.
+
+Отпечаток запроса — SQL без параметров: Django передаёт значения отдельно,
+поэтому одинаковый текст, выполненный в одном запросе несколько раз,
+и есть сигнатура N+1.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .cache import cache_stats
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+# Сколько разных отпечатков повторяющихся запросов помнить
+MAX_FINGERPRINTS = 200
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Registry:
+    """Агрегаты по вьюхам; все изменения под одной блокировкой"""
+
+    HISTOGRAMS = {
+        'todo_http_request_duration_seconds': ('Время обработки запроса', DURATION_BUCKETS),
+        'todo_db_duration_seconds': ('Суммарное время SQL за запрос', DURATION_BUCKETS),
+        'todo_db_queries_per_request': ('Число SQL-запросов за запрос', QUERY_BUCKETS),
+        'todo_http_response_size_bytes': ('Размер тела ответа (кроме потоковых)', SIZE_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = Counter()
+            self.histograms = {
+                name: defaultdict(lambda buckets=buckets: Histogram(buckets))
+                for name, (_, buckets) in self.HISTOGRAMS.items()
+            }
+            self.duplicates = Counter()
+            self.fingerprints = {}
+
+    def record(self, view, method, status, duration, db_time, queries, size, duplicates):
+        with self._lock:
+            self.requests[view, method, status] += 1
+            self.histograms['todo_http_request_duration_seconds'][view].observe(duration)
+            self.histograms['todo_db_duration_seconds'][view].observe(db_time)
+            self.histograms['todo_db_queries_per_request'][view].observe(queries)
+            if size is not None:
+                self.histograms['todo_http_response_size_bytes'][view].observe(size)
+            for sql, count in duplicates.items():
+                fingerprint = hashlib.md5(sql.encode()).hexdigest()[:12]
+                if fingerprint not in self.fingerprints:
+                    if len(self.fingerprints) >= MAX_FINGERPRINTS:
+                        continue
+                    self.fingerprints[fingerprint] = sql
+                # Лишние выполнения: всё, кроме первого
+                self.duplicates[view, fingerprint] += count - 1
+
+    def render(self):
+        """Текстовый формат Prometheus 0.0.4"""
+        with self._lock:
+            lines = [
+                '# HELP todo_http_requests_total Обработанные запросы',
+                '# TYPE todo_http_requests_total counter',
+            ]
+            for (view, method, status), value in sorted(self.requests.items()):
+                lines.append(_sample('todo_http_requests_total', value, view=view, method=method, status=status))
+
+            for name, (help_text, _) in self.HISTOGRAMS.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for view, histogram in sorted(self.histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(_sample(f'{name}_bucket', cumulative, view=view, le=bound))
+                    lines.append(_sample(f'{name}_bucket', histogram.count, view=view, le='+Inf'))
+                    lines.append(_sample(f'{name}_sum', round(histogram.sum, 6), view=view))
+                    lines.append(_sample(f'{name}_count', histogram.count, view=view))
+
+            lines += [
+                '# HELP todo_duplicate_queries_total Повторные выполнения одного SQL в рамках запроса (N+1)',
+                '# TYPE todo_duplicate_queries_total counter',
+            ]
+            for (view, fingerprint), value in sorted(self.duplicates.items()):
+                lines.append(_sample('todo_duplicate_queries_total', value, view=view, fingerprint=fingerprint))
+            lines += [
+                '# HELP todo_duplicate_query_info Текст SQL для отпечатка',
+                '# TYPE todo_duplicate_query_info gauge',
+            ]
+            for fingerprint, sql in sorted(self.fingerprints.items()):
+                lines.append(_sample('todo_duplicate_query_info', 1, fingerprint=fingerprint, sql=sql[:300]))
+
+        lines += [
+            '# HELP todo_cache_requests_total Обращения к кешам со счётчиками',
+            '# TYPE todo_cache_requests_total counter',
+        ]
+        for alias, values in sorted(cache_stats().items()):
+            lines.append(_sample('todo_cache_requests_total', values['hits'], cache=alias, result='hit'))
+            lines.append(_sample('todo_cache_requests_total', values['misses'], cache=alias, result='miss'))
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sample(name, value, **labels):
+    label_str = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+    return f'{name}{{{label_str}}} {value}'
+
+
+registry = Registry()
+
+
+class QueryRecorder:
+    """Число, время и повторы SQL текущего запроса"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def duplicates(self):
+        return {sql: count for sql, count in self.statements.items() if count > 1}
+
+
+# Запись текущего запроса. ContextVar виден и в потоках sync_to_async,
+# где асинхронный ORM выполняет SQL на своих соединениях
+_recorder = ContextVar('metrics_recorder', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper, постоянно установленный на всех соединениях"""
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.duration += time.perf_counter() - started
+        recorder.count += 1
+        recorder.statements[sql] += 1
+
+
+@receiver(connection_created)
+def install_wrapper(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _install_on_open_connections():
+    # Соединения, открытые до импорта модуля, сигнала уже не получат
+    for conn in connections.all(initialized_only=True):
+        install_wrapper(None, conn)
+
+
+class MetricsMiddleware:
+    """Замеряет запрос и пишет в registry; должен стоять первым в MIDDLEWARE.
+
+    Поддерживает и синхронный, и асинхронный стек: под ASGI асинхронные
+    вьюхи не занимают поток ради этого middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled(request):
+            return self.get_response(request)
+        _install_on_open_connections()
+        recorder = QueryRecorder()
+        token = _recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self.finish(request, response, recorder, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not self.enabled(request):
+            return await self.get_response(request)
+        recorder = QueryRecorder()
+        token = _recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self.finish(request, response, recorder, time.perf_counter() - started)
+
+    def enabled(self, request):
+        options = settings.METRICS
+        return options['ENABLED'] and request.path not in options['EXCLUDE_PATHS']
+
+    def finish(self, request, response, recorder, duration):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        size = None if response.streaming else len(response.content)
+        registry.record(
+            view, request.method, response.status_code, duration,
+            recorder.duration, recorder.count, size, recorder.duplicates(),
+        )
+        if settings.METRICS['SERVER_TIMING']:
+            response['Server-Timing'] = (
+                f'app;dur={duration * 1000:.1f}, '
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"'
+            )
+        return response
+
+
+def metrics_view(request):
+    """/metrics: доступ по токену (Authorization: Bearer ...), с разрешённых
+    адресов или для staff"""
+    options = settings.METRICS
+    token = options['TOKEN']
+    authorized = (
+        (token and request.headers.get('Authorization') == f'Bearer {token}')
+        or request.META.get('REMOTE_ADDR') in options['ALLOWED_IPS']
+        or getattr(request.user, 'is_staff', False)
+    )
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:33
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+STATUS_FIELDS = {
+    'not_started': 'tasks_not_started',
+    'in_progress': 'tasks_in_progress',
+    'under_review': 'tasks_under_review',
+    'done': 'tasks_done',
+}
+
+
+def fill_task_counters(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    Task = apps.get_model('tasks', 'Task')
+
+    counts = {}
+    rows = Task.objects.order_by().values('project_id', 'status').annotate(n=Count('id'))
+    for row in rows:
+        counts.setdefault(row['project_id'], {})[row['status']] = row['n']
+
+    for project_id, by_status in counts.items():
+        Project.objects.filter(pk=project_id).update(**{
+            field: by_status.get(status, 0)
+            for status, field in STATUS_FIELDS.items()
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_remove_project_projects_pr_deleted_4c0d8c_idx_and_more'),
+        ('tasks', '0002_task_author'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='tasks_done',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='tasks done'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_in_progress',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='tasks in progress'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_not_started',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='tasks not started'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_under_review',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='tasks under review'),
+        ),
+        migrations.RunPython(fill_task_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+from django.db import DatabaseError, migrations
+
+
+TABLES = ['projects_project_fts', 'tasks_task_fts']
+
+
+def create_fts_tables(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        try:
+            for table in TABLES:
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5('
+                    'obj_id UNINDEXED, title, description, '
+                    "tokenize = 'unicode61 remove_diacritics 2')"
+                )
+        except DatabaseError:
+            # SQLite собран без FTS5 — поиск откатится на icontains
+            return
+
+    Project = apps.get_model('projects', 'Project')
+    Task = apps.get_model('tasks', 'Task')
+    with connection.cursor() as cursor:
+        for model, table in ((Project, TABLES[0]), (Task, TABLES[1])):
+            sql = f'INSERT INTO {table} (obj_id, title, description) VALUES (%s, %s, %s)'
+            batch = []
+            rows = model.objects.values_list('pk', 'title', 'description')
+            for pk, title, description in rows.iterator(chunk_size=2000):
+                batch.append((pk.hex, title, description or ''))
+                if len(batch) >= 2000:
+                    cursor.executemany(sql, batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+
+
+def drop_fts_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in TABLES:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_project_task_counters'),
+        ('tasks', '0004_task_status_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_tables, drop_fts_tables),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='changed at'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='version',
+            field=models.PositiveBigIntegerField(default=1, editable=False, verbose_name='version'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_project_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projectinvitation',
+            index=models.Index(fields=['expires_at'], name='projects_pr_expires_17d640_idx'),
+        ),
+    ]
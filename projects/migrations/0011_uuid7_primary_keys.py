@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:28
+
+import projects.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_projectinvitation_expires_at_index'),
+    ]
+
+    # Только значение по умолчанию (см. tasks.0005): без пересоздания таблиц
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='historicalproject',
+                    name='id',
+                    field=models.UUIDField(db_index=True, default=projects.ids.uuid7, editable=False),
+                ),
+                migrations.AlterField(
+                    model_name='project',
+                    name='id',
+                    field=models.UUIDField(default=projects.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
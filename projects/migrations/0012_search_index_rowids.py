@@ -0,0 +1,43 @@
+from django.db import migrations
+
+
+TABLES = ['projects_project_fts', 'tasks_task_fts']
+
+
+def _fts_tables(connection):
+    if connection.vendor != 'sqlite':
+        return []
+    with connection.cursor() as cursor:
+        existing = set(connection.introspection.table_names(cursor))
+    # Без FTS5 (0008 таблиц не создала) поиск идёт через icontains
+    return [table for table in TABLES if table in existing]
+
+
+def create_id_tables(apps, schema_editor):
+    """obj_id -> rowid для удаления строк FTS по rowid, а не полным проходом;
+    соответствие для уже проиндексированных строк берётся из самой FTS"""
+    with schema_editor.connection.cursor() as cursor:
+        for table in _fts_tables(schema_editor.connection):
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {table}_ids (id INTEGER PRIMARY KEY, obj_id TEXT NOT NULL UNIQUE)'
+            )
+            cursor.execute(f'INSERT OR IGNORE INTO {table}_ids (id, obj_id) SELECT rowid, obj_id FROM {table}')
+            # Дубли obj_id (если были) — строки FTS без соответствия
+            cursor.execute(f'DELETE FROM {table} WHERE rowid NOT IN (SELECT id FROM {table}_ids)')
+
+
+def drop_id_tables(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for table in _fts_tables(schema_editor.connection):
+            cursor.execute(f'DROP TABLE IF EXISTS {table}_ids')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0011_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_id_tables, drop_id_tables),
+    ]
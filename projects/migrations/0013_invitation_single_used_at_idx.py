@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0012_search_index_rowids'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projectinvitation',
+            index=models.Index(condition=models.Q(('is_single_use', True)), fields=['used_at'], name='invitation_single_used_at_idx'),
+        ),
+    ]
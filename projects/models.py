@@ -1,9 +1,33 @@
 import uuid
-from django.db import models
-from simple_history.models import HistoricalRecords
+from django.db import models, transaction
+from .history import ChangedOnlyHistoricalRecords
+from .ids import uuid7
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.db.models.functions import Round
+
+class ProjectMembershipQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """UPDATE идёт в обход сигналов: роли пользователей и версии проектов
+        сбрасываем сами, как это делает membership_changed"""
+        from . import roles
+
+        rows = list(self.order_by().values_list('user_id', 'project_id'))
+        updated = super().update(**kwargs)
+        user_ids = {user_id for user_id, _ in rows}
+        project_ids = {project_id for _, project_id in rows}
+        for field, ids in (('user', user_ids), ('project', project_ids)):
+            value = kwargs.get(f'{field}_id', kwargs.get(field))
+            if value is not None:
+                ids.add(getattr(value, 'pk', value))
+        for user_id in user_ids:
+            roles.invalidate_user(user_id)
+        Project.objects.filter(pk__in=project_ids).touch()
+        return updated
+
+    update.alters_data = True
+
 
 class ProjectMembership(models.Model):
     project = models.ForeignKey('Project', on_delete=models.CASCADE)
@@ -18,7 +42,8 @@ class ProjectMembership(models.Model):
         verbose_name='Роль'
     )
     joined_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата присоединения')
-    
+
+    objects = ProjectMembershipQuerySet.as_manager()
     
     class Meta:
         verbose_name = 'Участие в проекте'
@@ -28,9 +53,46 @@ class ProjectMembership(models.Model):
     def __str__(self):
         return f"{self.user} в {self.project} ({self.role})"
 
+class ProjectQuerySet(models.QuerySet):
+    def touch(self, **updates):
+        """UPDATE, отмечающий проекты изменёнными (version + 1, changed_at)"""
+        return self.update(
+            version=models.F('version') + 1,
+            changed_at=timezone.now(),
+            **updates
+        )
+
+    touch.alters_data = True
+
+    def with_stats(self):
+        """Аннотирует проекты статистикой задач одним GROUP BY:
+        stats_total, stats_<status>, stats_completion."""
+        total = models.Count('tasks')
+        done = models.Count('tasks', filter=models.Q(tasks__status='done'))
+        return self.annotate(
+            stats_total=total,
+            stats_not_started=models.Count('tasks', filter=models.Q(tasks__status='not_started')),
+            stats_in_progress=models.Count('tasks', filter=models.Q(tasks__status='in_progress')),
+            stats_under_review=models.Count('tasks', filter=models.Q(tasks__status='under_review')),
+            stats_done=done,
+            stats_completion=models.Case(
+                models.When(stats_total=0, then=models.Value(0.0)),
+                default=Round(done * 100.0 / total, 1),
+                output_field=models.FloatField(),
+            ),
+        )
+
+
+# Поля, которые ведут tasks.counters и touch(); обычный save() их не пишет
+DENORMALIZED_FIELDS = (
+    'tasks_not_started', 'tasks_in_progress', 'tasks_under_review', 'tasks_done',
+    'version', 'changed_at',
+)
+
+
 class Project(models.Model):
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     users = models.ManyToManyField(
         settings.AUTH_USER_MODEL,
         through='ProjectMembership',
@@ -46,7 +108,18 @@ class Project(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='created at')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='updated at')
-    history = HistoricalRecords()   
+    # Денормализованные счётчики задач по статусам (поддерживаются tasks.counters)
+    tasks_not_started = models.PositiveIntegerField(default=0, editable=False, verbose_name='tasks not started')
+    tasks_in_progress = models.PositiveIntegerField(default=0, editable=False, verbose_name='tasks in progress')
+    tasks_under_review = models.PositiveIntegerField(default=0, editable=False, verbose_name='tasks under review')
+    tasks_done = models.PositiveIntegerField(default=0, editable=False, verbose_name='tasks done')
+    # Версия проекта: растёт при любом изменении проекта, его задач или участников
+    version = models.PositiveBigIntegerField(default=1, editable=False, verbose_name='version')
+    changed_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name='changed at')
+    # Строка истории пишется только при изменении отслеживаемых полей
+    history = ChangedOnlyHistoricalRecords(excluded_fields=list(DENORMALIZED_FIELDS))
+
+    objects = ProjectQuerySet.as_manager()
     
     
     class Meta:
@@ -58,17 +131,38 @@ class Project(models.Model):
     
     def __str__(self):
         return f"{self.title}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        cls._history_records.remember_state(instance)
+        return instance
     
+    # Свойства предпочитают аннотации with_stats(), иначе берут сохранённые счётчики
     @property
     def total_tasks(self):
-        return self.tasks.count()
+        annotated = getattr(self, 'stats_total', None)
+        if annotated is not None:
+            return annotated
+        return (
+            self.tasks_not_started
+            + self.tasks_in_progress
+            + self.tasks_under_review
+            + self.tasks_done
+        )
     
     @property
     def completed_tasks(self):
-        return self.tasks.filter(status='done').count()
+        annotated = getattr(self, 'stats_done', None)
+        if annotated is not None:
+            return annotated
+        return self.tasks_done
     
     @property
     def completion_percentage(self):
+        annotated = getattr(self, 'stats_completion', None)
+        if annotated is not None:
+            return annotated if self.total_tasks else 0
         total = self.total_tasks
         if total == 0:
             return 0
@@ -80,10 +174,42 @@ class Project(models.Model):
             current_user = get_user_model().objects.first()
             if current_user:
                 self.user = current_user
-        super().save(*args, **kwargs)
+        if self._state.adding or kwargs.get('update_fields') is not None or kwargs.get('force_insert') or args:
+            super().save(*args, **kwargs)
+            return
+        # Устаревший экземпляр (форма, админка, API) не должен откатить счётчики
+        # и версию: пишем остальные поля, а денормализованные перечитываем
+        kwargs['update_fields'] = [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in DENORMALIZED_FIELDS
+        ]
+        super().save(**kwargs)
+        self.refresh_from_db(fields=DENORMALIZED_FIELDS)
+
+
+class ProjectInvitationQuerySet(models.QuerySet):
+    def valid(self, now=None):
+        """Не истёкшие и (для одноразовых) не использованные"""
+        now = now or timezone.now()
+        return self.filter(
+            models.Q(expires_at__isnull=True) | models.Q(expires_at__gt=now),
+            models.Q(is_single_use=False) | models.Q(used_by__isnull=True),
+        )
+
+    def purgeable(self, expired_before, used_before):
+        """Истёкшие до expired_before и одноразовые, использованные до used_before"""
+        return self.filter(
+            models.Q(expires_at__lt=expired_before)
+            | models.Q(is_single_use=True, used_at__lt=used_before)
+        )
 
 
 class ProjectInvitation(models.Model):
+    # Результаты accept()
+    JOINED = 'joined'
+    ALREADY_MEMBER = 'already_member'
+    INVALID = 'invalid'
+
     project = models.ForeignKey(
         'Project',
         on_delete=models.CASCADE,
@@ -129,9 +255,18 @@ class ProjectInvitation(models.Model):
         verbose_name='Дата использования'
     )
 
+    objects = ProjectInvitationQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Приглашение в проект'
         verbose_name_plural = 'Приглашения в проекты'
+        indexes = [
+            # purge_invitations: expires_at < ...
+            models.Index(fields=['expires_at']),
+            # ...или is_single_use AND used_at < ...: вторая ветка OR
+            models.Index(fields=['used_at'], condition=models.Q(is_single_use=True),
+                         name='invitation_single_used_at_idx'),
+        ]
 
     def __str__(self):
         return f"Приглашение в {self.project} от {self.created_by}"
@@ -149,4 +284,31 @@ class ProjectInvitation(models.Model):
         return not self.is_expired and not (self.is_single_use and self.is_used)
 
     def get_absolute_url(self):
-        return f"/invite/{self.token}/"
\ No newline at end of file
+        return f"/invite/{self.token}/"
+
+    def accept(self, user):
+        """Добавляет пользователя в проект по приглашению.
+
+        Одноразовое приглашение захватывается одним условным UPDATE: из двух
+        одновременных переходов по ссылке успешен только один. Участник
+        проекта приглашение не расходует. Возвращает JOINED, ALREADY_MEMBER
+        или INVALID.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            if self.is_single_use:
+                claimed = ProjectInvitation.objects.filter(pk=self.pk).valid(now).exclude(
+                    project__users=user
+                ).update(used_by=user, used_at=now)
+                if not claimed:
+                    if ProjectMembership.objects.filter(project_id=self.project_id, user=user).exists():
+                        return self.ALREADY_MEMBER
+                    return self.INVALID
+                self.used_by, self.used_at = user, now
+            elif self.is_expired:
+                return self.INVALID
+
+            _, created = ProjectMembership.objects.get_or_create(
+                project_id=self.project_id, user=user, defaults={'role': 'member'}
+            )
+        return self.JOINED if created else self.ALREADY_MEMBER
\ No newline at end of file
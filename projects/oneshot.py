@@ -0,0 +1,39 @@
+"""Одноразовые значения для следующей страницы без записи в сессию.
+
+Значение уходит вместе с редиректом в подписанной cookie с коротким сроком
+жизни; страница, которая его показала, удаляет cookie в своём ответе. В
+отличие от request.session ни запись, ни чтение не трогают django_session.
+"""
+from django.conf import settings
+
+PREFIX = 'once_'
+SALT = 'projects.oneshot'
+MAX_AGE = 300
+
+
+def send(response, name, value, max_age=MAX_AGE):
+    response.set_signed_cookie(
+        PREFIX + name, value, salt=SALT, max_age=max_age,
+        httponly=True, samesite='Lax', secure=settings.SESSION_COOKIE_SECURE,
+    )
+    return response
+
+
+def read(request, name):
+    """Значение или None; cookie удаляет consume() в ответе этой же страницы"""
+    cookie = PREFIX + name
+    if cookie not in request.COOKIES:
+        return None
+    request.__dict__.setdefault('_oneshot_read', set()).add(cookie)
+    return request.get_signed_cookie(cookie, default=None, salt=SALT, max_age=MAX_AGE)
+
+
+def pending(request):
+    """Есть непрочитанные одноразовые значения (такую страницу нельзя кешировать)"""
+    return any(name.startswith(PREFIX) for name in request.COOKIES)
+
+
+def consume(request, response):
+    for cookie in getattr(request, '_oneshot_read', ()):
+        response.delete_cookie(cookie, samesite='Lax')
+    return response
@@ -0,0 +1,409 @@
+"""Планы горячих запросов (EXPLAIN QUERY PLAN) и сверка с эталоном.
+
+Каждый горячий queryset регистрируется через @hot и строится тем же кодом,
+что и во вьюхах, API, админке и командах. check() снимает план, отмечает
+полные проходы по таблицам и временные B-деревья для сортировки/группировки
+и сравнивает их с эталоном benchmarks/query_plans.json: новая проблема,
+которой нет в эталоне, — регрессия. Для проблемных таблиц подсказывается
+индекс (составной, покрывающий или частичный).
+
+Планы снимаются без статистики ANALYZE, поэтому на пустой тестовой базе и
+на временной базе команды check_query_plans они одинаковые.
+"""
+import json
+import re
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Q
+from django.db.models.lookups import Lookup
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.request import Request
+
+HOT = {}
+
+_SCAN = re.compile(r'^SCAN (\S+)(?!\S| USING)')
+_TEMP = re.compile(r'USE TEMP B-TREE FOR (.+)$')
+_EQUALITY = {'exact', 'in', 'isnull'}
+
+
+def hot(name):
+    """Регистрирует построитель горячего queryset: builder(ctx) -> QuerySet"""
+    def decorator(builder):
+        HOT[name] = builder
+        return builder
+    return decorator
+
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'query_plans.json'
+
+
+class Context:
+    """Минимальные данные, на которых строятся запросы: пользователь-владелец,
+    проект, задача и приглашение"""
+
+    def __init__(self, user, project, task, invitation):
+        self.user = user
+        self.project = project
+        self.task = task
+        self.invitation = invitation
+        self.now = timezone.now()
+
+    @classmethod
+    def create(cls):
+        from projects.models import Project, ProjectInvitation, ProjectMembership
+        from tasks.models import Task
+
+        user, _ = get_user_model().objects.get_or_create(username='query-plans')
+        project = Project.objects.create(title='Планы запросов')
+        ProjectMembership.objects.create(project=project, user=user, role='owner')
+        task = Task.objects.create(project=project, title='Задача', author=user)
+        invitation = ProjectInvitation.objects.create(project=project, created_by=user)
+        return cls(user, project, task, invitation)
+
+    def request(self, path='/', **params):
+        request = RequestFactory().get(path, params)
+        request.user = self.user
+        request.session = {}
+        return request
+
+    def view(self, view_class, api=False, **kwargs):
+        view = view_class()
+        request = self.request()
+        if api:
+            request = Request(request)
+            request.user = self.user
+            view.format_kwarg = None
+        view.request, view.args, view.kwargs = request, (), kwargs
+        return view
+
+
+def explain(queryset, using='default'):
+    """Строки плана: (глубина, текст) в порядке вывода SQLite"""
+    connection = connections[using]
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        rows = cursor.fetchall()
+    depth = {0: -1}
+    plan = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        plan.append((depth[node], detail))
+    return plan
+
+
+def issues(plan):
+    """Полные проходы по таблицам и временные B-деревья"""
+    found = []
+    for _, detail in plan:
+        scan = _SCAN.match(detail)
+        if scan:
+            found.append(f'SCAN {scan.group(1)}')
+        temp = _TEMP.search(detail)
+        if temp:
+            found.append(f'TEMP B-TREE {temp.group(1)}')
+    return sorted(set(found))
+
+
+def _branches(node):
+    """Наборы условий-сравнений, каждый из которых выбирает строки сам по себе:
+    для AND — объединение, для OR — по набору на ветвь (отрицания пропускаем)"""
+    if isinstance(node, Lookup):
+        return [[node]]
+    if not hasattr(node, 'children') or node.negated:
+        return [[]]
+    if node.connector == 'OR':
+        return [branch for child in node.children for branch in _branches(child)]
+    branches = [[]]
+    for child in node.children:
+        branches = [left + right for left in branches for right in _branches(child)]
+    return branches
+
+
+def _indexed(model, fields, condition):
+    """Есть ли у модели индекс, начинающийся с этих полей"""
+    if condition:
+        return False
+    existing = [list(index.fields) for index in model._meta.indexes]
+    existing += [list(fields) for fields in model._meta.unique_together]
+    existing += [[field.name] for field in model._meta.concrete_fields if field.db_index or field.unique]
+    return any(index[:len(fields)] == fields for index in existing)
+
+
+def suggest(queryset, problems):
+    """Подсказки индексов для таблиц с полным проходом или сортировкой во временном дереве.
+
+    Поля индекса: сначала сравнения на равенство, затем сортировка, затем
+    диапазоны. Равенство с константой для булева поля или поля с choices
+    выносится в условие частичного индекса, выбираемые values_list() поля
+    дописываются в конец (покрывающий индекс). Для OR — по индексу на ветвь,
+    чтобы SQLite мог объединить их (MULTI-INDEX OR).
+    """
+    query = queryset.query
+    base = query.model
+    tables = {problem.split()[1] for problem in problems if problem.startswith('SCAN ')}
+    if any(problem.startswith('TEMP B-TREE ORDER BY') for problem in problems):
+        tables.add(base._meta.db_table)
+
+    hints = []
+    for table in sorted(tables):
+        for branch in _branches(query.where):
+            equal, ranged, condition = [], [], []
+            model = base if table == base._meta.db_table else None
+            for lookup in branch:
+                target, alias = getattr(lookup.lhs, 'target', None), getattr(lookup.lhs, 'alias', None)
+                if target is None or alias not in query.alias_map:
+                    continue
+                if query.alias_map[alias].table_name != table:
+                    continue
+                model = target.model
+                constant = not hasattr(lookup.rhs, 'resolve_expression')
+                if lookup.lookup_name == 'exact' and constant and (
+                        target.choices or target.get_internal_type() == 'BooleanField'):
+                    condition.append(f'{target.name}={lookup.rhs!r}')
+                elif lookup.lookup_name in _EQUALITY:
+                    equal.append(target.name)
+                else:
+                    ranged.append(target.name)
+            if model is None:
+                continue
+
+            ordering = []
+            if model is base:
+                ordering = [
+                    re.sub(r'^(-?)pk$', rf'\g<1>{base._meta.pk.name}', name)
+                    for name in query.order_by or base._meta.ordering if '__' not in name
+                ]
+            # Сортировка перед диапазоном: с LIMIT строки читаются по индексу уже упорядоченными
+            fields, columns = [], set()
+            for name in equal + ordering + ranged:
+                if name.lstrip('-') not in columns:
+                    fields.append(name)
+                    columns.add(name.lstrip('-'))
+            if not fields or _indexed(model, [name.lstrip('-') for name in fields], condition):
+                continue
+            covering = [
+                model._meta.pk.name if name == 'pk' else name
+                for name in query.values_select if '__' not in name
+            ] if model is base else []
+            covering = [name for name in dict.fromkeys(covering) if name not in columns]
+
+            options = [f'fields={(fields + covering)!r}']
+            if condition:
+                options.append(f'condition=Q({", ".join(condition)})')
+            kind = 'частичный' if condition else 'покрывающий' if covering else 'составной'
+            hint = f'{model.__name__}: models.Index({", ".join(options)})  # {kind}'
+            if hint not in hints:
+                hints.append(hint)
+    return hints
+
+
+def check(names=None, ctx=None, using='default'):
+    """Снимает планы горячих запросов: {имя: {'plan', 'issues', 'suggestions'}}"""
+    ctx = ctx or Context.create()
+    result = {}
+    for name in sorted(names or HOT):
+        queryset = HOT[name](ctx)
+        plan = explain(queryset, using)
+        problems = issues(plan)
+        result[name] = {
+            'plan': ['  ' * depth + detail for depth, detail in plan],
+            'issues': problems,
+            'suggestions': suggest(queryset, problems) if problems else [],
+        }
+    return result
+
+
+def load_baseline(path=None):
+    path = Path(path or DEFAULT_BASELINE)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def save_baseline(result, path=None):
+    data = {name: {'plan': entry['plan'], 'issues': entry['issues']} for name, entry in result.items()}
+    Path(path or DEFAULT_BASELINE).write_text(
+        json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True) + '\n', encoding='utf-8'
+    )
+
+
+def compare(result, baseline):
+    """{имя: (статус, новые проблемы)}; статус: ok, changed, regressed, new"""
+    report = {}
+    for name, entry in result.items():
+        known = baseline.get(name)
+        if known is None:
+            report[name] = ('new', entry['issues'])
+            continue
+        added = sorted(set(entry['issues']) - set(known['issues']))
+        if added:
+            report[name] = ('regressed', added)
+        elif entry['plan'] != known['plan']:
+            report[name] = ('changed', [])
+        else:
+            report[name] = ('ok', [])
+    return report
+
+
+class QueryPlanAssertions:
+    """Примесь для TestCase: планы горячих запросов не хуже эталона"""
+
+    def assertQueryPlansMatchBaseline(self, names=None, baseline=None):
+        result = check(names)
+        baseline = load_baseline() if baseline is None else baseline
+        failures = [
+            f'{name}: {status} {", ".join(added)}'.rstrip()
+            for name, (status, added) in compare(result, baseline).items()
+            if status in ('regressed', 'new')
+        ]
+        if failures:
+            self.fail('Планы запросов хуже эталона (обновить: manage.py check_query_plans '
+                      '--update-baseline):\n' + '\n'.join(failures))
+
+
+# Горячие запросы. Где можно — через get_queryset() самих вьюх
+
+
+@hot('projects.index')
+def _projects_index(ctx):
+    from projects.views import Index
+    return ctx.view(Index).get_queryset()
+
+
+@hot('projects.detail')
+def _projects_detail(ctx):
+    from projects.views import ProjectDetail
+    return ctx.view(ProjectDetail, pk=ctx.project.pk).get_queryset().filter(pk=ctx.project.pk)
+
+
+@hot('projects.detail.memberships')
+def _projects_detail_memberships(ctx):
+    return ctx.project.projectmembership_set.select_related('user')
+
+
+@hot('projects.detail.tasks')
+def _projects_detail_tasks(ctx):
+    from tasks.pagination import _keyset_query
+    return _keyset_query(ctx.project.tasks.all(), None, 5)[0]
+
+
+@hot('projects.detail.open_tasks')
+def _projects_detail_open_tasks(ctx):
+    from tasks.pagination import _keyset_query
+    return _keyset_query(ctx.project.tasks.filter(~Q(status='done')), None, 5)[0]
+
+
+@hot('projects.validators')
+def _projects_validators(ctx):
+    from projects.models import Project
+    return Project.objects.filter(pk=ctx.project.pk, users=ctx.user).values_list('version', 'changed_at')[:1]
+
+
+@hot('projects.etag')
+def _projects_etag(ctx):
+    # user_projects_etag агрегирует этот queryset
+    from projects.models import Project
+    return Project.objects.filter(users=ctx.user).values_list('version', 'changed_at')
+
+
+@hot('projects.api.list')
+def _projects_api_list(ctx):
+    from projects.views_api import ProjectViewSet
+    view = ctx.view(ProjectViewSet, api=True)
+    return view.filter_queryset(view.get_queryset())
+
+
+@hot('projects.owned_by_user')
+def _projects_owned_by_user(ctx):
+    # deletion.delete_user
+    from projects.models import Project
+    return Project.objects.filter(
+        projectmembership__user_id=ctx.user.pk, projectmembership__role='owner'
+    ).values_list('pk', flat=True)
+
+
+@hot('memberships.by_user')
+def _memberships_by_user(ctx):
+    # roles.RoleResolver.memberships
+    from projects.models import ProjectMembership
+    return ProjectMembership.objects.filter(user_id=ctx.user.pk).values_list('project_id', 'role', 'joined_at')
+
+
+@hot('invitations.by_token')
+def _invitations_by_token(ctx):
+    from projects.models import ProjectInvitation
+    return ProjectInvitation.objects.select_related('project').filter(token=ctx.invitation.token)
+
+
+@hot('invitations.purgeable')
+def _invitations_purgeable(ctx):
+    from projects.models import ProjectInvitation
+    return ProjectInvitation.objects.purgeable(ctx.now, ctx.now).values_list('pk', flat=True)[:1000]
+
+
+@hot('tasks.api.list')
+def _tasks_api_list(ctx):
+    from tasks.pagination import _keyset_query
+    from tasks.views_api import TaskViewSet
+    view = ctx.view(TaskViewSet, api=True)
+    return _keyset_query(view.filter_queryset(view.get_queryset()), None, 20)[0]
+
+
+@hot('tasks.api.project_list')
+def _tasks_api_project_list(ctx):
+    from tasks.pagination import _keyset_query
+    from tasks.views_api import TaskViewSet
+    view = ctx.view(TaskViewSet, api=True, project_pk=ctx.project.pk)
+    return _keyset_query(view.filter_queryset(view.get_queryset()), None, 20)[0]
+
+
+@hot('tasks.api.validators')
+def _tasks_api_validators(ctx):
+    from tasks.views_api import TaskViewSet
+    return ctx.view(TaskViewSet, api=True, pk=ctx.task.pk).get_validators_queryset()
+
+
+@hot('tasks.admin.list')
+def _tasks_admin_list(ctx):
+    from tasks.models import Task
+    model_admin = admin.site._registry[Task]
+    return model_admin.get_queryset(ctx.request()).order_by(*model_admin.get_ordering(ctx.request()))
+
+
+@hot('tasks.cleanup')
+def _tasks_cleanup(ctx):
+    # cleanup_old_tasks: пакет на удаление
+    from tasks.models import Task
+    return Task.objects.filter(
+        status='done', updated_at__lt=ctx.now - timedelta(days=30)
+    ).order_by('updated_at').values_list('pk', 'project_id')[:1000]
+
+
+@hot('tasks.by_author')
+def _tasks_by_author(ctx):
+    # deletion.delete_user
+    from tasks.models import Task
+    return Task.objects.filter(author_id=ctx.user.pk).order_by().values_list('pk', flat=True)[:1000]
+
+
+@hot('jobs.claim')
+def _jobs_claim(ctx):
+    from jobs.models import Job
+    from jobs.queue import _available
+    return Job.objects.filter(_available(ctx.now)).order_by('-priority', 'run_at').values_list('pk', flat=True)[:1]
+
+
+@hot('jobs.purge')
+def _jobs_purge(ctx):
+    # purge_jobs: пакет на удаление
+    from jobs.models import Job
+    return Job.objects.filter(
+        status=Job.Status.DONE, finished_at__lt=ctx.now - timedelta(days=7)
+    ).values_list('pk', flat=True)[:1000]
@@ -0,0 +1,176 @@
+"""Определение роли пользователя в проектах.
+
+Членства пользователя загружаются одним запросом, запоминаются на время
+запроса (request.project_roles) и кешируются между запросами (кеш
+settings.ROLES_CACHE_ALIAS) под версионированным ключом. Версия
+пользователя увеличивается при создании, изменении или удалении его
+ProjectMembership (см. projects.signals); новая или вытесненная из кеша
+версия начинается с метки времени, поэтому никогда не возвращается к
+прежнему значению и его данным.
+Членства читаются с основной базы: отставшая реплика не должна решать,
+есть ли у пользователя доступ.
+"""
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import ProjectMembership
+from .routers import use_primary
+
+OWNER = 'owner'
+MEMBER = 'member'
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def _version_key(user_id):
+    return f'project_roles:version:{user_id}'
+
+
+def _data_key(user_id, version):
+    return f'project_roles:{user_id}:v{version}'
+
+
+def _cache():
+    return caches[settings.ROLES_CACHE_ALIAS]
+
+
+def _seed():
+    """Начальная версия: больше любой версии, выданной раньше"""
+    return time.time_ns()
+
+
+def _version(cache, user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _seed()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+async def _aversion(cache, user_id):
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = _seed()
+        if not await cache.aadd(key, version, None):
+            version = await cache.aget(key, version)
+    return version
+
+
+def invalidate_user(user_id):
+    """Сбрасывает закешированные роли пользователя (новая версия ключа).
+
+    Внутри транзакции версия меняется ещё раз после коммита: параллельный
+    запрос между сбросом и коммитом читает старые членства и кеширует их
+    под новой версией, а на CACHE_TIMEOUT они оставаться не должны.
+    """
+    _bump_version(user_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(partial(_bump_version, user_id))
+
+
+def _bump_version(user_id):
+    cache = _cache()
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _seed(), None)
+
+
+class RoleResolver:
+    def __init__(self, user):
+        self.user = user
+        self._memberships = None
+
+    def memberships(self):
+        """{project_id (str): {'role': ..., 'joined_at': ...}} для пользователя"""
+        if self._memberships is not None:
+            return self._memberships
+        if not getattr(self.user, 'is_authenticated', False):
+            self._memberships = {}
+            return self._memberships
+
+        user_id = self.user.pk
+        cache = _cache()
+        version = _version(cache, user_id)
+        key = _data_key(user_id, version)
+        memberships = cache.get(key)
+        if memberships is None:
+            with use_primary():
+                memberships = {
+                    str(project_id): {'role': role, 'joined_at': joined_at}
+                    for project_id, role, joined_at in ProjectMembership.objects.filter(
+                        user_id=user_id
+                    ).values_list('project_id', 'role', 'joined_at')
+                }
+            cache.set(key, memberships, CACHE_TIMEOUT)
+        self._memberships = memberships
+        return memberships
+
+    async def amemberships(self):
+        """memberships() для асинхронных вьюх: кеш и ORM через async API"""
+        if self._memberships is not None:
+            return self._memberships
+        if not getattr(self.user, 'is_authenticated', False):
+            self._memberships = {}
+            return self._memberships
+
+        user_id = self.user.pk
+        cache = _cache()
+        version = await _aversion(cache, user_id)
+        key = _data_key(user_id, version)
+        memberships = await cache.aget(key)
+        if memberships is None:
+            with use_primary():
+                memberships = {
+                    str(project_id): {'role': role, 'joined_at': joined_at}
+                    async for project_id, role, joined_at in ProjectMembership.objects.filter(
+                        user_id=user_id
+                    ).values_list('project_id', 'role', 'joined_at')
+                }
+            await cache.aset(key, memberships, CACHE_TIMEOUT)
+        self._memberships = memberships
+        return memberships
+
+    def membership(self, project):
+        project_id = getattr(project, 'pk', project)
+        return self.memberships().get(str(project_id))
+
+    def role(self, project):
+        membership = self.membership(project)
+        return membership['role'] if membership else None
+
+    def is_member(self, project):
+        return self.membership(project) is not None
+
+    def is_owner(self, project):
+        return self.role(project) == OWNER
+
+
+def get_resolver(request):
+    """RoleResolver текущего запроса (создаётся один раз на запрос)"""
+    resolver = getattr(request, 'project_roles', None)
+    if resolver is None or resolver.user is not request.user:
+        resolver = RoleResolver(request.user)
+        request.project_roles = resolver
+    return resolver
+
+
+async def aget_resolver(request):
+    """get_resolver для асинхронных вьюх: пользователь и членства загружены
+    заранее, дальнейшие проверки роли не обращаются к базе"""
+    user = await request.auser()
+    resolver = getattr(request, 'project_roles', None)
+    if resolver is None or resolver.user is not user:
+        resolver = RoleResolver(user)
+        request.project_roles = resolver
+    await resolver.amemberships()
+    return resolver
+
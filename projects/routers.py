@@ -0,0 +1,142 @@
+"""Маршрутизация запросов между основной базой и репликами.
+
+На реплики из settings.DB_ROUTING['REPLICAS'] уходят только чтения
+HTTP-запросов (состояние ставит PrimaryPinMiddleware), запись — на основную
+базу. На основную уходят и чтения, которым нужны свежие данные:
+
+- вне HTTP-запроса: команды, run_workers, периодические задачи читают и
+  сразу пишут производные данные (счётчики, индекс, статусы задач);
+- внутри транзакции на основной базе;
+- в HTTP-запросе, который уже что-то записал;
+- в течение PIN_SECONDS после записи из того же браузера (cookie
+  PIN_COOKIE, ставит PrimaryPinMiddleware);
+- внутри use_primary() — например, при загрузке ролей для проверки прав.
+
+Без реплик роутер и middleware ничего не меняют.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class RoutingState:
+    """Состояние маршрутизации одного HTTP-запроса"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+_force_primary = ContextVar('db_force_primary', default=False)
+
+
+def options():
+    return getattr(settings, 'DB_ROUTING', {})
+
+
+def replicas():
+    return options().get('REPLICAS', [])
+
+
+@contextmanager
+def use_primary():
+    """Все чтения внутри блока — с основной базы"""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+def reads_from_primary():
+    if _force_primary.get():
+        return True
+    state = _state.get()
+    if state is None or state.pinned or state.wrote:
+        return True
+    return connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if not aliases or reads_from_primary():
+            return DEFAULT_DB_ALIAS
+        # Связанные объекты читаем оттуда же, откуда пришёл исходный
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in aliases:
+            return instance._state.db
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает на реплики вместе с данными
+        if db in replicas():
+            return False
+        return None
+
+
+class PrimaryPinMiddleware:
+    """После записи закрепляет браузер за основной базой на PIN_SECONDS.
+
+    Cookie не подписывается: подделав её, клиент лишь читает с основной базы.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not replicas():
+            return self.get_response(request)
+        state = self.start(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        if not replicas():
+            return await self.get_response(request)
+        state = self.start(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(response, state)
+
+    def start(self, request):
+        return RoutingState(pinned=options().get('PIN_COOKIE', 'db_pin') in request.COOKIES)
+
+    def finish(self, response, state):
+        if state.wrote:
+            response.set_cookie(
+                options().get('PIN_COOKIE', 'db_pin'), '1',
+                max_age=options().get('PIN_SECONDS', 5), httponly=True, samesite='Lax',
+            )
+        return response
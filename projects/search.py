@@ -0,0 +1,246 @@
+"""Полнотекстовый поиск по проектам и задачам на SQLite FTS5.
+
+Для каждой модели ведётся отдельная FTS5-таблица (obj_id, title,
+description), которую синхронизируют сигналы (projects.signals,
+tasks.signals) и пересобирает команда rebuild_search_index. Колонка obj_id
+в FTS5 не индексируется, поэтому строки ищутся по rowid через обычную
+таблицу <fts>_ids (id = rowid в FTS, obj_id UNIQUE). Если база не
+SQLite или FTS5 не собран, fts_available() возвращает False и вызывающий
+код откатывается на icontains.
+"""
+import re
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .models import Project
+
+# Максимум результатов ranked_ids() по умолчанию
+MAX_RESULTS = 1000
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_available = {}
+
+
+def _task_model():
+    from tasks.models import Task
+    return Task
+
+
+# Модель -> FTS-таблица
+INDEXES = {
+    'projects': (lambda: Project, 'projects_project_fts'),
+    'tasks': (_task_model, 'tasks_task_fts'),
+}
+
+
+def _table_for(model):
+    for get_model, table in INDEXES.values():
+        if get_model() is model:
+            return table
+    raise LookupError(f'{model.__name__} не индексируется')
+
+
+def fts_available(using=None):
+    """True, если текущая БД — SQLite с поддержкой FTS5"""
+    conn = connection if using is None else using
+    if conn.vendor != 'sqlite':
+        return False
+    key = conn.settings_dict['NAME']
+    if key not in _available:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_probe USING fts5(x)')
+                cursor.execute('DROP TABLE temp.fts5_probe')
+            _available[key] = True
+        except DatabaseError:
+            _available[key] = False
+    return _available[key]
+
+
+# Параметров в одном IN (...): ниже лимита SQLite на число переменных
+CHUNK_SIZE = 500
+
+
+def create_tables():
+    if not fts_available():
+        return False
+    with connection.cursor() as cursor:
+        for _, table in INDEXES.values():
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5('
+                'obj_id UNINDEXED, title, description, '
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {table}_ids (id INTEGER PRIMARY KEY, obj_id TEXT NOT NULL UNIQUE)'
+            )
+    return True
+
+
+def _obj_id(model, pk):
+    return model._meta.pk.get_db_prep_value(pk, connection)
+
+
+def index_objects(model, objs):
+    """Добавляет/обновляет объекты в индексе"""
+    objs = list(objs)
+    if not objs or not fts_available():
+        return
+    table = _table_for(model)
+    rows = [(_obj_id(model, obj.pk), obj.title, obj.description or '') for obj in objs]
+    # executemany вне транзакции коммитит каждую строку отдельно
+    with transaction.atomic(), connection.cursor() as cursor:
+        _delete_rows(cursor, table, [row[0] for row in rows])
+        cursor.executemany(f'INSERT OR IGNORE INTO {table}_ids (obj_id) VALUES (%s)', [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {table} (rowid, obj_id, title, description) '
+            f'SELECT id, obj_id, %s, %s FROM {table}_ids WHERE obj_id = %s',
+            [(title, description, obj_id) for obj_id, title, description in rows]
+        )
+
+
+def unindex_objects(model, pks):
+    pks = list(pks)
+    if not pks or not fts_available():
+        return
+    table = _table_for(model)
+    obj_ids = [_obj_id(model, pk) for pk in pks]
+    with transaction.atomic(), connection.cursor() as cursor:
+        _delete_rows(cursor, table, obj_ids)
+        for start in range(0, len(obj_ids), CHUNK_SIZE):
+            chunk = obj_ids[start:start + CHUNK_SIZE]
+            cursor.execute(
+                f'DELETE FROM {table}_ids WHERE obj_id IN ({", ".join(["%s"] * len(chunk))})', chunk
+            )
+
+
+def _delete_rows(cursor, table, obj_ids):
+    """Удаляет строки FTS по rowid: WHERE obj_id = ... прошёл бы всю таблицу"""
+    for start in range(0, len(obj_ids), CHUNK_SIZE):
+        chunk = obj_ids[start:start + CHUNK_SIZE]
+        cursor.execute(
+            f'DELETE FROM {table} WHERE rowid IN '
+            f'(SELECT id FROM {table}_ids WHERE obj_id IN ({", ".join(["%s"] * len(chunk))}))', chunk
+        )
+
+
+def rebuild(model, chunk_size=2000):
+    """Пересобирает индекс модели целиком; возвращает число проиндексированных строк"""
+    with transaction.atomic():
+        return _rebuild(model, chunk_size)
+
+
+def _rebuild(model, chunk_size):
+    create_tables()
+    table = _table_for(model)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table}')
+        cursor.execute(f'DELETE FROM {table}_ids')
+    count = 0
+    batch = []
+    rows = model.objects.order_by().values_list('pk', 'title', 'description')
+    for pk, title, description in rows.iterator(chunk_size=chunk_size):
+        batch.append((_obj_id(model, pk), title, description or ''))
+        if len(batch) >= chunk_size:
+            count += _insert(table, batch)
+            batch = []
+    count += _insert(table, batch)
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {table}_ids (id, obj_id) SELECT rowid, obj_id FROM {table}')
+        cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+    return count
+
+
+def _insert(table, rows):
+    if rows:
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {table} (obj_id, title, description) VALUES (%s, %s, %s)', rows
+            )
+    return len(rows)
+
+
+def build_match(query):
+    """Пользовательский запрос -> выражение MATCH с префиксным поиском:
+    'отчёт кв' -> '"отчёт"* "кв"*'"""
+    tokens = _TOKEN_RE.findall(query or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def ranked_ids(model, query, limit=MAX_RESULTS):
+    """Первичные ключи (в формате БД) в порядке релевантности bm25;
+    limit=None — без ограничения"""
+    match = build_match(query)
+    if not match:
+        return []
+    table = _table_for(model)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT obj_id FROM {table} WHERE {table} MATCH %s ORDER BY rank LIMIT %s',
+            [match, -1 if limit is None else limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def matching(model, query):
+    """Подзапрос obj_id совпадений для pk__in=...: фильтры вызывающего
+    queryset (видимость пользователю) применяются в том же SQL, без
+    промежуточного списка ключей и без общего для всех top-N"""
+    table = _table_for(model)
+    return RawSQL(f'SELECT obj_id FROM {table} WHERE {table} MATCH %s', [build_match(query)])
+
+
+def rank(model, query):
+    """bm25 строки модели (меньше — релевантнее): поиск строки FTS по rowid через <fts>_ids"""
+    table = _table_for(model)
+    quote = connection.ops.quote_name
+    column = f'{quote(model._meta.db_table)}.{quote(model._meta.pk.column)}'
+    return RawSQL(
+        f'SELECT rank FROM {table} WHERE {table} MATCH %s '
+        f'AND rowid = (SELECT id FROM {table}_ids WHERE obj_id = {column})',
+        [build_match(query)], output_field=FloatField(),
+    )
+
+
+def search_queryset(queryset, query, fallback_fields=('title', 'description'), order_by_rank=True):
+    """Фильтрует queryset по поисковому запросу.
+
+    С FTS5 — по индексу с ранжированием (аннотация search_rank), без него —
+    через icontains по fallback_fields.
+    """
+    model = queryset.model
+    if not fts_available():
+        condition = Q()
+        for token in _TOKEN_RE.findall(query or ''):
+            term = Q()
+            for field in fallback_fields:
+                term |= Q(**{f'{field}__icontains': token})
+            condition &= term
+        return queryset.filter(condition)
+
+    if not build_match(query):
+        return queryset.none()
+    queryset = queryset.filter(pk__in=matching(model, query))
+    if order_by_rank:
+        queryset = queryset.annotate(search_rank=rank(model, query)).order_by('search_rank', 'pk')
+    return queryset
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """SearchFilter на FTS5: ?search=... ищет по индексу и сортирует по
+    релевантности (если не задан явный ?ordering=). Без FTS5 ведёт себя
+    как обычный SearchFilter."""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        if not fts_available():
+            return super().filter_queryset(request, queryset, view)
+
+        order_by_rank = api_settings.ORDERING_PARAM not in request.query_params
+        return search_queryset(queryset, ' '.join(terms), order_by_rank=order_by_rank)
@@ -1,6 +1,62 @@
 from rest_framework import serializers
 from .models import Project, ProjectMembership, ProjectInvitation
 
+
+def parse_list_param(request, name):
+    """?name=a,b,c -> {'a', 'b', 'c'}; None, если параметр не передан"""
+    if request is None or name not in request.query_params:
+        return None
+    value = request.query_params.get(name, '')
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class DynamicFieldsMixin:
+    """Sparse fieldsets (?fields=) и раскрытие связей по запросу (?expand=).
+
+    Корневой сериализатор читает параметры из запроса, вложенным их
+    передают явно: Serializer(fields=[...], expand=[...]).
+    """
+    # имя поля -> фабрика поля, добавляемого только при ?expand=имя
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._requested_fields = set(fields) if fields is not None else None
+        self._requested_expand = set(expand) if expand is not None else None
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def _from_request(self, name):
+        if not self._is_root():
+            return None
+        return parse_list_param(self.context.get('request'), name)
+
+    def get_requested_fields(self):
+        if self._requested_fields is not None:
+            return self._requested_fields
+        return self._from_request('fields')
+
+    def get_expand(self):
+        if self._requested_expand is not None:
+            return self._requested_expand
+        return self._from_request('expand') or set()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.get_expand()
+        for name, factory in self.expandable_fields.items():
+            if name in expand:
+                fields[name] = factory()
+
+        requested = self.get_requested_fields()
+        if requested:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        return fields
+
 class ProjectInvitationSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProjectInvitation
@@ -8,6 +64,15 @@ class ProjectInvitationSerializer(serializers.ModelSerializer):
         read_only_fields = ['token', 'created_at', 'used_by', 'used_at']
 
 
+class BulkInvitationSerializer(serializers.Serializer):
+    """Параметры пакетной выдачи приглашений (ProjectViewSet.invite_bulk)"""
+    MAX_COUNT = 500
+
+    count = serializers.IntegerField(min_value=1, max_value=MAX_COUNT)
+    expires_in_days = serializers.IntegerField(min_value=1, max_value=30, default=7)
+    is_single_use = serializers.BooleanField(default=True)
+
+
 class ProjectMembershipSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField()
 
@@ -16,15 +81,27 @@ class ProjectMembershipSerializer(serializers.ModelSerializer):
         fields = ['user', 'role', 'joined_at']
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     users = ProjectMembershipSerializer(source='projectmembership_set', many=True, read_only=True)
-    task_count = serializers.IntegerField(source='tasks.count', read_only=True)
+    task_count = serializers.IntegerField(source='total_tasks', read_only=True)
+    completed_task_count = serializers.IntegerField(source='completed_tasks', read_only=True)
+    completion_percentage = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Project
         fields = [
             'id', 'title', 'description', 'show_completed',
             'created_at', 'updated_at',
-            'users', 'task_count'
+            'users', 'task_count', 'completed_task_count', 'completion_percentage'
         ]
-        read_only_fields = ['created_at', 'updated_at', 'users', 'task_count']
\ No newline at end of file
+        read_only_fields = [
+            'created_at', 'updated_at', 'users',
+            'task_count', 'completed_task_count', 'completion_percentage'
+        ]
+
+    # Поля без списка участников — для вложения в другие ответы без доп. запросов
+    summary_fields = [
+        'id', 'title', 'description', 'show_completed',
+        'created_at', 'updated_at',
+        'task_count', 'completed_task_count', 'completion_percentage'
+    ]
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import events, roles, search
+from .models import Project, ProjectMembership
+
+
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+def membership_changed(sender, instance, origin=None, **kwargs):
+    """Инвалидирует закешированные роли пользователя и меняет версию проекта"""
+    roles.invalidate_user(instance.user_id)
+    if not isinstance(origin, Project):
+        Project.objects.filter(pk=instance.project_id).touch()
+        deleted = kwargs.get('signal') is post_delete
+        events.publish(instance.project_id, 'membership.deleted' if deleted else 'membership.saved', {
+            'user_id': instance.user_id,
+            'role': instance.role,
+        })
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Обновляет поисковый индекс и версию проекта"""
+    if not created and not raw:
+        Project.objects.filter(pk=instance.pk).touch()
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    search.index_objects(Project, [instance])
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    search.unindex_objects(Project, [instance.pk])
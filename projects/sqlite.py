@@ -0,0 +1,56 @@
+"""Профиль соединений SQLite (settings.SQLITE).
+
+PRAGMA из профиля выполняются при открытии каждого соединения: они действуют
+только на своё соединение, а с CONN_MAX_AGE одно соединение обслуживает
+много запросов. journal_mode=wal хранится в самом файле базы, для базы в
+памяти его не трогаем.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PROFILES = {
+    # Как есть: rollback journal, synchronous=FULL, таймаут драйвера
+    'default': {},
+    # Читатели не блокируют писателя (WAL); fsync только на чекпойнтах
+    'production': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # отрицательное значение — в КиБ
+        'temp_store': 'memory',
+    },
+}
+
+
+def pragmas():
+    options = getattr(settings, 'SQLITE', {})
+    profile = options.get('PROFILE', 'default')
+    if profile not in PROFILES:
+        raise ValueError(f'SQLITE["PROFILE"]: ожидается одно из {", ".join(PROFILES)}, а не {profile!r}')
+    return {**PROFILES[profile], **options.get('PRAGMAS', {})}
+
+
+@receiver(connection_created)
+def apply_profile(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    in_memory = connection.is_in_memory_db()
+    for name, value in pragmas().items():
+        if name == 'journal_mode' and in_memory:
+            continue
+        # Напрямую через драйвер: мимо execute_wrapper метрик и CaptureQueriesContext
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def current(connection, names=None):
+    """Текущие значения PRAGMA соединения (для проверки и отчётов)"""
+    connection.ensure_connection()
+    names = names or PROFILES['production']
+    values = {}
+    for name in names:
+        # Для базы в памяти часть PRAGMA (mmap_size) ничего не возвращает
+        row = connection.connection.execute(f'PRAGMA {name}').fetchone()
+        values[name] = row[0] if row else None
+    return values
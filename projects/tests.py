@@ -1,3 +1,1058 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, override_settings
 
 # Create your tests here.
+import json
+import re
+import tempfile
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.pagination import paginate_keyset
+from .models import Project, ProjectInvitation, ProjectMembership
+from jobs import queue
+from jobs.models import Job
+from . import checks, deletion, events, ids, oneshot, plans, roles, routers, search, sqlite
+from .cache import CountingFileBasedCache, cache_stats, reset_stats
+from .metrics import registry
+from .fragments import CSRF_PLACEHOLDER
+from .roles import RoleResolver
+from .views import ProjectDetail
+
+
+User = get_user_model()
+
+
+def make_project(user, title='Проект', role='owner', **kwargs):
+    project = Project.objects.create(title=title, **kwargs)
+    ProjectMembership.objects.create(project=project, user=user, role=role)
+    return project
+
+
+class ProjectStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.client.force_login(self.user)
+
+    def add_projects(self, count):
+        for i in range(count):
+            project = make_project(self.user, title=f'Проект {i}')
+            Task.objects.create(project=project, title='a', status='done')
+            Task.objects.create(project=project, title='b', status='in_progress')
+            Task.objects.create(project=project, title='c')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_with_stats_annotations(self):
+        self.add_projects(1)
+        make_project(self.user, title='Пустой')
+
+        projects = {p.title: p for p in Project.objects.with_stats()}
+        full, empty = projects['Проект 0'], projects['Пустой']
+        self.assertEqual((full.stats_total, full.stats_done, full.stats_in_progress), (3, 1, 1))
+        self.assertEqual(full.completion_percentage, 33.3)
+        self.assertEqual(empty.total_tasks, 0)
+        self.assertEqual(empty.completion_percentage, 0)
+
+    def test_index_query_count_is_constant(self):
+        url = reverse('projects:index')
+        self.add_projects(2)
+        few = self.count_queries(url)
+        self.add_projects(8)
+        many = self.count_queries(url)
+        self.assertEqual(few, many)
+
+    def test_api_list_query_count_is_constant(self):
+        url = '/api/projects/'
+        self.add_projects(2)
+        few = self.count_queries(url)
+        self.add_projects(8)
+        many = self.count_queries(url)
+        self.assertEqual(few, many)
+
+        data = self.client.get(url).json()['results'][0]
+        self.assertEqual(data['task_count'], 3)
+        self.assertEqual(data['completed_task_count'], 1)
+
+
+class ProjectDetailPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.client.force_login(self.user)
+        self.project = make_project(self.user)
+        Task.objects.bulk_create([Task(project=self.project, title=f'Задача {i}') for i in range(7)])
+        self.url = reverse('projects:project-detail', kwargs={'pk': self.project.pk})
+
+    def test_htmx_fragment_uses_cursor(self):
+        response = self.client.get(self.url, HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 200)
+        page = paginate_keyset(self.project.tasks.all(), None, ProjectDetail.paginate_tasks_by)
+        self.assertContains(response, f'?cursor={page.next_cursor}')
+
+        response = self.client.get(f'{self.url}?cursor={page.next_cursor}', HTTP_HX_REQUEST='true')
+        self.assertContains(response, 'id="task-', count=2)
+
+    def test_page_mode_and_bad_cursor(self):
+        self.assertContains(self.client.get(f'{self.url}?page=2'), 'id="task-', count=2)
+        self.assertContains(self.client.get(f'{self.url}?cursor=garbage'), 'id="task-', count=5)
+
+
+class RoleResolverTests(TestCase):
+    def setUp(self):
+        caches[settings.ROLES_CACHE_ALIAS].clear()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member', password='pass')
+        self.project = make_project(self.owner)
+        ProjectMembership.objects.create(project=self.project, user=self.member, role='member')
+
+    def test_memberships_loaded_once_and_cached(self):
+        resolver = RoleResolver(self.owner)
+        with self.assertNumQueries(1):
+            self.assertTrue(resolver.is_owner(self.project))
+            self.assertTrue(resolver.is_member(self.project))
+            self.assertEqual(resolver.role(self.project.pk), 'owner')
+
+        with self.assertNumQueries(0):
+            self.assertTrue(RoleResolver(self.owner).is_owner(self.project))
+
+    def test_invalidated_on_membership_change(self):
+        self.assertEqual(RoleResolver(self.member).role(self.project), 'member')
+
+        ProjectMembership.objects.filter(user=self.member).get().delete()
+        self.assertIsNone(RoleResolver(self.member).role(self.project))
+
+        other = make_project(self.member, title='Свой')
+        self.assertTrue(RoleResolver(self.member).is_owner(other))
+
+    def test_evicted_version_does_not_reset(self):
+        def evict():
+            for roles_cache in caches.all():
+                roles_cache.delete(roles._version_key(self.member.pk))
+
+        evict()
+        self.assertEqual(RoleResolver(self.member).role(self.project), 'member')
+        ProjectMembership.objects.filter(user=self.member).get().delete()
+        # Ключ версии вытеснен: новая версия не совпадает с закешированной раньше
+        evict()
+        self.assertIsNone(RoleResolver(self.member).role(self.project))
+
+    def test_version_bumped_again_after_commit(self):
+        roles_cache = caches[settings.ROLES_CACHE_ALIAS]
+        stale = RoleResolver(self.member).memberships()
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectMembership.objects.filter(user=self.member).get().delete()
+            # Параллельный запрос до коммита: старые членства под новой версией
+            version = roles_cache.get(roles._version_key(self.member.pk))
+            roles_cache.set(roles._data_key(self.member.pk, version), stale)
+            self.assertEqual(RoleResolver(self.member).role(self.project), 'member')
+        self.assertIsNone(RoleResolver(self.member).role(self.project))
+
+    def test_queryset_update_invalidates(self):
+        self.assertEqual(RoleResolver(self.member).role(self.project), 'member')
+        version = Project.objects.get(pk=self.project.pk).version
+        ProjectMembership.objects.filter(user=self.member).update(role='owner')
+        self.assertEqual(RoleResolver(self.member).role(self.project), 'owner')
+        self.assertEqual(Project.objects.get(pk=self.project.pk).version, version + 1)
+
+    def test_invalidation_shared_through_file_cache(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES={
+            **settings.CACHES,
+            'roles': {'BACKEND': 'projects.cache.CountingFileBasedCache', 'LOCATION': directory},
+        }):
+            self.assertEqual(checks.check_roles_cache(None), [])
+            self.assertEqual(RoleResolver(self.member).role(self.project), 'member')
+            ProjectMembership.objects.filter(user=self.member).get().delete()
+            # Кеш другого процесса: отдельный экземпляр бэкенда на том же каталоге
+            other = CountingFileBasedCache(directory, {})
+            version = other.get(roles._version_key(self.member.pk))
+            self.assertIsNone(other.get(roles._data_key(self.member.pk, version)))
+        self.assertEqual([warning.id for warning in checks.check_roles_cache(None)], ['projects.W001'])
+
+    def test_detail_page_single_membership_lookup(self):
+        self.client.force_login(self.owner)
+        url = reverse('projects:project-detail', kwargs={'pk': self.project.pk})
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        lookups = [
+            q['sql'] for q in ctx.captured_queries
+            if re.search(r'FROM "projects_projectmembership" WHERE .*"user_id" = \d', q['sql'])
+        ]
+        self.assertEqual(len(lookups), 1)
+
+    def test_only_owner_can_update(self):
+        self.client.force_login(self.member)
+        url = reverse('projects:project-update', kwargs={'pk': self.project.pk})
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_api_my_role(self):
+        self.client.force_login(self.member)
+        data = self.client.get(f'/api/projects/{self.project.pk}/my-role/').json()
+        self.assertEqual(data['role'], 'member')
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.client.force_login(self.user)
+        self.project = make_project(self.user)
+        Task.objects.bulk_create([Task(project=self.project, title=f'Задача {i}') for i in range(1200)])
+        other = make_project(User.objects.create_user('other'), title='Чужой')
+        Task.objects.create(project=other, title='Чужая')
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_tasks_csv(self):
+        content = self.read(self.client.get('/api/export/tasks.csv'))
+        lines = content.lstrip('\ufeff').splitlines()
+        self.assertEqual(lines[0].split(';')[:3], ['id', 'project', 'title'])
+        self.assertEqual(len(lines), 1201)
+        self.assertNotIn('Чужая', content)
+
+    def test_memberships_ndjson(self):
+        content = self.read(self.client.get('/api/export/memberships.ndjson'))
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['role'], 'owner')
+
+    def test_unknown_kind(self):
+        self.assertEqual(self.client.get('/api/export/users.csv').status_code, 404)
+
+    def test_admin_action(self):
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        response = self.client.post('/admin/projects/project/', {
+            'action': 'export_as_csv',
+            '_selected_action': [str(self.project.pk)],
+        })
+        self.assertIn('Проект', self.read(response))
+
+
+class FullTextSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.client.force_login(self.user)
+        self.report = make_project(self.user, title='Квартальный отчёт', description='бюджет')
+        self.other = make_project(self.user, title='Дизайн', description='макеты отчётов')
+        make_project(self.user, title='Релиз')
+        self.task = Task.objects.create(project=self.other, title='Согласовать бюджет')
+
+    def titles(self, url):
+        return [item['title'] for item in self.client.get(url).json()['results']]
+
+    def test_ranked_prefix_search(self):
+        self.assertTrue(search.fts_available())
+        self.assertEqual(self.titles('/api/projects/?search=квартал'), ['Квартальный отчёт'])
+        self.assertEqual(
+            set(self.titles('/api/projects/?search=отч')), {'Квартальный отчёт', 'Дизайн'}
+        )
+        self.assertEqual(self.titles('/api/tasks/?search=бюдж'), ['Согласовать бюджет'])
+
+    def test_index_follows_changes(self):
+        self.report.title = 'Годовой план'
+        self.report.save()
+        self.assertEqual(self.titles('/api/projects/?search=годовой'), ['Годовой план'])
+
+        Task.objects.filter(pk=self.task.pk).update(title='Созвон')
+        self.assertEqual(self.titles('/api/tasks/?search=созвон'), ['Созвон'])
+
+        self.task.delete()
+        self.assertEqual(self.titles('/api/tasks/?search=созвон'), [])
+
+    def test_ranking_scoped_to_user(self):
+        # Чужие, более релевантные совпадения не вытесняют свои
+        stranger = make_project(User.objects.create_user('stranger'))
+        Task.objects.bulk_create([Task(project=stranger, title='бюджет бюджет бюджет') for _ in range(3)])
+        mine = Task.objects.create(project=self.other, title='Бюджет на квартал', description='бюджет')
+        self.assertEqual(self.titles('/api/tasks/?search=бюджет'), [mine.title, self.task.title])
+
+    def test_admin_search(self):
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        response = self.client.get('/admin/tasks/task/', {'q': 'бюдж'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.task])
+
+    def test_rows_keyed_by_rowid(self):
+        def rows():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT f.rowid, f.obj_id, i.obj_id FROM tasks_task_fts f '
+                               'LEFT JOIN tasks_task_fts_ids i ON i.id = f.rowid ORDER BY f.rowid')
+                return cursor.fetchall()
+
+        second = Task.objects.create(project=self.other, title='Второй бюджет')
+        self.task.title = 'Созвон'
+        self.task.save()
+        Task.objects.filter(pk=second.pk).update(title='Третий')
+        self.assertEqual(sorted(row[1] for row in rows()), sorted([self.task.pk.hex, second.pk.hex]))
+        self.assertTrue(all(row[1] == row[2] for row in rows()))
+
+        second.delete()
+        self.assertEqual([row[1] for row in rows()], [self.task.pk.hex])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT obj_id FROM tasks_task_fts_ids')
+            self.assertEqual(cursor.fetchall(), [(self.task.pk.hex,)])
+
+    def test_fallback_without_fts(self):
+        with mock.patch.object(search, 'fts_available', return_value=False):
+            self.assertEqual(
+                set(self.titles('/api/projects/?search=отч')), {'Квартальный отчёт', 'Дизайн'}
+            )
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM projects_project_fts')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.titles('/api/projects/?search=релиз'), ['Релиз'])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.client.force_login(self.user)
+        self.project = make_project(self.user)
+        self.url = reverse('projects:project-detail', kwargs={'pk': self.project.pk})
+        # Первый ответ выставляет CSRF-cookie, которая входит в ETag
+        self.client.get(self.url)
+
+    def revalidate(self, url, response, **headers):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **headers)
+
+    def test_detail_not_modified_until_change(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+
+        with self.assertNumQueries(3):  # сессия, пользователь, версия проекта
+            self.assertEqual(self.revalidate(self.url, first).status_code, 304)
+
+        # HTMX-фрагмент — отдельное представление со своим ETag
+        self.assertEqual(self.revalidate(self.url, first, HTTP_HX_REQUEST='true').status_code, 200)
+
+        task = Task.objects.create(project=self.project, title='Новая')
+        second = self.revalidate(self.url, first)
+        self.assertEqual(second.status_code, 200)
+
+        task.title = 'Переименована'
+        task.save()
+        self.assertEqual(self.revalidate(self.url, second).status_code, 200)
+
+    def test_membership_change_invalidates(self):
+        first = self.client.get(self.url)
+        ProjectMembership.objects.create(
+            project=self.project, user=User.objects.create_user('new'), role='member'
+        )
+        self.assertEqual(self.revalidate(self.url, first).status_code, 200)
+
+    def test_pending_invite_url_is_never_cached(self):
+        first = self.client.get(self.url)
+        self.client.cookies.update(oneshot.send(HttpResponse(), 'new_invite_url', 'http://testserver/x/').cookies)
+        self.assertEqual(self.revalidate(self.url, first).status_code, 200)
+
+    def test_index_and_api(self):
+        index = reverse('projects:index')
+        first = self.client.get(index)
+        self.assertEqual(self.revalidate(index, first).status_code, 304)
+        make_project(self.user, title='Второй')
+        self.assertEqual(self.revalidate(index, first).status_code, 200)
+
+        for url in (f'/api/projects/{self.project.pk}/', '/api/tasks/',
+                    f'/api/projects/{self.project.pk}/tasks/'):
+            first = self.client.get(url)
+            self.assertEqual(self.revalidate(url, first).status_code, 304, url)
+
+        task = Task.objects.create(project=self.project, title='Новая')
+        url = f'/api/tasks/{task.pk}/'
+        first = self.client.get(url)
+        self.assertEqual(self.revalidate(url, first).status_code, 304)
+        Task.objects.filter(pk=task.pk).update(status='done')
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_task_validators_unordered(self):
+        task = Task.objects.create(project=self.project, title='Новая')
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(f'/api/tasks/{task.pk}/')
+        lookup, = [query['sql'] for query in captured.captured_queries if '"changed_at"' in query['sql']]
+        self.assertNotIn('ORDER BY', lookup)
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        reset_stats()
+        self.user = User.objects.create_user('owner', password='pass')
+        self.client.force_login(self.user)
+        self.project = make_project(self.user)
+        Task.objects.create(project=self.project, title='Первая')
+        self.url = reverse('projects:project-detail', kwargs={'pk': self.project.pk})
+
+    def task_queries(self, **headers):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response, [q for q in ctx.captured_queries if 'FROM "tasks_task"' in q['sql']]
+
+    def test_fragment_cached_until_project_changes(self):
+        _, queries = self.task_queries(HTTP_HX_REQUEST='true')
+        self.assertEqual(len(queries), 1)
+        response, queries = self.task_queries(HTTP_HX_REQUEST='true')
+        self.assertEqual(queries, [])
+        self.assertContains(response, 'Первая')
+
+        Task.objects.create(project=self.project, title='Вторая')
+        response, queries = self.task_queries(HTTP_HX_REQUEST='true')
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, 'Вторая')
+
+        stats = cache_stats()['fragments']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_csrf_token_is_not_shared(self):
+        self.client.get(self.url, HTTP_HX_REQUEST='true')
+        other = User.objects.create_user('member', password='pass')
+        ProjectMembership.objects.create(project=self.project, user=other, role='owner')
+
+        self.client.force_login(other)
+        response = self.client.get(self.url)
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+    def test_file_backend(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            caches_setting = {
+                **settings.CACHES,
+                'fragments': {'BACKEND': 'projects.cache.CountingFileBasedCache', 'LOCATION': tmp},
+            }
+            with self.settings(CACHES=caches_setting):
+                self.task_queries(HTTP_HX_REQUEST='true')
+                _, queries = self.task_queries(HTTP_HX_REQUEST='true')
+                self.assertEqual(queries, [])
+                self.assertEqual(cache_stats()['fragments']['hits'], 1)
+
+    def test_stats_endpoint_requires_staff(self):
+        self.assertEqual(self.client.get('/api/cache-stats/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertIn('fragments', self.client.get('/api/cache-stats/').json())
+
+
+class ProjectEventsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.project = make_project(self.user)
+        self.url = reverse('projects:project-events', args=[self.project.pk])
+        self.broker = events.Broker(events.MemoryBackend(buffer_size=3))
+        patcher = mock.patch.object(events, '_broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_ring_buffer_resume(self):
+        published = [self.broker.publish(self.project.pk, 'task.saved', {'n': n}) for n in range(5)]
+        missed, gap = self.broker.backlog(self.project.pk, published[2].id)
+        self.assertEqual([event.data['n'] for event in missed], [3, 4])
+        self.assertFalse(gap)
+
+        missed, gap = self.broker.backlog(self.project.pk, published[0].id)
+        self.assertEqual([event.data['n'] for event in missed], [2, 3, 4])
+        self.assertTrue(gap)
+
+        self.assertEqual(self.broker.parse_event_id(f'{self.broker.epoch}-7'), (7, True))
+        self.assertEqual(self.broker.parse_event_id('other-7'), (None, False))
+
+    def test_file_backend_compacts_log(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = events.FileBackend(buffer_size=3, directory=tmp)
+            for n in range(7):
+                backend.append(self.project.pk, 'task.saved', {'n': n})
+            stored, offset, inode = backend.read(self.project.pk)
+            self.assertEqual([event.id for event in stored], [4, 5, 6, 7])
+
+            missed, gap = backend.since(self.project.pk, 5)
+            self.assertEqual([event.id for event in missed], [6, 7])
+            self.assertFalse(gap)
+            self.assertTrue(backend.since(self.project.pk, 1)[1])
+
+            backend.append(self.project.pk, 'task.deleted', {})
+            fresh, _, _ = backend.read(self.project.pk, offset, inode)
+            self.assertEqual([(event.id, event.type) for event in fresh], [(8, 'task.deleted')])
+
+    def test_changes_are_published_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(project=self.project, title='a')
+            self.assertEqual(self.broker.backlog(self.project.pk, 0)[0], [])
+        task.status = 'done'
+        with self.captureOnCommitCallbacks(execute=True):
+            task.save()
+            Task.objects.filter(pk=task.pk).delete()
+            ProjectMembership.objects.create(
+                project=self.project, user=User.objects.create_user('guest'), role='member'
+            )
+        types = [event.type for event in self.broker.backlog(self.project.pk, 0)[0]]
+        self.assertEqual(types, ['task.saved', 'tasks.changed', 'membership.saved'])
+
+    def test_wsgi_requests_are_refused(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(self.url).status_code, 204)
+
+    async def test_access(self):
+        self.assertEqual((await self.async_client.get(self.url)).status_code, 401)
+        stranger = await User.objects.acreate(username='stranger')
+        await self.async_client.aforce_login(stranger)
+        self.assertEqual((await self.async_client.get(self.url)).status_code, 404)
+
+    async def test_stream_resumes_and_pushes_live(self):
+        await self.async_client.aforce_login(self.user)
+        first = self.broker.publish(self.project.pk, 'task.saved', {'id': 'a'})
+        self.broker.publish(self.project.pk, 'task.saved', {'id': 'b'})
+
+        response = await self.async_client.get(
+            self.url, headers={'Last-Event-ID': f'{self.broker.epoch}-{first.id}'}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+        self.assertIn(b'"id": "b"', await anext(stream))
+
+        self.broker.publish(self.project.pk, 'task.deleted', {'id': 'c'})
+        frame = await anext(stream)
+        self.assertIn(b'event: task.deleted', frame)
+        self.assertIn(f'id: {self.broker.epoch}-'.encode(), frame)
+        await stream.aclose()
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        make_project(self.user)
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def test_request_is_measured(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('projects:index'))
+        self.assertRegex(response['Server-Timing'], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$')
+
+        self.user.is_staff = True
+        self.user.save()
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('todo_http_requests_total{view="projects:index",method="GET",status="200"} 1', body)
+        self.assertIn('todo_db_queries_per_request_count{view="projects:index"} 1', body)
+        self.assertIn('todo_cache_requests_total{cache="default",result="hit"}', body)
+        # Сам /metrics не учитывается
+        self.assertNotIn('view="metrics"', body)
+
+    def test_duplicate_fingerprints(self):
+        sql = 'SELECT "x" FROM "t" WHERE "id" = %s'
+        registry.record('demo', 'GET', 200, 0.01, 0.005, 4, 100, {sql: 3})
+        body = registry.render()
+        self.assertRegex(body, r'todo_duplicate_queries_total\{view="demo",fingerprint="\w{12}"\} 2')
+        self.assertIn('sql="SELECT \\"x\\" FROM \\"t\\" WHERE \\"id\\" = %s"} 1', body)
+        self.assertIn('todo_http_response_size_bytes_bucket{view="demo",le="1000"} 1', body)
+
+    def test_access(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with override_settings(METRICS={**settings.METRICS, 'TOKEN': 'secret'}):
+            self.client.logout()
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+
+class FakeDataAndBenchmarkTests(TestCase):
+    def generate(self):
+        call_command('generate_fake_data', users=5, projects=3, tasks=200, invitations=1,
+                     seed=1, batch_size=50, stdout=StringIO())
+
+    def test_generate_fake_data(self):
+        self.generate()
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Project.objects.count(), 3)
+        self.assertEqual(ProjectInvitation.objects.count(), 3)
+        self.assertEqual(ProjectMembership.objects.filter(role='owner').count(), 3)
+        self.assertEqual(Task.objects.count(), 200)
+        self.assertEqual(sum(project.total_tasks for project in Project.objects.all()), 200)
+        # Даты растянуты во времени, а auto_now_add после команды снова работает
+        self.assertGreater(Task.objects.values('created_at').distinct().count(), 100)
+        self.assertTrue(Task._meta.get_field('created_at').auto_now_add)
+        self.assertEqual(len(search.ranked_ids(Task, Task.objects.first().title.split()[0])) > 0,
+                         search.fts_available())
+
+    def test_benchmark_budgets(self):
+        self.generate()
+        with tempfile.TemporaryDirectory() as tmp:
+            budgets = f'{tmp}/budgets.json'
+            output = f'{tmp}/results.json'
+            with open(budgets, 'w') as fh:
+                json.dump({'current': {'index': {'queries': 50}}}, fh)
+            call_command('benchmark_views', current_db=True, repeat=2, budgets=budgets,
+                         output=output, stdout=StringIO())
+            with open(output) as fh:
+                results = json.load(fh)['current']
+            self.assertEqual(set(results['project_detail']), {'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'queries', 'samples'})
+            self.assertIn('cleanup_old_tasks', results)
+
+            with open(budgets, 'w') as fh:
+                json.dump({'current': {'index': {'queries': 1}}}, fh)
+            with self.assertRaisesMessage(CommandError, 'current/index: queries'):
+                call_command('benchmark_views', current_db=True, repeat=1, budgets=budgets, stdout=StringIO())
+
+
+class ProjectHistoryTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(title='Проект')
+        self.History = Project.history.model
+
+    def test_noop_saves_are_skipped(self):
+        self.assertEqual(self.project.history.count(), 1)
+        self.project.save()
+        fresh = Project.objects.get(pk=self.project.pk)
+        with CaptureQueriesContext(connection) as captured:
+            fresh.save()
+        # Ни чтения последней строки истории, ни вставки
+        self.assertFalse([q for q in captured if 'historicalproject' in q['sql']])
+        self.assertEqual(self.project.history.count(), 1)
+
+        fresh.title = 'Новое название'
+        fresh.save()
+        self.assertEqual(self.project.history.count(), 2)
+
+        # Отложенные поля: сравнение с последней строкой истории
+        Project.objects.defer('description').get(pk=self.project.pk).save()
+        self.assertEqual(self.project.history.count(), 2)
+
+    def add_rows(self, days_ago, count, history_type='~'):
+        moment = timezone.localtime(timezone.now() - timedelta(days=days_ago)).replace(hour=12)
+        for i in range(count):
+            self.History.objects.create(
+                id=self.project.pk, title=f'{days_ago}-{i}', show_completed=True,
+                created_at=moment, updated_at=moment,
+                history_date=moment + timedelta(minutes=i), history_type=history_type,
+            )
+
+    def compact(self, *args):
+        out = StringIO()
+        call_command('compact_project_history', *args, stdout=out)
+        return out.getvalue()
+
+    def test_compaction_keeps_daily_snapshots(self):
+        self.History.objects.all().delete()
+        self.add_rows(100, 1, history_type='+')
+        self.add_rows(60, 3)
+        self.add_rows(59, 2)
+        self.add_rows(5, 4)
+
+        self.assertIn('Будет удалено 3 строк', self.compact('--dry-run'))
+        self.assertEqual(self.History.objects.count(), 10)
+
+        self.compact('--keep-days', '30', '--batch-size', '2')
+        titles = set(self.History.objects.values_list('title', flat=True))
+        self.assertEqual(titles, {'100-0', '60-2', '59-1', '5-0', '5-1', '5-2', '5-3'})
+
+    def test_weekly_granularity(self):
+        self.History.objects.all().delete()
+        self.add_rows(70, 3)
+        self.compact('--granularity', 'week')
+        self.assertEqual(list(self.History.objects.values_list('title', flat=True)), ['70-2'])
+
+
+class AsyncProjectApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.projects = [make_project(self.user, title=f'Проект {i}') for i in range(3)]
+        Task.objects.create(project=self.projects[0], title='a', status='done')
+        make_project(User.objects.create_user('stranger'), title='Чужой')
+        self.client.force_login(self.user)
+
+    async def test_matches_sync_viewset(self):
+        await self.async_client.aforce_login(self.user)
+        for sync_url, async_url in (
+            ('/api/projects/', '/api/async/projects/'),
+            ('/api/projects/?fields=id,task_count', '/api/async/projects/?fields=id,task_count'),
+            (f'/api/projects/{self.projects[0].pk}/', f'/api/async/projects/{self.projects[0].pk}/'),
+        ):
+            expected = (await sync_to_async(self.client.get)(sync_url)).json()
+            response = await self.async_client.get(async_url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), expected)
+
+    async def test_access(self):
+        self.assertEqual((await self.async_client.get('/api/async/projects/')).status_code, 403)
+        await self.async_client.aforce_login(self.user)
+        stranger_project = await Project.objects.aget(title='Чужой')
+        response = await self.async_client.get(f'/api/async/projects/{stranger_project.pk}/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual((await self.async_client.get('/api/async/projects/?page=9')).status_code, 404)
+
+
+class SqliteProfileTests(TestCase):
+    def open_connection(self):
+        new_connection = connections.create_connection('default')
+        self.addCleanup(new_connection.close)
+        return sqlite.current(new_connection)
+
+    @override_settings(SQLITE={'PROFILE': 'production', 'PRAGMAS': {'cache_size': -1000}})
+    def test_production_profile_applied_on_connect(self):
+        values = self.open_connection()
+        self.assertEqual(values['synchronous'], 1)
+        self.assertEqual(values['busy_timeout'], 5000)
+        self.assertEqual(values['temp_store'], 2)
+        # PRAGMAS переопределяет профиль
+        self.assertEqual(values['cache_size'], -1000)
+
+    @override_settings(SQLITE={'PROFILE': 'default'})
+    def test_default_profile_keeps_sqlite_defaults(self):
+        self.assertEqual(self.open_connection()['synchronous'], 2)
+
+    def test_unknown_profile(self):
+        with override_settings(SQLITE={'PROFILE': 'fast'}), self.assertRaises(ValueError):
+            self.open_connection()
+
+    def test_persistent_connections(self):
+        self.assertTrue(connection.settings_dict['CONN_HEALTH_CHECKS'])
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+ROUTING = {'REPLICAS': ['replica1'], 'PIN_SECONDS': 5, 'PIN_COOKIE': 'db_pin'}
+
+
+@override_settings(DB_ROUTING=ROUTING)
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.PrimaryReplicaRouter()
+
+    def test_reads_go_to_replica_writes_to_primary(self):
+        token = routers._state.set(routers.RoutingState())
+        self.assertEqual(self.router.db_for_read(Project), 'replica1')
+        self.assertEqual(self.router.db_for_write(Project), 'default')
+        routers._state.reset(token)
+        self.assertFalse(self.router.allow_migrate('replica1', 'projects'))
+
+    def test_primary_outside_requests(self):
+        # Команды и воркеры: чтение сразу перед записью производных данных
+        self.assertEqual(self.router.db_for_read(Project), 'default')
+
+    def test_primary_when_forced_pinned_or_after_write(self):
+        with routers.use_primary():
+            self.assertEqual(self.router.db_for_read(Project), 'default')
+
+        token = routers._state.set(routers.RoutingState(pinned=True))
+        self.assertEqual(self.router.db_for_read(Project), 'default')
+        routers._state.reset(token)
+
+        state = routers.RoutingState()
+        token = routers._state.set(state)
+        self.assertEqual(self.router.db_for_read(Project), 'replica1')
+        self.router.db_for_write(Project)
+        self.assertEqual(self.router.db_for_read(Project), 'default')
+        routers._state.reset(token)
+
+    @override_settings(DB_ROUTING={'REPLICAS': []})
+    def test_no_replicas(self):
+        self.assertEqual(self.router.db_for_read(Project), 'default')
+
+
+@override_settings(DB_ROUTING=ROUTING)
+class PrimaryPinMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.client.force_login(self.user)
+
+    def test_write_pins_browser_to_primary(self):
+        response = self.client.get(reverse('projects:index'))
+        self.assertNotIn('db_pin', response.cookies)
+
+        response = self.client.post(reverse('projects:project-create'), {'title': 'Новый'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.cookies['db_pin']['max-age'], 5)
+
+
+class InvitationTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.guest = User.objects.create_user('guest', password='pass')
+        self.project = make_project(self.owner)
+        self.invitation = ProjectInvitation.objects.create(
+            project=self.project, created_by=self.owner,
+            expires_at=timezone.now() + timedelta(days=7),
+        )
+
+    def test_single_use_claimed_once(self):
+        other = User.objects.create_user('other')
+        self.assertEqual(self.invitation.accept(self.guest), ProjectInvitation.JOINED)
+        # Второй клик по той же ссылке с устаревшим объектом в памяти
+        stale = ProjectInvitation.objects.get(pk=self.invitation.pk)
+        stale.used_by = None
+        self.assertEqual(stale.accept(other), ProjectInvitation.INVALID)
+        self.assertEqual(stale.accept(self.guest), ProjectInvitation.ALREADY_MEMBER)
+
+        self.invitation.refresh_from_db()
+        self.assertEqual(self.invitation.used_by, self.guest)
+        self.assertFalse(ProjectMembership.objects.filter(user=other).exists())
+
+    def test_member_does_not_spend_invitation(self):
+        self.assertEqual(self.invitation.accept(self.owner), ProjectInvitation.ALREADY_MEMBER)
+        self.invitation.refresh_from_db()
+        self.assertIsNone(self.invitation.used_by)
+
+    def test_accept_view(self):
+        self.client.force_login(self.guest)
+        url = reverse('projects:accept-invitation', args=[self.invitation.token])
+        response = self.client.get(url)
+        self.assertRedirects(response, reverse('projects:project-detail', args=[self.project.pk]))
+        self.assertTrue(ProjectMembership.objects.filter(project=self.project, user=self.guest).exists())
+
+    def test_bulk_invitations(self):
+        url = f'/api/projects/{self.project.pk}/invite-bulk/'
+        self.client.force_login(self.owner)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(url, {'count': 300}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        # Пакетные INSERT (SQLite ограничивает число параметров), а не 300 запросов
+        self.assertLess(len(captured), 10)
+        tokens = {item['token'] for item in response.json()['invitations']}
+        self.assertEqual(len(tokens), 300)
+        self.assertEqual(ProjectInvitation.objects.filter(token__in=tokens).count(), 300)
+
+        self.assertEqual(self.client.post(url, {'count': 5000}, content_type='application/json').status_code, 400)
+        self.client.force_login(self.guest)
+        self.assertEqual(self.client.post(url, {'count': 1}, content_type='application/json').status_code, 404)
+
+    def test_purge(self):
+        now = timezone.now()
+        ProjectInvitation.objects.create(project=self.project, created_by=self.owner,
+                                         expires_at=now - timedelta(days=1))
+        ProjectInvitation.objects.create(project=self.project, created_by=self.owner,
+                                         used_by=self.guest, used_at=now - timedelta(days=40))
+        ProjectInvitation.objects.create(project=self.project, created_by=self.owner, is_single_use=False,
+                                         used_by=self.guest, used_at=now - timedelta(days=40))
+        out = StringIO()
+        call_command('purge_invitations', batch_size=1, stdout=out)
+        self.assertIn('Удалено 2', out.getvalue())
+        self.assertEqual(ProjectInvitation.objects.count(), 2)
+
+
+class BackgroundDeletionTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member', password='pass')
+        self.project = make_project(self.owner)
+        ProjectMembership.objects.create(project=self.project, user=self.member, role='member')
+        Task.objects.bulk_create([Task(project=self.project, title=f'Задача {i}') for i in range(7)])
+        ProjectInvitation.objects.create(project=self.project, created_by=self.owner)
+
+    def test_project_delete_queues_job(self):
+        self.client.force_login(self.owner)
+        response = self.client.post(reverse('projects:project-delete', args=[self.project.pk]))
+        self.assertRedirects(response, reverse('projects:index'), fetch_redirect_response=False)
+        self.assertTrue(Project.objects.filter(pk=self.project.pk).exists())
+
+        job = Job.objects.get(name='projects.delete_project')
+        self.assertEqual(job.payload, {'project_id': str(self.project.pk)})
+        job = queue.run_next()
+        self.assertEqual(job.status, Job.Status.DONE)
+        self.assertEqual(job.progress['stage'], 'done')
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(ProjectInvitation.objects.exists())
+        self.assertFalse(RoleResolver(self.member).is_member(self.project))
+        if search.fts_available():
+            self.assertEqual(search.ranked_ids(Task, 'Задача'), [])
+
+    def test_batches_and_progress(self):
+        reports = []
+        self.assertTrue(deletion.delete_project(self.project.pk, batch_size=3, progress=lambda **p: reports.append(p)))
+        self.assertIn({'stage': 'tasks', 'done': 6}, reports)
+        self.assertIn({'stage': 'tasks', 'done': 7}, reports)
+        self.assertFalse(deletion.delete_project(self.project.pk))
+
+    def test_delete_user(self):
+        other = make_project(User.objects.create_user('other'))
+        ProjectMembership.objects.create(project=other, user=self.owner, role='member')
+        authored = Task.objects.create(project=other, title='Чужая', author=self.owner)
+
+        self.assertTrue(deletion.delete_user(self.owner.pk, batch_size=2))
+        self.assertFalse(User.objects.filter(pk=self.owner.pk).exists())
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        authored.refresh_from_db()
+        self.assertIsNone(authored.author)
+
+    def test_user_delete_view_queues_job(self):
+        admin = User.objects.create_superuser('admin', password='pass')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('user-delete', args=[self.owner.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(User.objects.filter(pk=self.owner.pk).exists())
+        self.assertEqual(Job.objects.get().payload, {'user_id': self.owner.pk})
+
+
+
+class Uuid7KeyTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+
+    def test_uuid7_is_ordered(self):
+        keys = [ids.uuid7() for _ in range(5000)]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+        self.assertEqual({key.version for key in keys}, {7})
+        self.assertEqual(ids.timestamp_ms(ids.uuid7(1_700_000_000_000)), 1_700_000_000_000)
+        self.assertIsNone(ids.timestamp_ms(uuid.uuid4()))
+
+    def test_new_projects_get_v7_keys(self):
+        project = make_project(self.owner)
+        self.assertEqual(project.pk.version, 7)
+        self.assertEqual(ProjectInvitation.objects.create(project=project, created_by=self.owner).token.version, 4)
+
+    def test_rekey_batches_with_equal_created_at(self):
+        project = make_project(self.owner)
+        Task.objects.bulk_create([Task(project=project, pk=uuid.uuid4(), title=f'Задача {i}') for i in range(5)])
+        Task.objects.update(created_at=timezone.now())
+        call_command('rekey_uuid7', batch_size=2, stdout=StringIO())
+        self.assertEqual({task.pk.version for task in Task.objects.all()}, {7})
+        self.assertEqual(Task.objects.count(), 5)
+
+    def test_rekey_keeps_references(self):
+        project = make_project(self.owner, pk=uuid.uuid4())
+        old_pk = project.pk
+        project.title = 'Новое название'
+        project.save()
+        Task.objects.create(project=project, pk=uuid.uuid4(), title='Старая задача')
+        invitation = ProjectInvitation.objects.create(project=project, created_by=self.owner)
+        self.assertTrue(RoleResolver(self.owner).is_owner(project))
+
+        out = StringIO()
+        call_command('rekey_uuid7', models='task,project', batch_size=1, stdout=out)
+        self.assertIn('project: готово, перевыпущено ключей: 1', out.getvalue())
+
+        project = Project.objects.get()
+        self.assertEqual(project.pk.version, 7)
+        self.assertNotEqual(project.pk, old_pk)
+        self.assertEqual(Task.objects.get().project_id, project.pk)
+        self.assertEqual(Task.objects.get().pk.version, 7)
+        self.assertEqual(ProjectInvitation.objects.get(pk=invitation.pk).project_id, project.pk)
+        self.assertEqual(ProjectMembership.objects.get().project_id, project.pk)
+        self.assertEqual(project.history.count(), 2)
+        self.assertTrue(RoleResolver(self.owner).is_owner(project))
+        if search.fts_available():
+            self.assertEqual(search.ranked_ids(Task, 'Старая'), [Task.objects.get().pk.hex])
+
+        out = StringIO()
+        call_command('rekey_uuid7', models='task,project', dry_run=True, stdout=out)
+        self.assertIn('task: ключей v4 — 0', out.getvalue())
+
+
+class QueryPlanTests(plans.QueryPlanAssertions, TestCase):
+    def test_hot_querysets_match_baseline(self):
+        self.assertQueryPlansMatchBaseline()
+
+    def test_sort_flagged_with_index_hint(self):
+        queryset = ProjectInvitation.objects.filter(is_single_use=True, used_by=None).order_by('created_at')
+        problems = plans.issues(plans.explain(queryset))
+        self.assertEqual(problems, ['TEMP B-TREE ORDER BY'])
+        self.assertEqual(plans.issues([(0, 'SCAN tasks_task'), (0, 'SCAN auth_user USING INDEX x')]),
+                         ['SCAN tasks_task'])
+        self.assertEqual(plans.suggest(queryset, problems), [
+            "ProjectInvitation: models.Index(fields=['used_by', 'created_at'], condition=Q(is_single_use=True))"
+            "  # частичный"
+        ])
+
+    def test_regression_fails_check(self):
+        baseline = plans.load_baseline()
+        baseline['tasks.api.list']['issues'] = []
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as file:
+            json.dump(baseline, file)
+            file.flush()
+            with self.assertRaisesMessage(CommandError, 'tasks.api.list: regressed TEMP B-TREE ORDER BY'):
+                call_command('check_query_plans', current_db=True, baseline=file.name, stdout=StringIO())
+            del baseline['tasks.cleanup']
+            json.dump(baseline, open(file.name, 'w'))
+            with self.assertRaisesMessage(CommandError, 'tasks.cleanup: new'):
+                call_command('check_query_plans', current_db=True, only='tasks.cleanup', baseline=file.name,
+                             stdout=StringIO())
+
+
+class SessionWriteTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.project = make_project(self.owner)
+        self.url = reverse('projects:project-detail', args=[self.project.pk])
+
+    def session_writes(self, captured):
+        return [query['sql'] for query in captured.captured_queries
+                if 'django_session' in query['sql'] and not query['sql'].startswith('SELECT')]
+
+    def test_invite_url_shown_once_without_session_writes(self):
+        self.client.force_login(self.owner)
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(self.url)
+            response = self.client.post(reverse('projects:create-invitation', args=[self.project.pk]))
+            self.assertIn('once_new_invite_url', response.cookies)
+            response = self.client.get(self.url)
+            self.assertContains(response, 'id="invite-message"')
+            self.assertEqual(response.cookies['once_new_invite_url'].value, '')
+            self.assertNotContains(self.client.get(self.url), 'id="invite-message"')
+        self.assertEqual(self.session_writes(captured), [])
+
+    def test_tampered_invite_cookie_ignored(self):
+        self.client.force_login(self.owner)
+        self.client.cookies['once_new_invite_url'] = 'https://evil.example/'
+        self.assertNotContains(self.client.get(self.url), 'evil.example')
+
+    def test_anonymous_invitation_creates_no_session(self):
+        invitation = ProjectInvitation.objects.create(project=self.project, created_by=self.owner)
+        url = reverse('projects:accept-invitation', args=[invitation.token])
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertRedirects(response, f'{settings.LOGIN_URL}?next={url}', fetch_redirect_response=False)
+        self.assertEqual(self.session_writes(captured), [])
+
+    @override_settings(SESSION_ENGINE=settings.SESSION_ENGINES['cache'])
+    def test_cache_engine_needs_shared_cache(self):
+        self.assertEqual([error.id for error in checks.check_session_cache(None)], ['projects.E001'])
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES={
+            **settings.CACHES,
+            'sessions': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory},
+        }):
+            self.assertEqual(checks.check_session_cache(None), [])
+            self.client.force_login(self.owner)
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(self.client.get(self.url).status_code, 200)
+            self.assertFalse([query for query in captured.captured_queries if 'django_session' in query['sql']])
+
+    def test_sessions_survive_default_cache_culling(self):
+        with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES['cached_db']):
+            self.client.force_login(self.owner)
+            for i in range(settings.CACHES['default']['OPTIONS']['MAX_ENTRIES'] * 2):
+                cache.set(f'filler:{i}', i)
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(self.client.get(self.url).status_code, 200)
+            self.assertEqual(self.session_writes(captured), [])
+            self.assertFalse([query for query in captured.captured_queries if 'django_session' in query['sql']])
+
+    @override_settings(SESSION_ENGINE=settings.SESSION_ENGINES['signed_cookies'])
+    def test_signed_cookie_engine(self):
+        self.client.force_login(self.owner)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertFalse([query for query in captured.captured_queries if 'django_session' in query['sql']])
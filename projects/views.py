@@ -1,4 +1,5 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
 from django.views import generic
 from django.urls import reverse_lazy
 from django.utils import timezone
@@ -9,16 +10,26 @@ from datetime import timedelta
 from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.template.loader import render_to_string
-from django.http import HttpResponse
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.safestring import mark_safe
 from django.db.models import Q
+from tasks.pagination import paginate_keyset
+from .roles import get_resolver
+from .conditional import not_modified, project_validators, set_validators, user_projects_etag
+from .fragments import cached_fragment
+from .events import get_broker
+from . import oneshot
+from jobs.queue import enqueue
 
 class OwnerRequiredMixin:
     def dispatch(self, request, *args, **kwargs):
         project = self.get_object()
-        if not project.projectmembership_set.filter(
-            user=request.user,
-            role='owner'
-        ).exists():
+        if not get_resolver(request).is_owner(project):
             raise PermissionDenied("Только владелец проекта может его редактировать")
         return super().dispatch(request, *args, **kwargs)
 
@@ -28,10 +39,17 @@ class Index(LoginRequiredMixin, generic.ListView):
     context_object_name = 'projects'
     login_url = '/accounts/login/'
 
+    def get(self, request, *args, **kwargs):
+        etag = user_projects_etag(request)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        return set_validators(super().get(request, *args, **kwargs), etag)
+
     def get_queryset(self):
         return Project.objects.filter(
             users=self.request.user,
-        )
+        ).with_stats()
 
 
 class ProjectDetail(LoginRequiredMixin, generic.DetailView):
@@ -39,45 +57,91 @@ class ProjectDetail(LoginRequiredMixin, generic.DetailView):
     template_name = 'projects/project_detail.html'
     context_object_name = 'project'
     login_url = '/accounts/login/'
+    paginate_tasks_by = 5
     
     def get(self, request, *args, **kwargs):
+        # 304 до загрузки задач и рендеринга, если версия проекта не менялась
+        etag, last_modified = project_validators(request, kwargs['pk'])
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
         self.object = self.get_object()
-        context = self.get_context_data(object=self.object)
+        tasks_html = self.render_tasks()
 
         if request.htmx:
-            return HttpResponse(render_to_string('projects/comps/tasks_list.html', context, request=request))
-        
-        return self.render_to_response(context)
+            response = HttpResponse(tasks_html)
+        else:
+            context = self.get_context_data(object=self.object, tasks_html=tasks_html)
+            response = self.render_to_response(context)
+        return oneshot.consume(request, set_validators(response, etag, last_modified))
 
     def get_queryset(self):
         return Project.objects.filter(
             users=self.request.user,
-        )
+        ).with_stats()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['is_owner'] = self.object.projectmembership_set.filter(
-            user=self.request.user, 
-            role='owner'
-        ).exists()
-        context['new_invite_url'] = self.request.session.pop('new_invite_url', None)
-        
+        resolver = get_resolver(self.request)
+        context['is_member'] = resolver.is_member(self.object)
+        context['is_owner'] = resolver.is_owner(self.object)
+        context['memberships'] = list(
+            self.object.projectmembership_set.select_related('user')
+        )
+        # Одноразовая cookie, а не сессия: просмотр страницы не пишет в django_session
+        context['new_invite_url'] = oneshot.read(self.request, 'new_invite_url')
+        return context
+
+    def render_tasks(self):
+        """HTML списка задач; берётся из кеша фрагментов, пока версия проекта не изменилась"""
+        project = self.object
+        params = self.request.GET
+        key_parts = (
+            project.pk,
+            project.version,
+            project.show_completed,
+            get_resolver(self.request).role(project),
+            params.get('cursor', ''),
+            params.get('page') if 'page' in params else None,
+        )
+
+        def render(csrf_token):
+            context = {'project': project, 'csrf_token': csrf_token, **self.get_tasks_context()}
+            return render_to_string('projects/comps/tasks_list.html', context, request=self.request)
+
+        return mark_safe(cached_fragment(self.request, 'tasks_list', key_parts, render))
+
+    def get_tasks_context(self):
+        context = {}
         tasks = self.object.tasks.all()
         if not self.object.show_completed:
             tasks = tasks.filter(~Q(status='done'))
 
-        paginator = Paginator(tasks, 5)
-        page = self.request.GET.get('page', 1)
+        # ?page=N — прежний режим с номерами страниц, по умолчанию — курсоры
+        if 'page' in self.request.GET:
+            paginator = Paginator(tasks, self.paginate_tasks_by)
+            page = self.request.GET.get('page', 1)
+
+            try:
+                tasks_paginated = paginator.page(page)
+            except PageNotAnInteger:
+                tasks_paginated = paginator.page(1)
+            except EmptyPage:
+                tasks_paginated = paginator.page(paginator.num_pages)
+
+            context['tasks'] = tasks_paginated
+            context['paginator'] = paginator
+            return context
 
         try:
-            tasks_paginated = paginator.page(page)
-        except PageNotAnInteger:
-            tasks_paginated = paginator.page(1)
-        except EmptyPage:
-            tasks_paginated = paginator.page(paginator.num_pages)
+            tasks_paginated = paginate_keyset(
+                tasks, self.request.GET.get('cursor'), self.paginate_tasks_by
+            )
+        except ValueError:
+            tasks_paginated = paginate_keyset(tasks, None, self.paginate_tasks_by)
 
         context['tasks'] = tasks_paginated
-        context['paginator'] = paginator
         return context
 
 
@@ -99,7 +163,7 @@ class ProjectCreate(LoginRequiredMixin, generic.CreateView):
     def get_success_url(self):
         return reverse_lazy('projects:project-detail', kwargs={'pk': self.object.pk})
 
-class ProjectUpdate(LoginRequiredMixin, generic.UpdateView, OwnerRequiredMixin):
+class ProjectUpdate(LoginRequiredMixin, OwnerRequiredMixin, generic.UpdateView):
     model = Project
     template_name = 'projects/project_form.html'
     fields = ['title', 'description', 'show_completed']
@@ -114,7 +178,7 @@ class ProjectUpdate(LoginRequiredMixin, generic.UpdateView, OwnerRequiredMixin):
         return reverse_lazy('projects:project-detail', kwargs={'pk': self.object.pk})
 
 
-class ProjectDelete(LoginRequiredMixin, generic.DeleteView, OwnerRequiredMixin):
+class ProjectDelete(LoginRequiredMixin, OwnerRequiredMixin, generic.DeleteView):
     model = Project
     template_name = 'projects/project_confirm_delete.html'
     success_url = reverse_lazy('projects:index')
@@ -124,6 +188,12 @@ class ProjectDelete(LoginRequiredMixin, generic.DeleteView, OwnerRequiredMixin):
             users=self.request.user
         )
 
+    def form_valid(self, form):
+        # Удаление идёт в фоне пакетами (projects.deletion), запрос не ждёт
+        job = enqueue('projects.delete_project', {'project_id': str(self.object.pk)}, user=self.request.user)
+        messages.success(self.request, f"Проект «{self.object.title}» удаляется (задача {job.pk})")
+        return redirect(self.get_success_url())
+
 class CreateInvitationView(LoginRequiredMixin, generic.View):
     """Создание ссылки-приглашения (только владелец)"""
     
@@ -131,10 +201,7 @@ class CreateInvitationView(LoginRequiredMixin, generic.View):
         project = get_object_or_404(Project, pk=pk)
         
         # Проверяем, что текущий пользователь — владелец
-        if not project.projectmembership_set.filter(
-            user=request.user, 
-            role='owner'
-        ).exists():
+        if not get_resolver(request).is_owner(project):
             messages.error(request, "Только владелец может создавать приглашения")
             return redirect('projects:project-detail', pk=pk)
         
@@ -151,21 +218,19 @@ class CreateInvitationView(LoginRequiredMixin, generic.View):
             reverse_lazy('projects:accept-invitation', kwargs={'token': invitation.token})
         )
         
-        request.session['new_invite_url'] = invite_url
-        
         messages.success(
             request,
             f"Ссылка-приглашение создана (действует 7 дней):<br><strong>{invite_url}</strong>"
         )
         
-        return redirect('projects:project-detail', pk=pk)
+        return oneshot.send(redirect('projects:project-detail', pk=pk), 'new_invite_url', invite_url)
 
 
 class AcceptInvitationView(generic.View):
     """Принятие приглашения по ссылке"""
     
     def get(self, request, token):
-        invitation = get_object_or_404(ProjectInvitation, token=token)
+        invitation = get_object_or_404(ProjectInvitation.objects.select_related('project'), token=token)
         
         if not invitation.is_valid:
             messages.error(request, "Приглашение недействительно или истекло")
@@ -173,26 +238,19 @@ class AcceptInvitationView(generic.View):
         
         if request.user.is_authenticated:
             # Если пользователь авторизован — сразу добавляем
-            if not ProjectMembership.objects.filter(project=invitation.project, user=request.user).exists():
-                ProjectMembership.objects.create(
-                    project=invitation.project,
-                    user=request.user,
-                    role='member'
-                )
-                
-                if invitation.is_single_use:
-                    invitation.used_by = request.user
-                    invitation.used_at = timezone.now()
-                    invitation.save()
-                
+            outcome = invitation.accept(request.user)
+            if outcome == ProjectInvitation.INVALID:
+                # Одноразовую ссылку успели использовать, пока шёл запрос
+                messages.error(request, "Приглашение недействительно или истекло")
+                return redirect('projects:index')
+            if outcome == ProjectInvitation.JOINED:
                 messages.success(request, f"Вы успешно присоединились к проекту «{invitation.project.title}»!")
             else:
                 messages.info(request, "Вы уже участник этого проекта")
         else:
-            # Если не авторизован — сохраняем приглашение в сессии и редиректим на логин
-            request.session['pending_invite_token'] = str(token)
+            # Если не авторизован — на логин с возвратом на эту ссылку (сессию не создаём)
             messages.info(request, "Войдите или зарегистрируйтесь, чтобы присоединиться к проекту")
-            return redirect('/accounts/login')
+            return redirect_to_login(request.get_full_path())
         
         return redirect('projects:project-detail', pk=invitation.project.pk)
 
@@ -204,10 +262,7 @@ class RemoveMemberView(LoginRequiredMixin, generic.View):
         project = get_object_or_404(Project, pk=pk)
         
         # Проверяем, что текущий пользователь — владелец
-        if not project.projectmembership_set.filter(
-            user=request.user,
-            role='owner'
-        ).exists():
+        if not get_resolver(request).is_owner(project):
             messages.error(request, "Только владелец проекта может удалять участников")
             return redirect('projects:project-detail', pk=pk)
         
@@ -228,4 +283,63 @@ class RemoveMemberView(LoginRequiredMixin, generic.View):
         
         messages.success(request, f"Пользователь {membership.user.username} исключён из проекта")
         
-        return redirect('projects:project-detail', pk=pk)
\ No newline at end of file
+        return redirect('projects:project-detail', pk=pk)
+
+
+class ProjectEvents(generic.View):
+    """Поток событий проекта (text/event-stream) для участников.
+
+    Асинхронная вьюха: ожидающее соединение — это корутина с очередью, а не
+    занятый поток. Поддерживает возобновление по Last-Event-ID; если нужная
+    часть истории уже вытеснена из буфера, первым приходит событие reset.
+    """
+
+    async def get(self, request, pk):
+        if not isinstance(request, ASGIRequest):
+            # Под WSGI бесконечный поток занял бы поток воркера; 204 просит
+            # EventSource не переподключаться
+            return HttpResponse(status=204)
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse(status=401)
+        if not await ProjectMembership.objects.filter(project_id=pk, user=user).aexists():
+            return HttpResponse(status=404)
+
+        event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        response = StreamingHttpResponse(self.stream(pk, event_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, project_id, event_id):
+        options = settings.EVENTS
+        broker = get_broker()
+        last_id, known = broker.parse_event_id(event_id)
+        # Сначала подписка, потом история: события между ними не теряются,
+        # а повторы отсекаются по id
+        subscription = broker.subscribe(project_id)
+        try:
+            yield 'retry: 3000\n\n'
+            backlog, gap = broker.backlog(project_id, last_id)
+            if gap or (event_id and not known):
+                yield 'event: reset\ndata: {}\n\n'
+            for event in backlog:
+                last_id = event.id
+                yield event.encode(broker.epoch)
+
+            deadline = time.monotonic() + options['MAX_DURATION']
+            while not subscription.overflowed:
+                timeout = min(options['KEEPALIVE'], deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if last_id is not None and event.id <= last_id:
+                    continue
+                last_id = event.id
+                yield event.encode(broker.epoch)
+        finally:
+            broker.unsubscribe(subscription)
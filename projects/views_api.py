@@ -2,13 +2,21 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.exceptions import NotFound
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
 from .models import Project, ProjectInvitation, ProjectMembership
-from .serializers import ProjectSerializer, ProjectInvitationSerializer
+from .serializers import BulkInvitationSerializer, ProjectSerializer, ProjectInvitationSerializer, parse_list_param
 from rest_framework import permissions
+from .roles import get_resolver
+from .exports import EXPORTS, FORMATS, streaming_export
+from .search import FullTextSearchFilter
+from .conditional import ConditionalGetMixin, project_validators
+from .cache import cache_stats
 
 
 class IsProjectOwnerOrReadOnly(permissions.BasePermission):
@@ -16,26 +24,33 @@ class IsProjectOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return obj.projectmembership_set.filter(
-            user=request.user,
-            role='owner'
-        ).exists()
+        return get_resolver(request).is_owner(obj)
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated, IsProjectOwnerOrReadOnly]
 
     def get_queryset(self):
         # Только проекты, где текущий пользователь — участник
-        return Project.objects.filter(
+        queryset = Project.objects.filter(
             users=self.request.user
-        ).prefetch_related('projectmembership_set', 'tasks')
+        ).with_stats()
+
+        # Участников подгружаем, только если поле users попадёт в ответ
+        fields = parse_list_param(self.request, 'fields')
+        if not fields or 'users' in fields:
+            queryset = queryset.prefetch_related('projectmembership_set__user')
+        return queryset
+
+    def get_object_validators(self):
+        return project_validators(self.request, self.kwargs['pk'])
 
     # Фильтры и поиск
+    # Поиск идёт после сортировки, чтобы результаты шли по релевантности
     filter_backends = [
-        filters.SearchFilter,
-        filters.OrderingFilter
+        filters.OrderingFilter,
+        FullTextSearchFilter
     ]
     
     search_fields = ['title', 'description']  # поиск по названию и описанию
@@ -48,9 +63,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         """Генерация одноразовой ссылки-приглашения (только владелец)"""
         project = self.get_object()
         
-        if not project.projectmembership_set.filter(
-            user=request.user, role='owner'
-        ).exists():
+        if not get_resolver(request).is_owner(project):
             return Response(
                 {"detail": "Только владелец может приглашать участников"},
                 status=status.HTTP_403_FORBIDDEN
@@ -75,19 +88,81 @@ class ProjectViewSet(viewsets.ModelViewSet):
             "token": str(invitation.token)
         }, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['post'], url_path='invite-bulk', permission_classes=[IsAuthenticated])
+    def invite_bulk(self, request, pk=None):
+        """Пакетная выдача приглашений одним INSERT (только владелец):
+        {"count": 200, "expires_in_days": 7, "is_single_use": true}"""
+        project = self.get_object()
+
+        if not get_resolver(request).is_owner(project):
+            return Response(
+                {"detail": "Только владелец может приглашать участников"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        params = BulkInvitationSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        expires_at = timezone.now() + timedelta(days=params.validated_data['expires_in_days'])
+        invitations = ProjectInvitation.objects.bulk_create([
+            ProjectInvitation(
+                project=project,
+                created_by=request.user,
+                expires_at=expires_at,
+                is_single_use=params.validated_data['is_single_use'],
+            )
+            for _ in range(params.validated_data['count'])
+        ])
+
+        return Response({
+            "expires_at": expires_at,
+            "invitations": [
+                {
+                    "token": str(invitation.token),
+                    "invite_url": request.build_absolute_uri(
+                        reverse('projects:accept-invitation', kwargs={'token': invitation.token})
+                    ),
+                }
+                for invitation in invitations
+            ],
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['get'], url_path='my-role')
     def my_role(self, request, pk=None):
         """Получение роли текущего пользователя в проекте"""
         project = self.get_object()
-        membership = project.projectmembership_set.filter(user=request.user).first()
+        membership = get_resolver(request).membership(project)
         
         if membership:
             return Response({
-                "role": membership.role,
-                "joined_at": membership.joined_at
+                "role": membership['role'],
+                "joined_at": membership['joined_at']
             })
         else:
             return Response(
                 {"detail": "Вы не являетесь участником этого проекта"},
                 status=status.HTTP_404_NOT_FOUND
-            )
\ No newline at end of file
+            )
+
+class ExportView(APIView):
+    """Потоковая выгрузка проектов/задач/участников текущего пользователя:
+    /api/export/<projects|tasks|memberships>.<csv|ndjson>"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, kind, fmt):
+        if kind not in EXPORTS or fmt not in FORMATS:
+            raise NotFound("Неизвестный вид или формат выгрузки")
+
+        model = EXPORTS[kind]()
+        if model is Project:
+            queryset = Project.objects.filter(users=request.user)
+        else:
+            queryset = model.objects.filter(project__users=request.user)
+        return streaming_export(queryset, fmt, filename=f'{kind}_export')
+
+
+class CacheStatsView(APIView):
+    """Счётчики попаданий/промахов кешей текущего процесса (только для staff)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats())
@@ -0,0 +1,131 @@
+"""Асинхронные read-only эндпоинты API (list/retrieve) на async ORM.
+
+Под ASGI запрос, ожидающий базу, не занимает слот пула потоков на всё
+время обработки. Ответы совпадают по формату с синхронными вьюсетами
+(те же сериализаторы и JSONRenderer); сериализация идёт в цикле событий,
+поэтому все связи загружаются заранее — обращение сериализатора к базе
+здесь закончилось бы SynchronousOnlyOperation.
+
+Аутентификация — только по сессии (request.auser()); для токенов и Basic
+остаются синхронные /api/projects/ и /api/tasks/.
+"""
+from django.conf import settings
+from django.http import HttpResponse
+from django.views import generic
+from rest_framework import permissions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .models import Project
+from .roles import aget_resolver
+from .serializers import ProjectSerializer, parse_list_param
+
+
+class AsyncIsAuthenticated:
+    async def has_permission(self, request, view):
+        return view.resolver.user.is_authenticated
+
+    async def has_object_permission(self, request, view, obj):
+        return True
+
+
+class AsyncIsProjectOwnerOrReadOnly(AsyncIsAuthenticated):
+    """IsProjectOwnerOrReadOnly: читать могут участники (queryset уже
+    ограничен их проектами), менять — только владелец"""
+
+    async def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return view.resolver.is_owner(obj)
+
+
+class AsyncReadOnlyAPIView(generic.View):
+    """Общая часть: пользователь и роли, проверки прав, JSON-ответ.
+
+    Наследник задаёт serializer_class и реализует alist() и aretrieve(pk).
+    """
+    http_method_names = ['get', 'head', 'options']
+    serializer_class = None
+    permission_classes = [AsyncIsAuthenticated]
+
+    async def get(self, request, pk=None):
+        self.resolver = await aget_resolver(request)
+        # DRF-обёртка нужна сериализаторам ради query_params (?fields=, ?expand=)
+        self.api_request = Request(request)
+        for permission in self.permission_classes:
+            if not await permission().has_permission(request, self):
+                return self.error('Authentication credentials were not provided.', 403)
+        if pk is None:
+            return await self.alist()
+        return await self.aretrieve(pk)
+
+    async def check_object_permissions(self, obj):
+        for permission in self.permission_classes:
+            if not await permission().has_object_permission(self.request, self, obj):
+                return False
+        return True
+
+    def serialize(self, instance, many=False):
+        return self.serializer_class(instance, many=many, context={'request': self.api_request}).data
+
+    def respond(self, data, status=200):
+        return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+    def error(self, detail, status):
+        return self.respond({'detail': detail}, status)
+
+    def page_link(self, page, last_page):
+        if page < 1 or page > last_page:
+            return None
+        url = self.request.build_absolute_uri()
+        if page == 1:
+            return remove_query_param(url, 'page')
+        return replace_query_param(url, 'page', page)
+
+
+class ProjectAsyncView(AsyncReadOnlyAPIView):
+    """/api/async/projects/ и /api/async/projects/<pk>/ — как list/retrieve
+    ProjectViewSet (постраничная выдача с count, по умолчанию новые сверху)"""
+    serializer_class = ProjectSerializer
+    permission_classes = [AsyncIsProjectOwnerOrReadOnly]
+
+    def get_queryset(self):
+        queryset = Project.objects.filter(users=self.resolver.user).with_stats()
+        fields = parse_list_param(self.api_request, 'fields')
+        if not fields or 'users' in fields:
+            queryset = queryset.prefetch_related('projectmembership_set__user')
+        return queryset
+
+    async def alist(self):
+        queryset = self.get_queryset().order_by('-created_at')
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            page = 0
+        count = await queryset.acount()
+        last_page = max(1, -(-count // page_size))
+        if page < 1 or page > last_page:
+            return self.error('Invalid page.', 404)
+
+        offset = (page - 1) * page_size
+        projects = [
+            project async for project in
+            queryset[offset:offset + page_size].aiterator(chunk_size=page_size)
+        ]
+        return self.respond({
+            'count': count,
+            'next': self.page_link(page + 1, last_page),
+            'previous': self.page_link(page - 1, last_page),
+            'results': self.serialize(projects, many=True),
+        })
+
+    async def aretrieve(self, pk):
+        try:
+            project = await self.get_queryset().aget(pk=pk)
+        except Project.DoesNotExist:
+            return self.error('No Project matches the given query.', 404)
+        if not await self.check_object_permissions(project):
+            return self.error('You do not have permission to perform this action.', 403)
+        return self.respond(self.serialize(project))
@@ -1,5 +1,9 @@
 from django.contrib import admin
+from django.db.models import Q
 from .models import Task
+from projects import search
+from projects.exports import streaming_export
+from projects.models import Project
 
 # Register your models here.
 
@@ -49,4 +53,31 @@ class TaskAdmin(admin.ModelAdmin):
 
     ordering = ('-created_at',)
 
-    readonly_fields = ('created_at', 'updated_at')
\ No newline at end of file
+    readonly_fields = ('created_at', 'updated_at')
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.fts_available():
+            return super().get_search_results(request, queryset, search_term)
+
+        # FTS по задачам и по названиям проектов вместо LIKE '%q%' по четырём колонкам;
+        # совпадения — подзапросами, без списка ключей в параметрах
+        condition = Q(author__username=search_term)
+        if search.build_match(search_term):
+            condition |= (
+                Q(pk__in=search.matching(Task, search_term))
+                | Q(project_id__in=search.matching(Project, search_term))
+            )
+        queryset = queryset.filter(condition)
+        return queryset, False
+
+    actions = ['export_as_csv', 'export_as_ndjson']
+
+    def export_as_csv(self, request, queryset):
+        return streaming_export(queryset, 'csv', filename='tasks_export')
+
+    export_as_csv.short_description = "Экспорт выбранных задач в CSV"
+
+    def export_as_ndjson(self, request, queryset):
+        return streaming_export(queryset, 'ndjson', filename='tasks_export')
+
+    export_as_ndjson.short_description = "Экспорт выбранных задач в NDJSON"
@@ -0,0 +1,82 @@
+"""Денормализованные счётчики задач проекта (Project.tasks_*)."""
+import threading
+from contextlib import contextmanager
+
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from projects.models import Project
+
+# Статус задачи -> поле-счётчик на Project
+STATUS_FIELDS = {
+    'not_started': 'tasks_not_started',
+    'in_progress': 'tasks_in_progress',
+    'under_review': 'tasks_under_review',
+    'done': 'tasks_done',
+}
+
+_state = threading.local()
+
+
+def is_suspended():
+    return getattr(_state, 'depth', 0) > 0
+
+
+@contextmanager
+def suspended():
+    """Отключает инкрементальные обновления из сигналов (для массовых операций,
+    после которых вызывается recount)."""
+    _state.depth = getattr(_state, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+
+
+def apply_delta(project_id, deltas):
+    """Атомарно применяет изменения счётчиков: {'done': +1, 'in_progress': -1}
+    и отмечает проект изменённым (пустой deltas — только версия)"""
+    updates = {}
+    for status, delta in deltas.items():
+        field = STATUS_FIELDS.get(status)
+        if field is None or not delta:
+            continue
+        updates[field] = Greatest(F(field) + delta, 0)
+    Project.objects.filter(pk=project_id).touch(**updates)
+
+
+def recount(project_ids=None, changed_only=False):
+    """Пересчитывает счётчики одним GROUP BY по задачам.
+
+    project_ids=None — пересчитать все проекты. changed_only — обновлять
+    только проекты с разошедшимися счётчиками: полный пересчёт не должен
+    менять version (ETag, кеш фрагментов) у всех проектов сразу.
+    Возвращает количество обновлённых проектов.
+    """
+    from .models import Task
+
+    if project_ids is not None:
+        project_ids = {pk for pk in project_ids if pk is not None}
+        if not project_ids:
+            return 0
+
+    tasks = Task.objects.all()
+    projects = Project.objects.all()
+    if project_ids is not None:
+        tasks = tasks.filter(project_id__in=project_ids)
+        projects = projects.filter(pk__in=project_ids)
+
+    counts = {}
+    rows = tasks.order_by().values('project_id', 'status').annotate(n=Count('id'))
+    for row in rows:
+        counts.setdefault(row['project_id'], {})[row['status']] = row['n']
+
+    updated = 0
+    for project_id, *current in projects.values_list('pk', *STATUS_FIELDS.values()).iterator():
+        by_status = counts.get(project_id, {})
+        values = {field: by_status.get(status, 0) for status, field in STATUS_FIELDS.items()}
+        if changed_only and list(values.values()) == current:
+            continue
+        Project.objects.filter(pk=project_id).touch(**values)
+        updated += 1
+    return updated
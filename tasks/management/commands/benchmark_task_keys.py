@@ -0,0 +1,134 @@
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from projects.ids import uuid7
+from projects.models import Project
+
+GENERATORS = {'v4': uuid.uuid4, 'v7': uuid7}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает ключи UUIDv4 и UUIDv7 на таблице tasks_task: скорость вставки, размер '
+        'файла, выборку свежих строк, диапазонный проход по ключу и точечные чтения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2_000_000)
+        parser.add_argument('--batch-size', type=int, default=10_000, help='Строк на транзакцию')
+        parser.add_argument('--kinds', default='v4,v7')
+        parser.add_argument('--lookups', type=int, default=20_000, help='Точечных чтений по ключу')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда рассчитана на SQLite')
+        kinds = [kind.strip() for kind in options['kinds'].split(',') if kind.strip()]
+        unknown = set(kinds) - set(GENERATORS)
+        if unknown:
+            raise CommandError(f'Неизвестные виды ключей: {", ".join(sorted(unknown))}')
+
+        for kind in kinds:
+            started = time.perf_counter()
+            for _ in range(100_000):
+                GENERATORS[kind]()
+            self.stdout.write(f'{kind}: генерация {(time.perf_counter() - started) * 10:.2f} мкс на ключ')
+
+        settings_dict = connection.settings_dict
+        saved_name = settings_dict['TEST'].get('NAME')
+        try:
+            for kind in kinds:
+                with tempfile.TemporaryDirectory() as directory:
+                    path = Path(directory) / 'keys.sqlite3'
+                    settings_dict['TEST']['NAME'] = str(path)
+                    connection.close()
+                    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                    try:
+                        self.report(kind, self.run(kind, path, options))
+                    finally:
+                        connection.creation.destroy_test_db(old_name, verbosity=0)
+        finally:
+            settings_dict['TEST']['NAME'] = saved_name
+
+    def run(self, kind, path, options):
+        generate = GENERATORS[kind]
+        project = Project.objects.create(title='Бенчмарк')
+        project_id = project.pk.hex
+        rows, batch_size = options['rows'], max(1, options['batch_size'])
+        base = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        # Напрямую через sqlite3: мерим B-дерево, а не ORM
+        db = connection.connection
+        db.execute('DELETE FROM tasks_task')
+
+        recent_from = int(rows * 0.99)
+        recent_key = recent_created = None
+        batch_rates = []
+        started = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            size = min(batch_size, rows - offset)
+            values = []
+            for i in range(offset, offset + size):
+                key = generate().hex
+                created = (base + timedelta(milliseconds=i)).strftime('%Y-%m-%d %H:%M:%S.%f')
+                if i == recent_from:
+                    recent_key, recent_created = key, created
+                values.append((key, f'Задача {i}', 'not_started', created, created, project_id))
+            batch_started = time.perf_counter()
+            db.execute('BEGIN')
+            db.executemany(
+                'INSERT INTO tasks_task (id, title, status, created_at, updated_at, project_id) '
+                'VALUES (?, ?, ?, ?, ?, ?)', values
+            )
+            db.execute('COMMIT')
+            batch_rates.append(size / (time.perf_counter() - batch_started))
+        insert_seconds = time.perf_counter() - started
+        db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+        keys = [row[0] for row in db.execute('SELECT id FROM tasks_task ORDER BY random() LIMIT ?',
+                                             (options['lookups'],))]
+        tail = max(1, len(batch_rates) // 10)
+        result = {
+            'insert_rows_per_s': rows / insert_seconds,
+            'last_batches_rows_per_s': sum(batch_rates[-tail:]) / tail,
+            'file_mb': os.path.getsize(path) / 2 ** 20,
+            'pages': db.execute('PRAGMA page_count').fetchone()[0],
+        }
+        # Последний 1% по времени: v7 — диапазон первичного ключа, v4 — только индекс created_at
+        if kind == 'v7':
+            result['recent_ms'] = self.timed(db, 'SELECT count(title) FROM tasks_task WHERE id >= ?', (recent_key,))
+        else:
+            result['recent_ms'] = self.timed(
+                db, 'SELECT count(title) FROM tasks_task WHERE created_at >= ?', (recent_created,)
+            )
+        start_key = random.choice(keys)
+        result['range_scan_ms'] = self.timed(
+            db, 'SELECT count(title) FROM (SELECT title FROM tasks_task WHERE id > ? ORDER BY id LIMIT 100000)',
+            (start_key,)
+        )
+        started = time.perf_counter()
+        for key in keys:
+            db.execute('SELECT title FROM tasks_task WHERE id = ?', (key,)).fetchone()
+        result['lookup_us'] = (time.perf_counter() - started) / max(1, len(keys)) * 1e6
+        return result
+
+    def timed(self, db, sql, params):
+        started = time.perf_counter()
+        db.execute(sql, params).fetchall()
+        return (time.perf_counter() - started) * 1000
+
+    def report(self, kind, result):
+        self.stdout.write(
+            f'{kind}: вставка {result["insert_rows_per_s"]:,.0f} строк/с '
+            f'(последние 10%: {result["last_batches_rows_per_s"]:,.0f}) | '
+            f'файл {result["file_mb"]:.1f} МБ ({result["pages"]} стр.) | '
+            f'свежий 1% {result["recent_ms"]:.1f} мс | '
+            f'100k по ключу {result["range_scan_ms"]:.1f} мс | '
+            f'точечное чтение {result["lookup_us"]:.1f} мкс'
+        )
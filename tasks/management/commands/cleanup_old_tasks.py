@@ -1,19 +1,97 @@
+import time
+from collections import Counter
+
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from projects import events, search
+from tasks import counters
 from tasks.models import Task
 from django.utils import timezone
 from datetime import timedelta
 
 
 class Command(BaseCommand):
-    help = 'Удаляет задачи старше 30 дней со статусом "done"'
+    help = 'Удаляет задачи старше N дней (по умолчанию 30) со статусом "done"'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30,
+                            help='Возраст задач (по updated_at) в днях')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Сколько задач удалять за одну транзакцию')
+        parser.add_argument('--sleep-between-batches', type=float, default=0.0,
+                            help='Пауза между пакетами в секундах (даёт дорогу другим писателям)')
+        parser.add_argument('--max-runtime', type=float, default=0,
+                            help='Остановиться через N секунд (0 — без ограничения)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать задачи, ничего не удаляя')
 
     def handle(self, *args, **options):
-        threshold = timezone.now() - timedelta(days=30)
-        deleted_count, _ = Task.objects.filter(
+        threshold = timezone.now() - timedelta(days=options['days'])
+        batch_size = max(1, options['batch_size'])
+        queryset = Task.objects.filter(
             status='done',
             updated_at__lt=threshold
-        ).delete()
+        )
+
+        if options['dry_run']:
+            self.stdout.write(
+                f'Будет удалено {queryset.count()} старых завершённых задач (dry run)'
+            )
+            return
+
+        # Каждый пакет — отдельная короткая транзакция, поэтому прерванный
+        # запуск безопасно продолжается повторным запуском команды.
+        started = time.monotonic()
+        deleted_count = batches = 0
+        while True:
+            deleted = self.delete_batch(queryset, batch_size)
+            if not deleted:
+                break
+            batches += 1
+            deleted_count += deleted
+            self.stdout.write(f'Пакет {batches}: удалено {deleted} (всего {deleted_count})')
+
+            if deleted < batch_size:
+                break
+            if options['max_runtime'] and time.monotonic() - started >= options['max_runtime']:
+                self.stdout.write(self.style.WARNING(
+                    'Достигнут --max-runtime, остаток будет удалён при следующем запуске'
+                ))
+                break
+            if options['sleep_between_batches']:
+                time.sleep(options['sleep_between_batches'])
 
         self.stdout.write(self.style.SUCCESS(
             f'Удалено {deleted_count} старых завершённых задач'
-        ))
\ No newline at end of file
+        ))
+
+    def delete_batch(self, queryset, batch_size):
+        """Удаляет один пакет сырым DELETE по первичным ключам, без сборщика удаления"""
+        pk_field = Task._meta.pk
+        with transaction.atomic():
+            rows = list(queryset.order_by('updated_at').values_list('pk', 'project_id')[:batch_size])
+            if not rows:
+                return 0
+
+            params = [pk_field.get_db_prep_value(pk, connection) for pk, _ in rows]
+            placeholders = ', '.join(['%s'] * len(params))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {connection.ops.quote_name(Task._meta.db_table)} '
+                    f'WHERE {connection.ops.quote_name(pk_field.column)} IN ({placeholders})',
+                    params
+                )
+                deleted = cursor.rowcount
+
+            # Сырой DELETE не шлёт сигналов — счётчики проектов правим сами
+            per_project = Counter(project_id for _, project_id in rows)
+            if deleted != len(rows):
+                counters.recount(per_project)
+            else:
+                for project_id, count in per_project.items():
+                    counters.apply_delta(project_id, {'done': -count})
+            # ...и поисковый индекс с событиями тоже
+            search.unindex_objects(Task, [pk for pk, _ in rows])
+            for project_id in per_project:
+                events.publish(project_id, 'tasks.changed')
+        return deleted
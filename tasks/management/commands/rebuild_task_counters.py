@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from tasks import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики задач у проектов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'project_ids',
+            nargs='*',
+            help='UUID проектов (по умолчанию — все проекты)'
+        )
+
+    def handle(self, *args, **options):
+        project_ids = options['project_ids'] or None
+        updated = counters.recount(project_ids, changed_only=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлены счётчики задач у {updated} проектов'
+        ))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_project_task_counters'),
+        ('tasks', '0002_task_author'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'created_at', 'id'], name='tasks_task_project_aedf62_idx'),
+        ),
+    ]
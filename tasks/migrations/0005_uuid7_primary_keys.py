@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:28
+
+import projects.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_status_updated_at_index'),
+    ]
+
+    # Меняется только Python-значение по умолчанию: на SQLite AlterField
+    # пересоздал бы всю таблицу, поэтому схему не трогаем. Существующие
+    # ключи остаются v4; перевыпустить их можно командой rekey_uuid7.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='task',
+                    name='id',
+                    field=models.UUIDField(default=projects.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -3,12 +3,78 @@ from django.db import models
 # Create your models here.
 from django.db import models
 from projects.models import Project 
+from projects.ids import uuid7
 import uuid
 
 
+class TaskQuerySet(models.QuerySet):
+    """Массовые операции, сохраняющие счётчики Project.tasks_* и поисковый индекс в актуальном виде"""
+
+    def _project_ids(self):
+        return set(self.order_by().values_list('project_id', flat=True).distinct())
+
+    def update(self, **kwargs):
+        from . import counters
+        from projects import events, search
+
+        counted = {'status', 'project', 'project_id'} & set(kwargs)
+        indexed = {'title', 'description'} & set(kwargs)
+        if not counted and not indexed:
+            return super().update(**kwargs)
+
+        project_ids = self._project_ids() if counted else set()
+        pks = list(self.values_list('pk', flat=True)) if indexed else []
+        rows = super().update(**kwargs)
+
+        if counted:
+            new_project = kwargs.get('project_id', kwargs.get('project'))
+            if new_project is not None:
+                project_ids.add(getattr(new_project, 'pk', new_project))
+            counters.recount(project_ids)
+        if indexed:
+            tasks = list(Task.objects.filter(pk__in=pks).only('pk', 'project_id', 'title', 'description'))
+            search.index_objects(Task, tasks)
+            if not counted:
+                project_ids = {task.project_id for task in tasks}
+                Project.objects.filter(pk__in=project_ids).touch()
+        for project_id in project_ids:
+            events.publish(project_id, 'tasks.changed')
+        return rows
+
+    update.alters_data = True
+
+    def delete(self):
+        from . import counters
+        from projects import events
+
+        project_ids = self._project_ids()
+        with counters.suspended():
+            result = super().delete()
+        counters.recount(project_ids)
+        for project_id in project_ids:
+            events.publish(project_id, 'tasks.changed')
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import counters
+        from projects import events, search
+
+        objs = super().bulk_create(objs, *args, **kwargs)
+        project_ids = {obj.project_id for obj in objs}
+        counters.recount(project_ids)
+        search.index_objects(self.model, objs)
+        for project_id in project_ids:
+            events.publish(project_id, 'tasks.changed')
+        return objs
+
+
+
 class Task(models.Model):
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     class Status(models.TextChoices):
         NOT_STARTED = 'not_started', 'Не взята'
@@ -60,6 +126,8 @@ class Task(models.Model):
         verbose_name='Автор'
     )
 
+    objects = TaskQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Задача'
         verbose_name_plural = 'Задачи'
@@ -67,11 +135,55 @@ class Task(models.Model):
         indexes = [
             models.Index(fields=['project', 'status']),
             models.Index(fields=['created_at']),
+            # Keyset-пагинация задач проекта по (created_at, id)
+            models.Index(fields=['project', 'created_at', 'id']),
+            # cleanup_old_tasks: status='done' AND updated_at < ...
+            models.Index(fields=['status', 'updated_at']),
         ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_counted_state()
+        return instance
+
+    def _remember_counted_state(self):
+        # Состояние, учтённое в счётчиках проекта (см. tasks.signals)
+        self._counted_state = (self.__dict__.get('project_id'), self.__dict__.get('status'))
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # Дельта счётчиков (tasks.signals) верна, только если строка была в
+        # учтённом состоянии: UPDATE условный, а если параллельная запись из
+        # другой копии успела раньше — обычный UPDATE и пересчёт проекта
+        self._counted_match = True
+        project_id, status = getattr(self, '_counted_state', (None, None))
+        fields = {field.attname for field, _, _ in values}
+        if project_id is None or status is None or not {'status', 'project_id'} & fields:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        counted_qs = base_qs.filter(project_id=project_id, status=status)
+        if super()._do_update(counted_qs, using, pk_val, values, update_fields, forced_update):
+            return True
+        self._counted_match = False
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+    def delete(self, using=None, keep_parents=False):
+        from . import counters
+        from projects import events
+
+        project_id, status = getattr(self, '_counted_state', (None, None))
+        project_id, status = project_id or self.project_id, status or self.status
+        # Счётчики — по числу действительно удалённых строк: post_delete
+        # приходит и тогда, когда задачу уже удалил параллельный запрос
+        with counters.suspended():
+            result = super().delete(using, keep_parents)
+        if result[1].get(self._meta.label):
+            events.publish(project_id, 'task.deleted', {'id': str(self.pk)})
+            counters.apply_delta(project_id, {status: -1})
+        return result
+
     @property
     def is_completed(self):
         return self.status == self.Status.DONE
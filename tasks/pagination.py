@@ -0,0 +1,174 @@
+"""Keyset-пагинация задач по (created_at, id) без COUNT(*) и OFFSET."""
+import base64
+import json
+import uuid
+
+from django.utils.dateparse import parse_datetime
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, task):
+    payload = json.dumps({
+        'd': direction,
+        'c': task.created_at.isoformat(),
+        'i': task.id.hex,
+    }, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает (direction, created_at, id); ValueError при битом курсоре"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = payload['d']
+        created_at = parse_datetime(payload['c'])
+        task_id = uuid.UUID(hex=payload['i'])
+    except (TypeError, KeyError, ValueError, UnicodeDecodeError) as exc:
+        raise ValueError('Invalid cursor') from exc
+    if direction not in (NEXT, PREVIOUS) or created_at is None:
+        raise ValueError('Invalid cursor')
+    return direction, created_at, task_id
+
+
+class KeysetPage:
+    """Страница задач, совместимая с шаблонами (итерация, has_next/has_previous)"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def paginate_keyset(queryset, cursor, page_size):
+    """Страница задач в порядке (-created_at, -id) начиная с курсора.
+
+    Использует индекс (project, created_at, id): каждая страница — один
+    запрос LIMIT page_size + 1 без OFFSET и без COUNT.
+    """
+    query, direction = _keyset_query(queryset, cursor, page_size)
+    return _keyset_page(list(query), direction, page_size)
+
+
+async def apaginate_keyset(queryset, cursor, page_size):
+    """paginate_keyset для асинхронных вьюх"""
+    query, direction = _keyset_query(queryset, cursor, page_size)
+    return _keyset_page([task async for task in query], direction, page_size)
+
+
+def _keyset_query(queryset, cursor, page_size):
+    position = decode_cursor(cursor) if cursor else None
+    if position is None:
+        return queryset.order_by('-created_at', '-id')[:page_size + 1], None
+
+    direction, created_at, task_id = position
+    if direction == NEXT:
+        return queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=task_id)
+        ).order_by('-created_at', '-id')[:page_size + 1], direction
+    return queryset.filter(
+        Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=task_id)
+    ).order_by('created_at', 'id')[:page_size + 1], direction
+
+
+def _keyset_page(rows, direction, page_size):
+    if direction is None:
+        items = rows[:page_size]
+        next_cursor = encode_cursor(NEXT, items[-1]) if len(rows) > page_size else None
+        return KeysetPage(items, next_cursor, None)
+
+    if direction == NEXT:
+        items = rows[:page_size]
+        next_cursor = encode_cursor(NEXT, items[-1]) if len(rows) > page_size else None
+        previous_cursor = encode_cursor(PREVIOUS, items[0]) if items else None
+        return KeysetPage(items, next_cursor, previous_cursor)
+
+    items = rows[:page_size][::-1]
+    previous_cursor = encode_cursor(PREVIOUS, items[0]) if len(rows) > page_size else None
+    next_cursor = encode_cursor(NEXT, items[-1]) if items else None
+    return KeysetPage(items, next_cursor, previous_cursor)
+
+
+class TaskKeysetPagination(BasePagination):
+    """Курсорная пагинация для API задач.
+
+    ?cursor=... — keyset-режим (по умолчанию), ?page=N — прежняя
+    постраничная пагинация с общим количеством.
+    """
+    cursor_query_param = 'cursor'
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.legacy = None
+        if self.page_query_param in request.query_params:
+            self.legacy = PageNumberPagination()
+            return self.legacy.paginate_queryset(queryset, request, view)
+
+        try:
+            self.page = paginate_keyset(
+                queryset,
+                request.query_params.get(self.cursor_query_param),
+                self.get_page_size(request)
+            )
+        except ValueError:
+            raise NotFound('Неверный курсор')
+        return list(self.page)
+
+    def get_page_size(self, request):
+        size = PageNumberPagination.page_size
+        try:
+            requested = int(request.query_params.get(self.page_size_query_param, size))
+        except (TypeError, ValueError):
+            return size
+        return max(1, min(requested, self.max_page_size))
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if self.legacy is not None:
+            return self.legacy.get_paginated_response(data)
+        return Response({
+            'next': self.get_link(self.page.next_cursor),
+            'previous': self.get_link(self.page.previous_cursor),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -1,16 +1,37 @@
 from rest_framework import serializers
 from .models import Task
-from projects.serializers import ProjectSerializer
+from projects.serializers import DynamicFieldsMixin, ProjectSerializer
 
 
-class TaskSerializer(serializers.ModelSerializer):
-    project = ProjectSerializer(read_only=True)
-    author = serializers.StringRelatedField(read_only=True)
+class TaskSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    project_id = serializers.UUIDField(read_only=True)
+    author_id = serializers.IntegerField(read_only=True)
+
+    # ?expand=project,author
+    expandable_fields = {
+        'project': lambda: ProjectSerializer(read_only=True, fields=ProjectSerializer.summary_fields),
+        'author': lambda: serializers.StringRelatedField(read_only=True),
+    }
 
     class Meta:
         model = Task
         fields = [
-            'id', 'project', 'title', 'description', 'status',
-            'author', 'created_at', 'updated_at'
+            'id', 'project_id', 'title', 'description', 'status',
+            'author_id', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at', 'author']
\ No newline at end of file
+        read_only_fields = ['created_at', 'updated_at']
+
+
+class TaskBulkCreateSerializer(serializers.ModelSerializer):
+    """Элемент массового создания задач"""
+    project_id = serializers.UUIDField()
+
+    class Meta:
+        model = Task
+        fields = ['project_id', 'title', 'description', 'status']
+
+
+class TaskBulkStatusSerializer(serializers.Serializer):
+    """Элемент массовой смены статуса"""
+    id = serializers.UUIDField()
+    status = serializers.ChoiceField(choices=Task.Status.choices)
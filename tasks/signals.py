@@ -0,0 +1,70 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from projects import events, search
+from projects.models import Project
+from . import counters
+from .models import Task
+
+
+def _payload(task):
+    return {'id': str(task.pk), 'title': task.title, 'status': task.status}
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Инкрементально обновляет счётчики и версию проекта"""
+    if update_fields is None or {'title', 'description'} & set(update_fields):
+        search.index_objects(Task, [instance])
+
+    if raw:
+        instance._remember_counted_state()
+        return
+
+    old_project = getattr(instance, '_counted_state', (None, None))[0]
+    if old_project is not None and old_project != instance.project_id:
+        events.publish(old_project, 'task.deleted', {'id': str(instance.pk)})
+    events.publish(instance.project_id, 'task.saved', _payload(instance))
+
+    if counters.is_suspended():
+        instance._remember_counted_state()
+        return
+
+    counted = update_fields is None or {'status', 'project'} & set(update_fields)
+    new_project, new_status = instance.project_id, instance.status
+    if created:
+        counters.apply_delta(new_project, {new_status: 1})
+    elif not counted:
+        counters.apply_delta(new_project, {})
+    else:
+        old_project, old_status = getattr(instance, '_counted_state', (None, None))
+        if old_project is None or old_status is None:
+            # Исходное состояние неизвестно (объект создан не из БД) — пересчитываем
+            counters.recount({new_project})
+        elif not getattr(instance, '_counted_match', True):
+            # Строку уже изменила параллельная запись (см. Task._do_update)
+            counters.recount({old_project, new_project})
+        elif old_project != new_project:
+            counters.apply_delta(old_project, {old_status: -1})
+            counters.apply_delta(new_project, {new_status: 1})
+        else:
+            counters.apply_delta(new_project, {old_status: -1, new_status: 1} if old_status != new_status else {})
+
+    instance._remember_counted_state()
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, origin=None, **kwargs):
+    """Счётчики при Task.delete() правит сама модель (по числу удалённых строк),
+    при QuerySet.delete() — пересчёт; здесь — прочие удаления через сборщик"""
+    search.unindex_objects(Task, [instance.pk])
+
+    if counters.is_suspended():
+        return
+    # Каскадное удаление вместе с проектом — счётчики обновлять незачем
+    if isinstance(origin, Project) or getattr(origin, 'model', None) is Project:
+        return
+
+    project_id, status = getattr(instance, '_counted_state', (None, None))
+    events.publish(project_id or instance.project_id, 'task.deleted', {'id': str(instance.pk)})
+    counters.apply_delta(project_id or instance.project_id, {status or instance.status: -1})
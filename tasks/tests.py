@@ -1,3 +1,453 @@
 from django.test import TestCase
+from asgiref.sync import sync_to_async
 
 # Create your tests here.
+import uuid
+from unittest import mock
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from projects import search
+from projects.models import Project, ProjectMembership
+from .models import Task
+from .pagination import paginate_keyset
+from .views_api import DUPLICATE_ID, TaskViewSet
+
+
+User = get_user_model()
+
+
+class TaskCountersTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(title='Проект')
+
+    def assertCounters(self, project, not_started=0, in_progress=0, under_review=0, done=0):
+        project.refresh_from_db()
+        self.assertEqual(
+            (project.tasks_not_started, project.tasks_in_progress,
+             project.tasks_under_review, project.tasks_done),
+            (not_started, in_progress, under_review, done)
+        )
+
+    def test_stale_project_save_keeps_counters_and_version(self):
+        stale = Project.objects.get(pk=self.project.pk)
+        for title in 'abc':
+            Task.objects.create(project=self.project, title=title)
+        version = Project.objects.get(pk=self.project.pk).version
+
+        stale.title = 'Новое название'
+        stale.save()
+        self.assertCounters(stale, not_started=3)
+        self.assertEqual(stale.title, 'Новое название')
+        self.assertGreater(stale.version, version)
+        self.assertEqual(stale.version, Project.objects.get(pk=self.project.pk).version)
+
+    def test_create_status_change_and_delete(self):
+        task = Task.objects.create(project=self.project, title='a')
+        Task.objects.create(project=self.project, title='b', status='done')
+        self.assertCounters(self.project, not_started=1, done=1)
+
+        task.status = 'in_progress'
+        task.save()
+        self.assertCounters(self.project, in_progress=1, done=1)
+
+        task = Task.objects.get(pk=task.pk)
+        task.status = 'done'
+        task.save()
+        self.assertCounters(self.project, done=2)
+
+        task.delete()
+        self.assertCounters(self.project, done=1)
+        self.assertEqual(self.project.total_tasks, 1)
+        self.assertEqual(self.project.completion_percentage, 100)
+
+    def test_concurrent_saves_and_deletes_from_stale_copies(self):
+        task = Task.objects.create(project=self.project, title='a')
+        Task.objects.create(project=self.project, title='b')
+        first, second = Task.objects.get(pk=task.pk), Task.objects.get(pk=task.pk)
+        for copy in (first, second):
+            copy.status = 'done'
+            copy.save()
+        self.assertCounters(self.project, not_started=1, done=1)
+
+        second.status = 'in_progress'
+        second.save()
+        first.status = 'under_review'
+        first.save()
+        self.assertCounters(self.project, not_started=1, under_review=1)
+
+        with mock.patch('projects.events.publish') as publish:
+            first.delete()
+            second.delete()
+        self.assertCounters(self.project, not_started=1)
+        self.assertEqual(publish.call_count, 1)
+
+    def test_move_between_projects(self):
+        other = Project.objects.create(title='Другой')
+        task = Task.objects.create(project=self.project, title='a', status='under_review')
+        task.project = other
+        task.save()
+        self.assertCounters(self.project)
+        self.assertCounters(other, under_review=1)
+
+    def test_bulk_operations(self):
+        Task.objects.bulk_create([
+            Task(project=self.project, title=str(i)) for i in range(5)
+        ])
+        self.assertCounters(self.project, not_started=5)
+
+        pks = list(Task.objects.values_list('pk', flat=True)[:3])
+        Task.objects.filter(pk__in=pks).update(status='done')
+        self.assertCounters(self.project, not_started=2, done=3)
+
+        tasks = list(Task.objects.filter(status='not_started'))
+        for task in tasks:
+            task.status = 'in_progress'
+        Task.objects.bulk_update(tasks, ['status'])
+        self.assertCounters(self.project, in_progress=2, done=3)
+
+        Task.objects.filter(status='done').delete()
+        self.assertCounters(self.project, in_progress=2)
+
+    def test_cascade_delete_with_project(self):
+        Task.objects.create(project=self.project, title='a')
+        self.project.delete()
+        self.assertFalse(Task.objects.exists())
+
+    def test_rebuild_command(self):
+        Task.objects.create(project=self.project, title='a', status='done')
+        Project.objects.filter(pk=self.project.pk).update(tasks_done=42, tasks_not_started=7)
+
+        untouched = Project.objects.create(title='Без расхождений')
+        version = Project.objects.get(pk=untouched.pk).version
+
+        out = StringIO()
+        call_command('rebuild_task_counters', stdout=out)
+        self.assertIn('у 1 проектов', out.getvalue())
+        self.assertCounters(self.project, done=1)
+        self.assertEqual(Project.objects.get(pk=untouched.pk).version, version)
+
+    def test_properties_do_not_query(self):
+        Task.objects.create(project=self.project, title='a', status='done')
+        Task.objects.create(project=self.project, title='b')
+        project = Project.objects.get(pk=self.project.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(project.total_tasks, 2)
+            self.assertEqual(project.completed_tasks, 1)
+            self.assertEqual(project.completion_percentage, 50.0)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('member', password='pass')
+        self.project = Project.objects.create(title='Проект')
+        ProjectMembership.objects.create(project=self.project, user=self.user, role='owner')
+        Task.objects.bulk_create([
+            Task(project=self.project, title=str(i)) for i in range(12)
+        ])
+        # Одинаковый created_at у части задач — порядок решает id
+        Task.objects.filter(pk__in=list(Task.objects.values_list('pk', flat=True)[:6])).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+        self.expected = list(
+            Task.objects.order_by('-created_at', '-id').values_list('pk', flat=True)
+        )
+
+    def test_walk_forward_and_back(self):
+        tasks = Task.objects.filter(project=self.project)
+        seen, pages, cursor = [], [], None
+        while True:
+            page = paginate_keyset(tasks, cursor, 5)
+            pages.append(page)
+            seen.extend(task.pk for task in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 3)
+
+        back = paginate_keyset(tasks, pages[-1].previous_cursor, 5)
+        self.assertEqual([task.pk for task in back], self.expected[5:10])
+        self.assertTrue(back.has_previous())
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            paginate_keyset(Task.objects.all(), 'not-a-cursor', 5)
+
+    def test_api_cursor_mode_has_no_count(self):
+        self.client.force_login(self.user)
+        url = f'/api/projects/{self.project.pk}/tasks/?page_size=5'
+        seen = []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                data = self.client.get(url).json()
+            self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+            self.assertNotIn('count', data)
+            seen.extend(uuid.UUID(item['id']) for item in data['results'])
+            url = data['next']
+        self.assertEqual(seen, self.expected)
+
+    def test_api_page_mode_still_available(self):
+        self.client.force_login(self.user)
+        data = self.client.get('/api/tasks/?page=1').json()
+        self.assertEqual(data['count'], 12)
+
+
+class TaskSerializerFieldsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('member', password='pass')
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(title='Проект')
+        ProjectMembership.objects.create(project=self.project, user=self.user, role='owner')
+        Task.objects.bulk_create([
+            Task(project=self.project, title=str(i), author=self.user) for i in range(20)
+        ])
+
+    def get(self, query=''):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(f'/api/tasks/{query}').json()
+        return data['results'], len(ctx.captured_queries)
+
+    def test_default_carries_only_project_id(self):
+        results, _ = self.get()
+        self.assertEqual(results[0]['project_id'], str(self.project.pk))
+        self.assertNotIn('project', results[0])
+        self.assertNotIn('author', results[0])
+
+    def test_expand_query_count_is_constant(self):
+        _, baseline = self.get()
+        results, queries = self.get('?expand=project,author')
+        self.assertEqual(queries, baseline)
+        self.assertEqual(results[0]['project']['title'], 'Проект')
+        self.assertNotIn('users', results[0]['project'])
+        self.assertEqual(results[0]['author'], 'member')
+
+    def test_sparse_fields(self):
+        results, _ = self.get('?fields=id,title,project&expand=project')
+        self.assertEqual(set(results[0]), {'id', 'title', 'project'})
+
+    def test_project_sparse_fields(self):
+        data = self.client.get('/api/projects/?fields=id,title').json()
+        self.assertEqual(set(data['results'][0]), {'id', 'title'})
+
+
+class TaskBulkApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('member', password='pass')
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(title='Проект')
+        ProjectMembership.objects.create(project=self.project, user=self.user, role='member')
+        self.foreign = Project.objects.create(title='Чужой')
+
+    def post(self, url, payload):
+        return self.client.post(url, payload, content_type='application/json')
+
+    def test_bulk_create(self):
+        items = [{'project_id': str(self.project.pk), 'title': f'Задача {i}'} for i in range(50)]
+        items.append({'project_id': str(self.foreign.pk), 'title': 'Чужая'})
+        items.append({'project_id': str(self.project.pk)})
+
+        response = self.post('/api/tasks/bulk-create/', {'items': items})
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['created'], 50)
+        self.assertEqual([r['result'] for r in data['results'][-2:]], ['error', 'error'])
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.tasks_not_started, 50)
+        self.assertFalse(self.foreign.tasks.exists())
+        self.assertEqual(Task.objects.filter(author=self.user).count(), 50)
+
+    def test_bulk_status_and_delete(self):
+        tasks = Task.objects.bulk_create([Task(project=self.project, title=str(i)) for i in range(6)])
+        foreign = Task.objects.create(project=self.foreign, title='Чужая')
+        before = Task.objects.get(pk=tasks[0].pk).updated_at
+
+        items = [{'id': str(task.pk), 'status': 'done'} for task in tasks[:4]]
+        items.append({'id': str(foreign.pk), 'status': 'done'})
+        data = self.post('/api/tasks/bulk-status/', {'items': items}).json()
+        self.assertEqual(data['updated'], 4)
+        self.assertEqual(data['results'][-1]['result'], 'error')
+        self.assertGreater(Task.objects.get(pk=tasks[0].pk).updated_at, before)
+        self.assertEqual(Task.objects.get(pk=foreign.pk).status, 'not_started')
+
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.tasks_done, self.project.tasks_not_started), (4, 2))
+
+        ids = [str(task.pk) for task in tasks[:3]] + [str(foreign.pk), 'bad']
+        data = self.post('/api/tasks/bulk-delete/', {'ids': ids}).json()
+        self.assertEqual(data['deleted'], 3)
+        self.assertTrue(Task.objects.filter(pk=foreign.pk).exists())
+
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.tasks_done, self.project.tasks_not_started), (1, 2))
+
+    def test_duplicate_ids(self):
+        task, other = Task.objects.bulk_create([Task(project=self.project, title=str(i)) for i in range(2)])
+        items = [{'id': str(task.pk), 'status': 'done'}, {'id': str(other.pk), 'status': 'done'},
+                 {'id': str(task.pk), 'status': 'in_progress'}]
+        data = self.post('/api/tasks/bulk-status/', {'items': items}).json()
+        self.assertEqual(data['updated'], 2)
+        self.assertEqual([result['result'] for result in data['results']], ['updated', 'updated', 'error'])
+        self.assertEqual(data['results'][2]['errors'], {'id': [DUPLICATE_ID]})
+        self.assertEqual(Task.objects.get(pk=task.pk).status, 'done')
+
+        data = self.post('/api/tasks/bulk-delete/', {'ids': [str(task.pk), str(task.pk)]}).json()
+        self.assertEqual(data['deleted'], 1)
+        self.assertEqual([(result['index'], result['result']) for result in data['results']],
+                         [(0, 'deleted'), (1, 'error')])
+
+    def test_limits(self):
+        with mock.patch.object(TaskViewSet, 'bulk_max_items', 2):
+            response = self.post('/api/tasks/bulk-delete/', {'ids': [str(uuid.uuid4())] * 3})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post('/api/tasks/bulk-delete/', {'ids': []}).status_code, 400)
+
+
+class CleanupOldTasksTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(title='Проект')
+        Task.objects.bulk_create([
+            Task(project=self.project, title=str(i), status='done') for i in range(7)
+        ] + [Task(project=self.project, title='свежая', status='done'),
+             Task(project=self.project, title='в работе', status='in_progress')])
+        Task.objects.exclude(title__in=['свежая', 'в работе']).update(
+            updated_at=timezone.now() - timedelta(days=40)
+        )
+        Task.objects.filter(title='в работе').update(updated_at=timezone.now() - timedelta(days=40))
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('cleanup_old_tasks', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run(self):
+        output = self.run_command('--dry-run')
+        self.assertIn('7', output)
+        self.assertEqual(Task.objects.count(), 9)
+
+    def test_batched_delete_keeps_counters(self):
+        output = self.run_command('--batch-size', '3')
+        self.assertIn('Пакет 3: удалено 1 (всего 7)', output)
+        self.assertEqual(
+            set(Task.objects.values_list('title', flat=True)), {'свежая', 'в работе'}
+        )
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.tasks_done, self.project.tasks_in_progress), (1, 1))
+
+    def test_unindexes_and_publishes(self):
+        search.index_objects(Task, Task.objects.all())
+        with mock.patch('projects.events.publish') as publish:
+            self.run_command('--batch-size', '3')
+        self.assertEqual(publish.call_args_list, [mock.call(self.project.pk, 'tasks.changed')] * 3)
+        if search.fts_available():
+            found = Task.objects.filter(pk__in=search.matching(Task, search.build_match('свежая')))
+            self.assertEqual(found.count(), 1)
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT count(*) FROM {search._table_for(Task)}_ids')
+                self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_days_and_max_runtime(self):
+        self.run_command('--days', '60')
+        self.assertEqual(Task.objects.count(), 9)
+
+        output = self.run_command('--batch-size', '2', '--max-runtime', '0.000001')
+        self.assertIn('--max-runtime', output)
+        self.assertEqual(Task.objects.count(), 7)
+
+
+class TaskUpdateStatusTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('member', password='pass')
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(title='Проект')
+        ProjectMembership.objects.create(project=self.project, user=self.user, role='member')
+        self.task = Task.objects.create(project=self.project, title='Задача')
+        Task.objects.create(project=self.project, title='Готовая', status='done')
+        self.url = f'/tasks/{self.task.pk}/update-status/'
+
+    def test_redirect_without_htmx(self):
+        response = self.client.post(self.url, {'status': 'in_progress'})
+        self.assertRedirects(response, f'/projects/{self.project.pk}/', fetch_redirect_response=False)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'in_progress')
+
+    def test_htmx_returns_row_and_progress(self):
+        # Сессия, пользователь, задача с проектом, UPDATE задачи, UPDATE проекта
+        with self.assertNumQueries(5):
+            response = self.client.post(self.url, {'status': 'done'}, HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'id="task-{self.task.pk}"')
+        self.assertContains(response, 'hx-swap-oob="true"')
+        self.assertContains(response, 'Завершено: 2 из 2 задач')
+        self.assertContains(response, 'width: 100.0%')
+
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.tasks_not_started, self.project.tasks_done), (0, 2))
+
+    def test_hidden_completed_row_is_removed(self):
+        Project.objects.filter(pk=self.project.pk).update(show_completed=False)
+        response = self.client.post(self.url, {'status': 'done'}, HTTP_HX_REQUEST='true')
+        self.assertNotContains(response, f'id="task-{self.task.pk}"')
+        self.assertContains(response, 'id="project-progress"')
+
+    def test_foreign_task_and_bad_status(self):
+        self.assertEqual(self.client.post(self.url, {'status': 'nope'}).status_code, 400)
+        foreign = Task.objects.create(project=Project.objects.create(title='Чужой'), title='x')
+        response = self.client.post(f'/tasks/{foreign.pk}/update-status/', {'status': 'done'})
+        self.assertEqual(response.status_code, 404)
+
+
+class AsyncTaskApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('member', password='pass')
+        self.project = Project.objects.create(title='Проект')
+        ProjectMembership.objects.create(project=self.project, user=self.user, role='member')
+        Task.objects.bulk_create([
+            Task(project=self.project, title=f'Задача {i}', author=self.user) for i in range(25)
+        ])
+        Task.objects.create(project=Project.objects.create(title='Чужой'), title='x')
+        self.client.force_login(self.user)
+
+    async def test_matches_sync_viewset(self):
+        await self.async_client.aforce_login(self.user)
+        sync_page = (await sync_to_async(self.client.get)('/api/tasks/?expand=project,author')).json()
+        page = (await self.async_client.get('/api/async/tasks/?expand=project,author')).json()
+        self.assertEqual(page['results'], sync_page['results'])
+        self.assertEqual(len(page['results']), 20)
+
+        rest = (await self.async_client.get(page['next'])).json()
+        self.assertEqual(len(rest['results']), 5)
+        self.assertIsNone(rest['next'])
+
+        task_id = page['results'][0]['id']
+        response = await self.async_client.get(f'/api/async/tasks/{task_id}/?fields=id,title')
+        self.assertEqual(response.json(), {'id': task_id, 'title': page['results'][0]['title']})
+
+    async def test_foreign_task_and_bad_cursor(self):
+        await self.async_client.aforce_login(self.user)
+        foreign = await Task.objects.aget(title='x')
+        self.assertEqual((await self.async_client.get(f'/api/async/tasks/{foreign.pk}/')).status_code, 404)
+        self.assertEqual((await self.async_client.get('/api/async/tasks/?cursor=garbage')).status_code, 404)
+
+    async def test_project_filter(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/api/async/tasks/?project=bad')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Неверный идентификатор проекта'})
+        page = (await self.async_client.get(f'/api/async/tasks/?project={self.project.pk}')).json()
+        self.assertEqual(len(page['results']), 20)
+
+
+
+class TaskKeyTests(TestCase):
+    def test_new_tasks_get_time_ordered_keys(self):
+        project = Project.objects.create(title='Проект')
+        tasks = [Task.objects.create(project=project, title=f'Задача {i}') for i in range(20)]
+        self.assertEqual({task.pk.version for task in tasks}, {7})
+        self.assertEqual(list(Task.objects.order_by('pk')), tasks)
@@ -8,6 +8,7 @@ from django.urls import reverse_lazy
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from projects.models import Project
+from . import counters
 from .models import Task
 from django.contrib.auth.mixins import LoginRequiredMixin
 
@@ -86,23 +87,50 @@ class TaskUpdate(generic.UpdateView):
     def get_success_url(self):
         return reverse_lazy('projects:project-detail', kwargs={'pk': self.object.project.id})
 
-class TaskUpdateStatus(generic.UpdateView):
+class TaskUpdateStatus(LoginRequiredMixin, generic.UpdateView):
+    """Смена статуса из списка задач.
+
+    HTMX-запрос получает только перерисованную строку задачи и
+    out-of-band блок прогресса проекта; счётчики пересчитываются в памяти
+    по изменённой строке, без повторной загрузки проекта. Обычные клиенты
+    по-прежнему получают редирект на страницу проекта.
+    """
     model = Task
     fields = ['status']
     http_method_names = ['post']
+    login_url = '/accounts/login/'
+
+    def get_queryset(self):
+        # Задача и проект одним запросом, только из проектов пользователя
+        return Task.objects.select_related('project').filter(project__users=self.request.user)
+
+    def get_object(self, queryset=None):
+        task = super().get_object(queryset)
+        self.previous_status = task.status
+        return task
 
     def form_valid(self, form):
-        self.object = form.save()
-        return HttpResponseRedirect(self.get_success_url())
+        self.object = form.save(commit=False)
+        # Только статус: без переиндексации текста, счётчики — дельтой из сигнала
+        self.object.save(update_fields=['status', 'updated_at'])
+        if not self.request.htmx:
+            return HttpResponseRedirect(self.get_success_url())
+
+        project = self.object.project
+        if self.previous_status != self.object.status:
+            for status, delta in ((self.previous_status, -1), (self.object.status, 1)):
+                field = counters.STATUS_FIELDS[status]
+                setattr(project, field, max(getattr(project, field) + delta, 0))
+        return render(self.request, 'tasks/task_status_update.html', {
+            'task': self.object,
+            'project': project,
+            # Скрытые завершённые задачи убираем из списка (пустой outerHTML)
+            'show_row': project.show_completed or self.object.status != Task.Status.DONE,
+        })
     
     def form_invalid(self, form):
         return HttpResponseBadRequest("Неверный статус задачи")
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['page_title'] = 'Редактировать задачу'
-        return context
-
     def get_success_url(self):
         return reverse_lazy('projects:project-detail', kwargs={'pk': self.object.project.id})
 
@@ -1,13 +1,31 @@
-from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from projects.conditional import ConditionalGetMixin, has_pending_state, make_etag, project_validators
+from projects.roles import get_resolver
+from projects.search import FullTextSearchFilter
+from projects.serializers import parse_list_param
 from .models import Task
-from .serializers import TaskSerializer
+from .serializers import TaskBulkCreateSerializer, TaskBulkStatusSerializer, TaskSerializer
+from .pagination import TaskKeysetPagination
 
+# Повтор id в массовом запросе: обрабатывается только первое вхождение
+DUPLICATE_ID = 'Задача указана в запросе повторно'
 
-class TaskViewSet(viewsets.ModelViewSet):
+
+class TaskViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = TaskKeysetPagination
+    filter_backends = [FullTextSearchFilter]
+    search_fields = ['title', 'description']
+
+    # Максимум элементов в одном массовом запросе
+    bulk_max_items = 5000
 
     def get_queryset(self):
         queryset = Task.objects.all()
@@ -17,5 +35,164 @@ class TaskViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(project_id=project_id)
         
         queryset = queryset.filter(project__users=self.request.user)
+
+        # Подгружаем связи только для раскрытых полей (?expand=project,author)
+        expand = parse_list_param(self.request, 'expand') or set()
+        fields = parse_list_param(self.request, 'fields')
+        related = [
+            name for name in ('project', 'author')
+            if name in expand and (not fields or name in fields)
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
         
-        return queryset
\ No newline at end of file
+        return queryset
+
+    def get_list_validators(self):
+        project_id = self.kwargs.get('project_pk')
+        if project_id is not None:
+            return project_validators(self.request, project_id)
+        return super().get_list_validators()
+
+    def get_validators_queryset(self):
+        """Версия проекта задачи: одна строка по pk, без сортировки (first() вернул бы ORDER BY id)"""
+        return Task.objects.filter(
+            pk=self.kwargs['pk'], project__users=self.request.user
+        ).order_by().values_list('project__version', 'project__changed_at')[:1]
+
+    def get_object_validators(self):
+        if not self.request.user.is_authenticated or has_pending_state(self.request):
+            return None, None
+        row = next(iter(self.get_validators_queryset()), None)
+        if row is None:
+            return None, None
+        version, changed_at = row
+        return make_etag(self.request, self.kwargs['pk'], version), changed_at
+
+    def _bulk_items(self, request, key):
+        """Список элементов из тела запроса или Response с ошибкой"""
+        items = request.data.get(key) if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return None, Response(
+                {"detail": f"Ожидается непустой список {key}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.bulk_max_items:
+            return None, Response(
+                {"detail": f"Не более {self.bulk_max_items} элементов за запрос"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return items, None
+
+    @action(detail=False, methods=['post'], url_path='bulk-create', permission_classes=[IsAuthenticated])
+    def bulk_create(self, request):
+        """Массовое создание задач: {"items": [{"project_id", "title", ...}]}"""
+        items, error = self._bulk_items(request, 'items')
+        if error:
+            return error
+
+        resolver = get_resolver(request)
+        results, tasks = [], []
+        for index, item in enumerate(items):
+            serializer = TaskBulkCreateSerializer(data=item)
+            if not serializer.is_valid():
+                results.append({"index": index, "result": "error", "errors": serializer.errors})
+                continue
+            data = serializer.validated_data
+            if not resolver.is_member(data['project_id']):
+                results.append({"index": index, "result": "error", "errors": {"project_id": ["Нет доступа к проекту"]}})
+                continue
+            # id генерируется в приложении (default=uuid7), поэтому известен до вставки
+            task = Task(author=request.user, **data)
+            tasks.append(task)
+            results.append({"index": index, "id": str(task.pk), "result": "created"})
+
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks, batch_size=500)
+
+        code = status.HTTP_201_CREATED if tasks else status.HTTP_400_BAD_REQUEST
+        return Response({"created": len(tasks), "results": results}, status=code)
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk-status', permission_classes=[IsAuthenticated])
+    def bulk_status(self, request):
+        """Массовая смена статуса: {"items": [{"id", "status"}]}"""
+        items, error = self._bulk_items(request, 'items')
+        if error:
+            return error
+
+        results, wanted = [], {}
+        for index, item in enumerate(items):
+            serializer = TaskBulkStatusSerializer(data=item)
+            if not serializer.is_valid():
+                results.append({"index": index, "result": "error", "errors": serializer.errors})
+                continue
+            task_id = serializer.validated_data['id']
+            if task_id in wanted:
+                results.append({"index": index, "id": str(task_id), "result": "error", "errors": {"id": [DUPLICATE_ID]}})
+                continue
+            wanted[task_id] = (index, serializer.validated_data['status'])
+
+        resolver = get_resolver(request)
+        existing = dict(
+            Task.objects.filter(pk__in=list(wanted)).values_list('pk', 'project_id')
+        )
+
+        by_status = {}
+        for task_id, (index, new_status) in wanted.items():
+            project_id = existing.get(task_id)
+            if project_id is None or not resolver.is_member(project_id):
+                results.append({"index": index, "id": str(task_id), "result": "error", "errors": {"id": ["Задача не найдена"]}})
+                continue
+            by_status.setdefault(new_status, []).append(task_id)
+            results.append({"index": index, "id": str(task_id), "result": "updated"})
+
+        now = timezone.now()
+        with transaction.atomic():
+            # Один UPDATE на каждый целевой статус
+            for new_status, task_ids in by_status.items():
+                Task.objects.filter(pk__in=task_ids).update(status=new_status, updated_at=now)
+
+        results.sort(key=lambda result: result['index'])
+        updated = sum(len(task_ids) for task_ids in by_status.values())
+        return Response({"updated": updated, "results": results})
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete', permission_classes=[IsAuthenticated])
+    def bulk_delete(self, request):
+        """Массовое удаление: {"ids": [...]}"""
+        items, error = self._bulk_items(request, 'ids')
+        if error:
+            return error
+
+        results, wanted = [], {}
+        id_field = serializers.UUIDField()
+        for index, item in enumerate(items):
+            try:
+                task_id = id_field.run_validation(item)
+            except serializers.ValidationError as exc:
+                results.append({"index": index, "result": "error", "errors": {"id": exc.detail}})
+                continue
+            if task_id in wanted:
+                results.append({"index": index, "id": str(task_id), "result": "error", "errors": {"id": [DUPLICATE_ID]}})
+                continue
+            wanted[task_id] = index
+
+        resolver = get_resolver(request)
+        existing = dict(
+            Task.objects.filter(pk__in=list(wanted)).values_list('pk', 'project_id')
+        )
+
+        allowed = []
+        for task_id, index in wanted.items():
+            project_id = existing.get(task_id)
+            if project_id is None or not resolver.is_member(project_id):
+                results.append({"index": index, "id": str(task_id), "result": "error", "errors": {"id": ["Задача не найдена"]}})
+                continue
+            allowed.append(task_id)
+            results.append({"index": index, "id": str(task_id), "result": "deleted"})
+
+        with transaction.atomic():
+            if allowed:
+                Task.objects.filter(pk__in=allowed).delete()
+
+        results.sort(key=lambda result: result['index'])
+        return Response({"deleted": len(allowed), "results": results})
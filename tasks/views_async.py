@@ -0,0 +1,73 @@
+import uuid
+
+from projects.serializers import parse_list_param
+from projects.views_async import AsyncReadOnlyAPIView
+from .models import Task
+from .pagination import TaskKeysetPagination, apaginate_keyset
+from .serializers import TaskSerializer
+
+
+class TaskAsyncView(AsyncReadOnlyAPIView):
+    """/api/async/tasks/ и /api/async/tasks/<pk>/ — как list/retrieve
+    TaskViewSet: задачи проектов пользователя, keyset-пагинация по курсору
+    (режима ?page= здесь нет), ?fields= и ?expand=project,author"""
+    serializer_class = TaskSerializer
+    pagination = TaskKeysetPagination
+
+    def project_id(self):
+        """UUID из ?project= или None; ValueError для неверного значения"""
+        value = self.request.GET.get('project')
+        return uuid.UUID(value) if value else None
+
+    def get_queryset(self):
+        queryset = Task.objects.filter(project__users=self.resolver.user)
+        project_id = self.project_id()
+        if project_id is not None:
+            queryset = queryset.filter(project_id=project_id)
+
+        expand = parse_list_param(self.api_request, 'expand') or set()
+        fields = parse_list_param(self.api_request, 'fields')
+        related = [
+            name for name in ('project', 'author')
+            if name in expand and (not fields or name in fields)
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset
+
+    def invalid_project(self):
+        try:
+            self.project_id()
+        except ValueError:
+            return self.error('Неверный идентификатор проекта', 400)
+        return None
+
+    async def alist(self):
+        error = self.invalid_project()
+        if error is not None:
+            return error
+        pagination = self.pagination()
+        pagination.request = self.api_request
+        try:
+            page = await apaginate_keyset(
+                self.get_queryset(),
+                self.request.GET.get(pagination.cursor_query_param),
+                pagination.get_page_size(self.api_request),
+            )
+        except ValueError:
+            return self.error('Неверный курсор', 404)
+        return self.respond({
+            'next': pagination.get_link(page.next_cursor),
+            'previous': pagination.get_link(page.previous_cursor),
+            'results': self.serialize(list(page), many=True),
+        })
+
+    async def aretrieve(self, pk):
+        error = self.invalid_project()
+        if error is not None:
+            return error
+        try:
+            task = await self.get_queryset().aget(pk=pk)
+        except (Task.DoesNotExist, Task.MultipleObjectsReturned):
+            return self.error('No Task matches the given query.', 404)
+        return self.respond(self.serialize(task))
@@ -3,6 +3,10 @@ ASGI config for todo project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Поток событий проекта (projects.views.ProjectEvents) работает только под
+ASGI-сервером, например ``uvicorn todo.asgi:application``; для нескольких
+воркеров нужен TODO_EVENTS_BACKEND=file.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
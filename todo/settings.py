@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,11 +41,14 @@ INSTALLED_APPS = [
     'projects.apps.ProjectsConfig',
     'tasks.apps.TasksConfig',
     'accounts.apps.AccountsConfig',
+    'jobs.apps.JobsConfig',
     'simple_history',
     'rest_framework'
 ]
 
 MIDDLEWARE = [
+    'projects.metrics.MetricsMiddleware',
+    'projects.routers.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,11 +82,201 @@ WSGI_APPLICATION = 'todo.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+#
+# Соединения живут TODO_DB_CONN_MAX_AGE секунд и проверяются перед
+# повторным использованием. Под ASGI запросы идут из разных потоков —
+# там лучше TODO_DB_CONN_MAX_AGE=0. Транзакции начинаются с BEGIN IMMEDIATE:
+# писатель ждёт блокировку (busy_timeout) сразу, а не получает
+# "database is locked" при попытке повысить блокировку чтения до записи.
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('TODO_DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+# Реплики для чтения (projects.routers): TODO_DB_REPLICAS — файлы SQLite
+# через запятую, их наполняет команда replicate_db (имитация репликации).
+# После записи браузер PIN_SECONDS читает с основной базы.
+
+for number, path in enumerate(filter(None, os.environ.get('TODO_DB_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['projects.routers.PrimaryReplicaRouter']
+
+DB_ROUTING = {
+    'REPLICAS': [alias for alias in DATABASES if alias != 'default'],
+    'PIN_SECONDS': 5,
+    'PIN_COOKIE': 'db_pin',
+}
+
+# PRAGMA для каждого нового соединения (projects.sqlite):
+# TODO_SQLITE_PROFILE=production — WAL, synchronous=NORMAL, busy_timeout,
+# mmap и кеш страниц; default — настройки SQLite по умолчанию.
+# PRAGMAS дополняет или переопределяет значения профиля.
+
+SQLITE = {
+    'PROFILE': os.environ.get('TODO_SQLITE_PROFILE', 'production'),
+    'PRAGMAS': {},
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# TODO_CACHE_BACKEND=locmem — память процесса (один воркер),
+# TODO_CACHE_BACKEND=file — файловый кеш, общий для нескольких воркеров.
+
+CACHE_BACKEND = os.environ.get('TODO_CACHE_BACKEND', 'locmem')
+CACHE_DIR = Path(os.environ.get('TODO_CACHE_DIR', BASE_DIR / '.cache'))
+
+
+def _cache(name, timeout=300, max_entries=300):
+    if CACHE_BACKEND == 'file':
+        return {
+            'BACKEND': 'projects.cache.CountingFileBasedCache',
+            'LOCATION': str(CACHE_DIR / name),
+            'TIMEOUT': timeout,
+            'OPTIONS': {'MAX_ENTRIES': max_entries},
+        }
+    return {
+        'BACKEND': 'projects.cache.CountingLocMemCache',
+        'LOCATION': name,
+        'TIMEOUT': timeout,
+        'OPTIONS': {'MAX_ENTRIES': max_entries},
     }
+
+
+CACHES = {
+    'default': _cache('default'),
+    # HTML-фрагменты (список задач, карточки проектов); ключи включают
+    # Project.version, поэтому изменения сами делают старые записи недостижимыми
+    'fragments': _cache('fragments', timeout=600),
+    # Сессии (SESSION_ENGINE=cache/cached_db) отдельно от 'default': вытеснение
+    # чужих ключей не разлогинивает пользователей. Срок задаёт сам движок сессий
+    'sessions': _cache('sessions', timeout=None, max_entries=100_000),
+    # Роли пользователей в проектах (projects.roles). Сброс invalidate_user
+    # виден всем воркерам только в общем кеше: с locmem у каждого процесса
+    # свои роли (предупреждение projects.W001 в check --deploy)
+    'roles': _cache('roles', timeout=60 * 60, max_entries=10_000),
+}
+FRAGMENT_CACHE_ALIAS = 'fragments'
+ROLES_CACHE_ALIAS = 'roles'
+
+
+# Сессии
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/#configuring-the-session-engine
+#
+# TODO_SESSION_ENGINE=db — django_session в SQLite: чтение на каждый запрос
+# авторизованного пользователя;
+# TODO_SESSION_ENGINE=cached_db — чтение из кеша 'sessions', запись сквозная
+# в базу (с locmem у каждого процесса свой кеш: для нескольких воркеров —
+# TODO_CACHE_BACKEND=file);
+# TODO_SESSION_ENGINE=cache — сессия только в кеше 'sessions'; требует
+# общего кеша (TODO_CACHE_BACKEND=file), с locmem не пройдёт проверку
+# projects.E001: сессия, созданная одним воркером, не видна другим;
+# TODO_SESSION_ENGINE=signed_cookies — сессия в подписанной cookie, база не
+# нужна вовсе, но выход не отзывает уже выданную cookie.
+# Сессия сохраняется только при изменении (SESSION_SAVE_EVERY_REQUEST=False):
+# страницы, которые ничего не меняют, в неё не пишут (projects.oneshot).
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('TODO_SESSION_ENGINE', 'db')]
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_SAVE_EVERY_REQUEST = False
+
+
+# Поток событий проекта (SSE, только под ASGI)
+#
+# TODO_EVENTS_BACKEND=memory — брокер в памяти процесса (один воркер),
+# TODO_EVENTS_BACKEND=file — журналы событий в TODO_EVENTS_DIR, общие для
+# нескольких воркеров на одной машине.
+
+EVENTS = {
+    'BACKEND': os.environ.get('TODO_EVENTS_BACKEND', 'memory'),
+    'DIR': Path(os.environ.get('TODO_EVENTS_DIR', BASE_DIR / '.cache' / 'events')),
+    # Сколько последних событий проекта хранится для возобновления по Last-Event-ID
+    'BUFFER_SIZE': 500,
+    # Интервал комментария-keepalive и максимальная длина одного соединения (с)
+    'KEEPALIVE': 15,
+    'MAX_DURATION': 300,
+    # Как часто файловый бэкенд проверяет журналы (с)
+    'POLL_INTERVAL': 0.5,
+}
+
+
+# Метрики запросов (projects.metrics): гистограммы в памяти процесса,
+# /metrics в формате Prometheus. Доступ — staff, Bearer-токен
+# TODO_METRICS_TOKEN или адреса из TODO_METRICS_ALLOWED_IPS (через запятую).
+
+METRICS = {
+    'ENABLED': os.environ.get('TODO_METRICS', '1') != '0',
+    'SERVER_TIMING': True,
+    'TOKEN': os.environ.get('TODO_METRICS_TOKEN', ''),
+    'ALLOWED_IPS': [ip for ip in os.environ.get('TODO_METRICS_ALLOWED_IPS', '').split(',') if ip],
+    'EXCLUDE_PATHS': ['/metrics'],
+}
+
+
+# История проектов (projects.history, команда compact_project_history):
+# первые KEEP_ALL_DAYS дней хранится всё, дальше — последний снимок проекта
+# за сутки (GRANULARITY='day') или неделю ('week').
+
+PROJECT_HISTORY = {
+    'KEEP_ALL_DAYS': 30,
+    'GRANULARITY': 'day',
+}
+
+
+# Фоновые задачи (jobs): очередь в основной базе, воркеры — команда
+# run_workers. Блокировка задачи (VISIBILITY_TIMEOUT, с) продлевается
+# job.report(); упавшая задача повторяется через RETRY_BACKOFF * 2^n с.
+# SCHEDULE — периодические задачи вместо cron: {имя: {job, payload, every}}.
+
+JOBS = {
+    'VISIBILITY_TIMEOUT': 300,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_BACKOFF': 10,
+    'RETRY_BACKOFF_MAX': 3600,
+    'POLL_INTERVAL': 1.0,
+    'SCHEDULE': {
+        'cleanup-old-tasks': {
+            'job': 'jobs.call_command',
+            'payload': {'command': 'cleanup_old_tasks'},
+            'every': 24 * 60 * 60,
+        },
+        'purge-invitations': {
+            'job': 'jobs.call_command',
+            'payload': {'command': 'purge_invitations'},
+            'every': 24 * 60 * 60,
+        },
+        'compact-project-history': {
+            'job': 'jobs.call_command',
+            'payload': {'command': 'compact_project_history'},
+            'every': 7 * 24 * 60 * 60,
+        },
+        'purge-jobs': {
+            'job': 'jobs.call_command',
+            'payload': {'command': 'purge_jobs'},
+            'every': 24 * 60 * 60,
+        },
+    },
 }
 
 
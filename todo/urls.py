@@ -22,8 +22,12 @@ from django.views.generic import RedirectView
 from accounts.views import UserDeleteView
 
 from rest_framework.routers import DefaultRouter
-from projects.views_api import ProjectViewSet
+from projects.views_api import CacheStatsView, ExportView, ProjectViewSet
+from projects.views_async import ProjectAsyncView
+from projects.metrics import metrics_view
+from jobs.views import JobStatusView
 from tasks.views_api import TaskViewSet
+from tasks.views_async import TaskAsyncView
 
 router = DefaultRouter()
 router.register(r'projects', ProjectViewSet, basename='project')
@@ -32,11 +36,19 @@ router.register(r'tasks', TaskViewSet)
 urlpatterns = [
     path('', RedirectView.as_view(url='/projects/', permanent=True)),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('projects/', include('projects.urls')),
     path('tasks/', include('tasks.urls')),
     path('accounts/', include('django.contrib.auth.urls')),
     path('accounts/signup/', register, name='register'),
     path('accounts/user/<int:pk>/delete/', UserDeleteView.as_view(), name='user-delete'),
+    path('api/cache-stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('api/jobs/<uuid:pk>/', JobStatusView.as_view(), name='job-status'),
+    path('api/export/<slug:kind>.<slug:fmt>', ExportView.as_view(), name='export'),
+    path('api/async/projects/', ProjectAsyncView.as_view(), name='async-project-list'),
+    path('api/async/projects/<uuid:pk>/', ProjectAsyncView.as_view(), name='async-project-detail'),
+    path('api/async/tasks/', TaskAsyncView.as_view(), name='async-task-list'),
+    path('api/async/tasks/<uuid:pk>/', TaskAsyncView.as_view(), name='async-task-detail'),
     path('api/', include(router.urls)),
     path('api/projects/<uuid:project_pk>/tasks/', TaskViewSet.as_view({'get': 'list', 'post': 'create'}), name='project-tasks-list')
 ]
\ No newline at end of file